@@ -0,0 +1,220 @@
+"""
+Load test of the read API (python -m src serve, see src/server.py).
+
+Run from the project root:
+    python -m benchmarks.bench_api --rows 505 --connections 16 --duration 5
+Builds a database with one synthetic page, then drives each server with --connections
+keep-alive clients for --duration seconds and reports p50/p99 latency and requests per second:
+  naive:    a ThreadingHTTPServer that opens the database on every request (the baseline)
+  no_cache: the read API with its connection pool and the cache disabled (--cache-size 0)
+  cache:    the read API with the LRU result cache
+The request mix is point lookups by symbol and by CIK, batch lookups of --batch symbols,
+summary tables and point-in-time members. Every server must give the same answers to a
+fixed set of requests; the script aborts otherwise. The clients run in this process
+(asyncio), so on few cores the client competes with the server for CPU.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from src import config, queries
+from benchmarks.bench_startup import build_database
+
+
+# --- Baseline server: one connection per request ---
+
+def run_naive_server(db_path: str, port: int) -> None:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            params = parse_qs(url.query)
+            conn = queries.connect_readonly(db_path)
+            try:
+                if url.path.startswith("/companies/"):
+                    result = queries.company(conn, url.path[len("/companies/"):])
+                    payload = dict(zip(result.columns, result.rows[0])) if result.rows else None
+                elif url.path == "/companies":
+                    symbols = [s for raw in params.get("symbol", []) for s in raw.split(",")]
+                    result = queries.companies_by(conn, config.DB_KEY_COLUMN, symbols)
+                    rows = {row[0]: dict(zip(result.columns, row)) for row in result.rows}
+                    payload = {"companies": [rows[s] for s in symbols if s in rows],
+                               "not_found": [s for s in symbols if s not in rows]}
+                elif url.path == "/members":
+                    result = queries.members_as_of(conn, params["as_of"][0])
+                    payload = [dict(zip(result.columns, row)) for row in result.rows]
+                else:
+                    func = {"/sectors": queries.sector_counts, "/states": queries.state_counts,
+                            "/oldest": queries.oldest_companies}[url.path]
+                    result = func(conn)
+                    payload = [dict(zip(result.columns, row)) for row in result.rows]
+            finally:
+                conn.close()
+            body = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+            self.send_response(200 if payload is not None else 404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+# --- Client ---
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server exited with status {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise SystemExit(f"Server did not start listening on port {port}")
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str) -> Tuple[int, bytes]:
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+def request_paths(symbols: List[str], ciks: List[int], batch: int, n: int, seed: int = 0) -> List[str]:
+    """Request mix: 40% symbol lookups, 15% CIK lookups, 15% batches, 20% summaries, 10% members."""
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.40:
+            paths.append(f"/companies/{rng.choice(symbols)}")
+        elif kind < 0.55:
+            paths.append(f"/companies?cik={rng.choice(ciks)}")
+        elif kind < 0.70:
+            paths.append(f"/companies?symbol={','.join(rng.sample(symbols, min(batch, len(symbols))))}")
+        elif kind < 0.90:
+            paths.append(rng.choice(["/sectors", "/states", "/oldest"]))
+        else:
+            paths.append(f"/members?as_of={rng.randint(2000, 2024)}-{rng.randint(1, 12):02d}-15")
+    return paths
+
+
+async def _load(port: int, paths: List[str], connections: int, duration: float) -> Tuple[List[float], float, int]:
+    """Runs the clients until duration elapses. Returns (latencies in s, elapsed s, errors)."""
+    latencies: List[float] = []
+    errors = [0]
+    deadline = time.perf_counter() + duration
+
+    async def client(offset: int):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        index = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, paths[index % len(paths)])
+            latencies.append(time.perf_counter() - start)
+            if status >= 500:
+                errors[0] += 1
+            index += connections
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(connections)))
+    return latencies, time.perf_counter() - start, errors[0]
+
+
+async def _answers(port: int, paths: List[str]) -> List[Tuple[int, object]]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    answers = []
+    for path in paths:
+        status, body = await _request(reader, writer, path)
+        answers.append((status, json.loads(body) if status == 200 else None))
+    writer.close()
+    return answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=505)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--batch", type=int, default=50, help="Symbols per batch lookup.")
+    parser.add_argument("--pool-size", type=int, default=config.API_POOL_SIZE)
+    parser.add_argument("--naive-server", nargs=2, metavar=("DB", "PORT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.naive_server:
+        run_naive_server(args.naive_server[0], int(args.naive_server[1]))
+        return
+    logging.basicConfig(level=logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = build_database(directory, args.rows)
+        conn = sqlite3.connect(db_path)
+        symbols, ciks = map(list, zip(*conn.execute(f'SELECT "{config.DB_KEY_COLUMN}", "CIK" FROM "{config.DB_TABLE_NAME}"')))
+        conn.close()
+        paths = request_paths(symbols, ciks, args.batch, 20000)
+        check_paths = [path for path in request_paths(symbols, ciks, args.batch, 200, seed=1) if "cik=" not in path]
+
+        servers = {
+            "naive": [sys.executable, "-m", "benchmarks.bench_api", "--naive-server", db_path],
+            "no_cache": [sys.executable, "-m", "src", "--db", db_path, "serve", "--pool-size", str(args.pool_size),
+                         "--cache-size", "0", "--port"],
+            "cache": [sys.executable, "-m", "src", "--db", db_path, "serve", "--pool-size", str(args.pool_size),
+                      "--port"],
+        }
+        print(f"CPU count: {os.cpu_count()}, {args.connections} connections, {args.duration:.0f}s per server")
+        print(f"{'server':<10} {'requests':>9} {'rps':>8} {'p50_ms':>8} {'p99_ms':>8} {'errors':>7}")
+        reference = None
+        for name, command in servers.items():
+            port = _free_port()
+            process = subprocess.Popen(command + [str(port)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                _wait_for_port(port, process)
+                answers = asyncio.run(_answers(port, check_paths))
+                if reference is None:
+                    reference = answers
+                elif answers != reference:
+                    raise SystemExit(f"Server '{name}' answers differently from the naive server")
+                latencies, elapsed, errors = asyncio.run(_load(port, paths, args.connections, args.duration))
+            finally:
+                process.terminate()
+                process.wait()
+            quantiles = statistics.quantiles(latencies, n=100)
+            print(f"{name:<10} {len(latencies):>9} {len(latencies) / elapsed:>8.0f} "
+                  f"{quantiles[49] * 1000:>8.2f} {quantiles[98] * 1000:>8.2f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: parallel backfill of saved page revisions (backfill.backfill_revisions) with an
+increasing number of worker processes.
+
+Run from the project root:
+    python -m benchmarks.bench_backfill --revisions 200 --rows 505 --workers 1 2 4 8
+Writes --revisions synthetic revisions (one per week) to a temporary folder and backfills
+them into a fresh snapshot archive and history database per worker count. Reports the wall
+time, revisions per second and the speedup over one worker. Also reports the time of the
+ordered merge, which runs serially in the main process: it bounds the speedup
+(total time / merge time) regardless of the number of cores. All runs must produce the
+same history; the script aborts otherwise.
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+from src import backfill, config
+from benchmarks.synthetic_html import generate_page_html
+
+
+def write_revisions(directory: str, n_revisions: int, n_rows: int) -> None:
+    """One revision per week; the row count varies so consecutive revisions differ."""
+    first = date(2020, 1, 6)
+    for index in range(n_revisions):
+        day = first + timedelta(weeks=index)
+        html = generate_page_html(n_rows - 5 + (index * 7) % 11, n_changes=50)
+        with open(os.path.join(directory, f"sp500_{day.isoformat()}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+
+
+def _history_rows(db_path: str) -> list:
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(f'SELECT * FROM "{config.DB_HISTORY_TABLE_NAME}" ORDER BY 1, 2').fetchall()
+    conn.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--revisions", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=505)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    # The ordered merge is timed by wrapping the merge steps of the main process
+    merge_time = [0.0]
+    def timed(func):
+        def wrapper(*func_args, **func_kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*func_args, **func_kwargs)
+            finally:
+                merge_time[0] += time.perf_counter() - start
+        return wrapper
+    backfill.upsert_companies = timed(backfill.upsert_companies)
+    backfill.SnapshotArchive.write = timed(backfill.SnapshotArchive.write)
+
+    print(f"CPU count: {os.cpu_count()}")
+    print(f"{'workers':>8} {'wall_s':>8} {'rev_per_s':>10} {'speedup':>8} {'merge_s':>8} {'max_speedup':>12}")
+    with tempfile.TemporaryDirectory() as pages_dir:
+        write_revisions(pages_dir, args.revisions, args.rows)
+        baseline_time = baseline_rows = None
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory() as out_dir:
+                config.SNAPSHOT_DIR = os.path.join(out_dir, "snapshots")
+                db_path = os.path.join(out_dir, "backfill.db")
+                merge_time[0] = 0.0
+                start = time.perf_counter()
+                summary = backfill.backfill_revisions(pages_dir, targets=["snapshots", "history"], db_path=db_path,
+                                                      manifest_path=os.path.join(out_dir, "manifest.jsonl"),
+                                                      max_workers=workers)
+                elapsed = time.perf_counter() - start
+                rows = _history_rows(db_path)
+            if summary is None or summary["merged"] != args.revisions:
+                raise SystemExit(f"Backfill with {workers} workers did not merge every revision: {summary}")
+            if baseline_rows is None:
+                baseline_time, baseline_rows = elapsed, rows
+            elif rows != baseline_rows:
+                raise SystemExit(f"History built with {workers} workers differs from the 1-worker run")
+            print(f"{workers:>8} {elapsed:>8.2f} {args.revisions / elapsed:>10.1f} {baseline_time / elapsed:>7.2f}x "
+                  f"{merge_time[0]:>8.2f} {elapsed / merge_time[0]:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
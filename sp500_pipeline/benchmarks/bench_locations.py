@@ -0,0 +1,98 @@
+"""
+Benchmark: headquarters normalization (data_transformation.normalize_headquarters_columns)
+vs the previous vectorized comma split (split_headquarters_columns below).
+
+Run from the project root:
+    python -m benchmarks.bench_locations --rows 500 50000 1000000 --distinct 400
+The locations are those of benchmarks/synthetic_html.py with numbered city names, so a
+table has --distinct different values (the real page has a few hundred). Modes:
+  split       previous split on the first comma
+  cold        first run: empty lookup table, every distinct value is resolved and stored
+  persistent  new run: resolved values read from the lookup table
+  memo        same lookup: resolved values already in memory (streaming batches)
+cold and persistent include reading and writing the lookup table (LocationLookup.open/save).
+The script also reports how many rows get a different state than with the split and
+how many rows get a country.
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from typing import Tuple
+
+import pandas as pd
+
+from src.locations import LocationLookup
+from src.data_transformation import _as_inferred_column, _text_values, normalize_headquarters_columns
+from benchmarks.synthetic_html import LOCATIONS
+
+
+def split_headquarters_columns(hq_locations: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Previous transform_data step: (city, state) split on the first comma with one str.split."""
+    parts = _text_values(hq_locations).str.split(',', n=2, expand=True)
+    city = parts[0].str.strip()
+    state = parts[1].str.strip() if 1 in parts.columns else pd.Series(float('nan'), index=hq_locations.index)
+    return _as_inferred_column(city, hq_locations.index), _as_inferred_column(state, hq_locations.index)
+
+
+def build_locations(n_rows: int, distinct: int) -> pd.Series:
+    """n_rows locations cycling over `distinct` values ('City 7, State'...)."""
+    values = []
+    for i in range(distinct):
+        city, _, rest = LOCATIONS[i % len(LOCATIONS)].partition(",")
+        number = i // len(LOCATIONS)
+        values.append(f"{city}{f' {number}' if number else ''}{',' + rest if rest else ''}")
+    return pd.Series([values[i % distinct] for i in range(n_rows)], dtype=object)
+
+
+def _time(func, repeats: int, before=None):
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def _run(series: pd.Series, path: str):
+    """One pipeline run: read the lookup table, normalize, write the new entries."""
+    lookup = LocationLookup.open(path)
+    columns = normalize_headquarters_columns(series, lookup)
+    lookup.save()
+    return columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[500, 50000, 1000000])
+    parser.add_argument("--distinct", type=int, default=400)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"{'rows':>8} {'split_s':>9} {'cold_s':>9} {'persist_s':>9} {'memo_s':>9} "
+          f"{'state_changed':>13} {'with_country':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "location_lookup.db")
+
+        def remove_table():
+            if os.path.exists(path):
+                os.remove(path)
+
+        for n_rows in args.rows:
+            series = build_locations(n_rows, args.distinct)
+            (_, split_state), split_time = _time(lambda: split_headquarters_columns(series), args.repeats)
+            _, cold_time = _time(lambda: _run(series, path), args.repeats, before=remove_table)
+            _, persistent_time = _time(lambda: _run(series, path), args.repeats)
+            lookup = LocationLookup.open(path)
+            (_, state, country), memo_time = _time(lambda: normalize_headquarters_columns(series, lookup), args.repeats)
+            changed = int((state.fillna("") != split_state.fillna("")).sum())
+            print(f"{n_rows:>8} {split_time:>9.4f} {cold_time:>9.4f} {persistent_time:>9.4f} {memo_time:>9.4f} "
+                  f"{changed:>13} {int(country.notna().sum()):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: point-in-time membership lookups through the index_membership intervals
+(membership.get_members_as_of) vs replaying the constituent changes in Python for every date.
+
+Run from the project root:
+    python -m benchmarks.bench_membership --members 500 --changes 400 2000 10000 --dates 5000
+For each history size a synthetic page is loaded (constituents, changes and membership
+intervals) into a temporary database. Two replay baselines are timed: "replay_db" reads the
+current members and the changes after the date for every lookup (what a lookup API without
+the intervals has to do), "replay_mem" gets everything already in memory, newest first.
+All must return the same members for every date; the script aborts otherwise.
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import List, Optional, Sequence, Set, Tuple
+
+from src import config
+from src.data_extraction import parse_changes_table, parse_sp500_table
+from src.data_transformation import transform_changes, transform_data
+from src.database_operations import create_connection, save_constituent_changes, upsert_companies
+from src.membership import get_members_as_of, rebuild_index_membership
+from benchmarks.synthetic_html import generate_page_html
+
+
+def load_page(html: str, db_path: str) -> sqlite3.Connection:
+    conn = create_connection(db_path)
+    upsert_companies(transform_data(parse_sp500_table(html)), conn, config.DB_TABLE_NAME)
+    save_constituent_changes(transform_changes(parse_changes_table(html)), conn,
+                             on_changes=rebuild_index_membership)
+    return conn
+
+
+def replay_members(current: Set[str], changes: Sequence[Tuple[str, Optional[str], Optional[str]]],
+                   day: str) -> List[str]:
+    """Undoes every change after day, starting from the current members (changes newest first)."""
+    members = set(current)
+    for effective, added, removed in changes:
+        if effective <= day:
+            break
+        if added is not None:
+            members.discard(added)
+        if removed is not None:
+            members.add(removed)
+    return sorted(members)
+
+
+def replay_members_from_db(conn: sqlite3.Connection, day: str) -> List[str]:
+    """Stateless replay: reads the current members and the changes after day, then undoes them."""
+    current = {row[0] for row in conn.execute('SELECT "Symbol" FROM companies WHERE "Is_Active" = 1')}
+    changes = conn.execute('SELECT substr("Effective_Date", 1, 10), "Added_Symbol", "Removed_Symbol" '
+                           'FROM constituent_changes WHERE "Effective_Date" > ? ORDER BY "Effective_Date" DESC',
+                           (f"{day} 23:59:59",)).fetchall()
+    return replay_members(current, changes, day)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--changes", type=int, nargs="+", default=[400, 2000, 10000])
+    parser.add_argument("--dates", type=int, default=5000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"{'changes':>8} {'intervals':>10} {'dates':>6} {'replay_db_ms':>13} {'replay_mem_ms':>14} "
+          f"{'indexed_ms':>11} {'vs_db':>7} {'vs_mem':>7}")
+    for n_changes in args.changes:
+        html = generate_page_html(args.members, n_changes=n_changes)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            conn = load_page(html, os.path.join(tmp_dir, "membership.db"))
+            current = {row[0] for row in conn.execute('SELECT "Symbol" FROM companies WHERE "Is_Active" = 1')}
+            changes = conn.execute('SELECT substr("Effective_Date", 1, 10), "Added_Symbol", "Removed_Symbol" '
+                                   'FROM constituent_changes ORDER BY "Effective_Date" DESC').fetchall()
+            intervals = conn.execute(f"SELECT COUNT(*) FROM {config.MEMBERSHIP_TABLE_NAME}").fetchone()[0]
+            first, last = date.fromisoformat(changes[-1][0]), date.fromisoformat(changes[0][0])
+            rng = random.Random(0)
+            days = [(first + timedelta(days=rng.randint(-30, (last - first).days + 30))).isoformat()
+                    for _ in range(args.dates)]
+
+            start = time.perf_counter()
+            replayed_db = [replay_members_from_db(conn, day) for day in days]
+            replay_db_time = time.perf_counter() - start
+            start = time.perf_counter()
+            replayed = [replay_members(current, changes, day) for day in days]
+            replay_time = time.perf_counter() - start
+            start = time.perf_counter()
+            indexed = [get_members_as_of(conn, day) for day in days]
+            indexed_time = time.perf_counter() - start
+            conn.close()
+        if replayed != indexed or replayed_db != indexed:
+            raise SystemExit(f"Indexed lookups differ from the replay for {n_changes} changes")
+        print(f"{n_changes:>8} {intervals:>10} {len(days):>6} {replay_db_time * 1e3:>13.1f} {replay_time * 1e3:>14.1f} "
+              f"{indexed_time * 1e3:>11.1f} {replay_db_time / indexed_time:>6.1f}x {replay_time / indexed_time:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark: parse_sp500_table "stream" backend vs the BeautifulSoup ("bs4") backend.
+
+Run from the project root:
+    python -m benchmarks.bench_parser --rows 500 5000 50000
+Both backends must return identical DataFrames; the script aborts otherwise.
+"""
+import argparse
+import logging
+import time
+import tracemalloc
+
+import pandas as pd
+
+from src.data_extraction import parse_sp500_table
+from benchmarks.synthetic_html import generate_page_html
+
+
+def _measure(html: str, backend: str, repeats: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = parse_sp500_table(html, backend=backend)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    parse_sp500_table(html, backend=backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[500, 5000, 50000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-id", action="store_true", help="Omit id='constituents' to exercise the fallback path.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"{'rows':>8} {'backend':>8} {'best_s':>10} {'peak_MB':>10} {'speedup':>8}")
+    for n_rows in args.rows:
+        html = generate_page_html(n_rows, with_table_id=not args.no_id)
+        bs4_df, bs4_time, bs4_peak = _measure(html, "bs4", args.repeats)
+        stream_df, stream_time, stream_peak = _measure(html, "stream", args.repeats)
+        pd.testing.assert_frame_equal(bs4_df, stream_df)
+        print(f"{n_rows:>8} {'bs4':>8} {bs4_time:>10.4f} {bs4_peak / 1e6:>10.1f} {'1.0x':>8}")
+        print(f"{n_rows:>8} {'stream':>8} {stream_time:>10.4f} {stream_peak / 1e6:>10.1f} {bs4_time / stream_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: daily snapshot archive (snapshots.SnapshotArchive, Arrow IPC + monthly compaction)
+vs keeping a full copy of every day's table in SQLite (one table with a Snapshot_Date column
+and an index on it, written with DataFrame.to_sql).
+
+Run from the project root:
+    python -m benchmarks.bench_snapshots --rows 500 --days 30 365
+Each day is the previous table with a few rows changed. Reports the storage size, the time
+to write all the days, and the mean time of an as-of read and of a diff between two dates.
+Both stores must return the same tables; the script aborts otherwise.
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from src.data_extraction import parse_sp500_table
+from src.data_transformation import transform_data
+from src.snapshots import SnapshotArchive
+from benchmarks.synthetic_html import generate_page_html
+
+
+def daily_tables(n_rows: int, n_days: int, seed: int = 0):
+    """Yields (date, table): the same base table with a few rows changed every day."""
+    rng = random.Random(seed)
+    df = transform_data(parse_sp500_table(generate_page_html(n_rows)))
+    first = date(2025, 1, 1)
+    for offset in range(n_days):
+        df = df.copy()
+        for _ in range(3):
+            df.loc[rng.randrange(len(df)), "GICS_Sub_Industry"] = f"Sub-Industry {rng.randint(0, 99)}"
+        yield (first + timedelta(days=offset)).isoformat(), df
+
+
+def sqlite_read(conn: sqlite3.Connection, day: str) -> pd.DataFrame:
+    snapshot_date = conn.execute('SELECT MAX("Snapshot_Date") FROM snapshots WHERE "Snapshot_Date" <= ?',
+                                 (day,)).fetchone()[0]
+    df = pd.read_sql_query('SELECT * FROM snapshots WHERE "Snapshot_Date" = ?', conn, params=(snapshot_date,),
+                           parse_dates=["Date_Added"])
+    return df.drop(columns="Snapshot_Date")
+
+
+def _dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 365])
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"{'days':>5} {'sqlite_MB':>10} {'archive_MB':>11} {'sqlite_write_s':>15} {'archive_write_s':>16} "
+          f"{'sqlite_read_ms':>15} {'archive_read_ms':>16} {'sqlite_diff_ms':>15} {'archive_diff_ms':>16}")
+    for n_days in args.days:
+        tables = list(daily_tables(args.rows, n_days))
+        days = [day for day, _ in tables]
+        rng = random.Random(1)
+        read_days = [rng.choice(days) for _ in range(args.reads)]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "snapshots.db")
+            conn = sqlite3.connect(db_path)
+            start = time.perf_counter()
+            for day, df in tables:
+                df.assign(Snapshot_Date=day).to_sql("snapshots", conn, if_exists="append", index=False)
+            conn.execute('CREATE INDEX idx_snapshots_date ON snapshots ("Snapshot_Date")')
+            conn.commit()
+            sqlite_write = time.perf_counter() - start
+
+            archive = SnapshotArchive(os.path.join(tmp_dir, "archive"), "zstd")
+            start = time.perf_counter()
+            for day, df in tables:
+                archive.write(df, day)
+            archive.compact(days[-1])
+            archive_write = time.perf_counter() - start
+
+            start = time.perf_counter()
+            sqlite_frames = [sqlite_read(conn, day) for day in read_days]
+            sqlite_read_time = time.perf_counter() - start
+            start = time.perf_counter()
+            archive_frames = [archive.read(day) for day in read_days]
+            archive_read_time = time.perf_counter() - start
+            for sqlite_df, archive_df in zip(sqlite_frames, archive_frames):
+                pd.testing.assert_frame_equal(sqlite_df, archive_df, check_dtype=False)
+
+            pairs = [(rng.choice(days), rng.choice(days)) for _ in range(args.reads // 4 or 1)]
+            start = time.perf_counter()
+            for first, second in pairs:
+                old, new = sqlite_read(conn, first), sqlite_read(conn, second)
+                old.merge(new, on="Symbol", how="outer", indicator=True)
+            sqlite_diff_time = time.perf_counter() - start
+            start = time.perf_counter()
+            for first, second in pairs:
+                archive.diff(first, second)
+            archive_diff_time = time.perf_counter() - start
+            conn.close()
+            sqlite_size, archive_size = os.path.getsize(db_path), _dir_size(archive.directory)
+
+        print(f"{n_days:>5} {sqlite_size / 2**20:>10.1f} {archive_size / 2**20:>11.1f} {sqlite_write:>15.2f} "
+              f"{archive_write:>16.2f} {sqlite_read_time / len(read_days) * 1e3:>15.2f} "
+              f"{archive_read_time / len(read_days) * 1e3:>16.2f} {sqlite_diff_time / len(pairs) * 1e3:>15.2f} "
+              f"{archive_diff_time / len(pairs) * 1e3:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
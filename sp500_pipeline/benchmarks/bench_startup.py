@@ -0,0 +1,125 @@
+"""
+Benchmark: startup time of the CLI (python -m src <command>).
+
+Run from the project root:
+    python -m benchmarks.bench_startup --repeat 10
+Builds a small database with one synthetic page, then runs every command --repeat times in a
+fresh interpreter and reports the median wall time. Each command is also run once with
+-X importtime to report the total import time and which heavy modules (pandas, numpy,
+requests, bs4, pyarrow) it loads. The baseline is importing src.main_pipeline, which is what
+every command paid before the CLI imported the pipeline lazily.
+
+With --check the script exits with status 1 if a read-only command (status, query) imports
+a heavy module or takes longer than --max-ms, so it can guard startup regressions.
+"""
+import argparse
+import logging
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from src import backfill
+from src.data_extraction import parse_changes_table
+from src.data_transformation import transform_changes
+from src.database_operations import create_connection, save_constituent_changes
+from src.membership import rebuild_index_membership
+from benchmarks.synthetic_html import generate_page_html
+
+HEAVY_MODULES = ("pandas", "numpy", "requests", "bs4", "pyarrow")
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def build_database(directory: str, n_rows: int) -> str:
+    """Database with the companies, history, summary, changes and membership tables of one synthetic page."""
+    html = generate_page_html(n_rows, n_changes=50)
+    with open(os.path.join(directory, "sp500_2024-01-02.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+    db_path = os.path.join(directory, "bench.db")
+    summary = backfill.backfill_revisions(directory, targets=["history"], db_path=db_path,
+                                          manifest_path=os.path.join(directory, "manifest.jsonl"), max_workers=1)
+    if summary is None or summary["merged"] != 1:
+        raise SystemExit(f"Could not build the benchmark database: {summary}")
+    conn = create_connection(db_path)
+    written = save_constituent_changes(transform_changes(parse_changes_table(html)), conn,
+                                       on_changes=rebuild_index_membership)
+    conn.close()
+    if written is None:
+        raise SystemExit("Could not load the index changes into the benchmark database")
+    return db_path
+
+
+def commands(db_path: str) -> dict:
+    return {
+        "baseline: import src.main_pipeline": ["-c", "import src.main_pipeline"],
+        "--help": ["-m", "src", "--help"],
+        "run --help": ["-m", "src", "run", "--help"],
+        "status": ["-m", "src", "--db", db_path, "status"],
+        "query sectors": ["-m", "src", "--db", db_path, "query", "sectors"],
+        "query company": ["-m", "src", "--db", db_path, "query", "company", "S000001"],
+    }
+
+
+def time_command(args: list, repeat: int) -> float:
+    """Median wall time in ms of running the command in a fresh interpreter."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def import_profile(args: list) -> tuple:
+    """(total import time in ms, heavy top-level modules imported) from -X importtime."""
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], check=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    total_us = 0
+    heavy = set()
+    for match in _IMPORT_LINE.finditer(result.stderr):
+        cumulative_us, indent, module = int(match.group(2)), match.group(3), match.group(4)
+        if len(indent) == 1: # Top-level import: its cumulative time includes its children
+            total_us += cumulative_us
+        if module.split(".")[0] in HEAVY_MODULES:
+            heavy.add(module.split(".")[0])
+    return total_us / 1000, sorted(heavy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=505)
+    parser.add_argument("--check", action="store_true",
+                        help="Exit with status 1 if a read-only command imports a heavy module or exceeds --max-ms.")
+    parser.add_argument("--max-ms", type=float, default=150.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    failures = []
+    print(f"{'command':<36} {'median_ms':>10} {'import_ms':>10}  heavy modules")
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = build_database(directory, args.rows)
+        baseline_ms = None
+        for name, command in commands(db_path).items():
+            median_ms = time_command(command, args.repeat)
+            import_ms, heavy = import_profile(command)
+            baseline_ms = baseline_ms or median_ms
+            print(f"{name:<36} {median_ms:>10.1f} {import_ms:>10.1f}  {', '.join(heavy) or '-'}"
+                  f"{'' if median_ms == baseline_ms else f'  ({baseline_ms / median_ms:.1f}x faster)'}")
+            if name.startswith(("status", "query")):
+                if heavy:
+                    failures.append(f"'{name}' imports {', '.join(heavy)}")
+                if median_ms > args.max_ms:
+                    failures.append(f"'{name}' takes {median_ms:.0f} ms (limit {args.max_ms:.0f} ms)")
+
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    if args.check and failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: managed SQLite storage (tuned PRAGMAs, PRIMARY KEY + secondary indexes,
+executemany bulk insert) vs the previous default connection + DataFrame.to_sql path.
+
+Run from the project root:
+    python -m benchmarks.bench_storage --rows 500 50000 500000
+Reports the load time and the average time of the dashboard queries for each path.
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+
+import pandas as pd
+
+from src.data_transformation import transform_data
+from src.database_operations import bulk_load_companies, create_connection
+from benchmarks.bench_transform import build_raw_frame
+
+DASHBOARD_QUERIES = {
+    "top_sectors": "SELECT GICS_Sector, COUNT(*) AS n FROM companies GROUP BY GICS_Sector ORDER BY n DESC LIMIT 5",
+    "oldest": "SELECT Symbol, Security, Founded_Year FROM companies WHERE Founded_Year IS NOT NULL "
+              "ORDER BY Founded_Year LIMIT 10",
+    "top_states": "SELECT Headquarters_State, COUNT(*) AS n FROM companies GROUP BY Headquarters_State "
+                  "ORDER BY n DESC LIMIT 5",
+    "sector_filter": "SELECT COUNT(*) FROM companies WHERE GICS_Sector = 'Energy'",
+    "state_filter": "SELECT Symbol FROM companies WHERE Headquarters_State = 'Texas'",
+    "founded_range": "SELECT COUNT(*) FROM companies WHERE Founded_Year BETWEEN 1900 AND 1910",
+}
+
+
+def _time_queries(conn: sqlite3.Connection, repeats: int) -> dict:
+    timings = {}
+    for name, sql in DASHBOARD_QUERIES.items():
+        start = time.perf_counter()
+        for _ in range(repeats):
+            conn.execute(sql).fetchall()
+        timings[name] = (time.perf_counter() - start) / repeats
+    return timings
+
+
+def run_to_sql(df: pd.DataFrame, db_path: str, repeats: int):
+    conn = sqlite3.connect(db_path)
+    start = time.perf_counter()
+    df.to_sql("companies", conn, if_exists="replace", index=False)
+    load_time = time.perf_counter() - start
+    queries = _time_queries(conn, repeats)
+    conn.close()
+    return load_time, queries
+
+
+def run_managed(df: pd.DataFrame, db_path: str, repeats: int):
+    conn = create_connection(db_path)
+    start = time.perf_counter()
+    bulk_load_companies(df, conn, "companies")
+    load_time = time.perf_counter() - start
+    conn.execute("ANALYZE")
+    queries = _time_queries(conn, repeats)
+    conn.close()
+    return load_time, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[500, 50000, 500000])
+    parser.add_argument("--query-repeats", type=int, default=20)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    for n_rows in args.rows:
+        df = transform_data(build_raw_frame(n_rows))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            legacy_load, legacy_q = run_to_sql(df, os.path.join(tmp_dir, "to_sql.db"), args.query_repeats)
+            managed_load, managed_q = run_managed(df, os.path.join(tmp_dir, "managed.db"), args.query_repeats)
+        print(f"\n== {n_rows} rows ==")
+        print(f"{'step':>15} {'to_sql_ms':>11} {'managed_ms':>11} {'speedup':>8}")
+        print(f"{'load':>15} {legacy_load * 1e3:>11.2f} {managed_load * 1e3:>11.2f} {legacy_load / managed_load:>7.1f}x")
+        for name in DASHBOARD_QUERIES:
+            print(f"{name:>15} {legacy_q[name] * 1e3:>11.3f} {managed_q[name] * 1e3:>11.3f} "
+                  f"{legacy_q[name] / managed_q[name]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
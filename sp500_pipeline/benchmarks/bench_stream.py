@@ -0,0 +1,78 @@
+"""
+Benchmark: streaming row-batch pipeline (parse -> transform -> load per batch) vs the
+whole-table path (parse_sp500_table -> transform_data -> upsert_companies).
+
+Run from the project root:
+    python -m benchmarks.bench_stream --rows 5000 50000 200000 --batch-size 1000
+Each path loads the same synthetic page into an empty database. Reports the wall time and,
+from a second run under tracemalloc, the peak traced memory of parse + transform + load
+(the page text itself is held by both paths and not counted). Both databases must end up
+with identical rows; the script aborts otherwise.
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from src.data_extraction import iter_sp500_table_batches, parse_sp500_table
+from src.data_transformation import transform_data
+from src.database_operations import create_connection, upsert_companies, upsert_companies_batches
+from benchmarks.synthetic_html import generate_page_html
+
+
+def run_full(html: str, db_path: str) -> None:
+    conn = create_connection(db_path)
+    upsert_companies(transform_data(parse_sp500_table(html)), conn, "companies")
+    conn.close()
+
+
+def run_stream(html: str, db_path: str, batch_size: int) -> None:
+    conn = create_connection(db_path)
+    batches = (transform_data(batch) for batch in iter_sp500_table_batches(html, batch_size))
+    upsert_companies_batches(batches, conn, "companies")
+    conn.close()
+
+
+def _measure(func, html: str, db_dir: str, *extra):
+    """Times one run, then repeats it under tracemalloc (which slows it down) for the peak memory."""
+    start = time.perf_counter()
+    func(html, os.path.join(db_dir, "timed.db"), *extra)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(html, os.path.join(db_dir, "traced.db"), *extra)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def _table_rows(db_path: str) -> list:
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT * FROM companies ORDER BY Symbol").fetchall()
+    conn.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[5000, 50000, 200000])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"{'rows':>8} {'full_s':>8} {'stream_s':>9} {'full_peak_MB':>13} {'stream_peak_MB':>15} {'mem_ratio':>10}")
+    for n_rows in args.rows:
+        html = generate_page_html(n_rows)
+        with tempfile.TemporaryDirectory() as full_dir, tempfile.TemporaryDirectory() as stream_dir:
+            full_time, full_peak = _measure(run_full, html, full_dir)
+            stream_time, stream_peak = _measure(run_stream, html, stream_dir, args.batch_size)
+            if _table_rows(os.path.join(full_dir, "timed.db")) != _table_rows(os.path.join(stream_dir, "timed.db")):
+                raise SystemExit(f"Streaming and full loads differ for {n_rows} rows")
+        print(f"{n_rows:>8} {full_time:>8.2f} {stream_time:>9.2f} {full_peak / 2**20:>13.1f} "
+              f"{stream_peak / 2**20:>15.1f} {full_peak / stream_peak:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Benchmark suite: parse_sp500_table, transform_data and save_data_to_db timed separately on
+synthetic pages (benchmarks/synthetic_html.py: footnote brackets in dates, odd Founded
+formats, locations without a comma) of increasing size, with JSON baselines.
+
+Run from the project root:
+    python -m benchmarks.bench_suite --rows 500 10000 100000 1000000 --save main
+    python -m benchmarks.bench_suite --rows 500 10000 100000 1000000 --compare main --threshold 0.2
+Each stage runs --repeat times untraced and the best wall time is kept (as timeit does: the
+slower runs measure interference from the machine, not the code); one more traced run
+(profiling.PipelineProfiler) gives the peak memory (tracemalloc). save_data_to_db loads
+into a fresh database every time (config.DB_LOAD_MODE, i.e. a first load).
+
+--save NAME writes the results to benchmarks/baselines/NAME.json (or to NAME if it is a path).
+--compare NAME compares the results with that baseline and exits with status 1 if a stage
+got slower or used more memory by more than --threshold (relative), ignoring differences
+below --min-time-ms / --min-memory-mb, which are noise at small sizes.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from src import config
+from src.data_extraction import parse_sp500_table
+from src.data_transformation import transform_data
+from src.database_operations import create_connection, save_data_to_db
+from src.profiling import PipelineProfiler
+from benchmarks.synthetic_html import generate_page_html
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+STAGES = ("parse", "transform", "save")
+
+
+def baseline_path(name: str) -> str:
+    """benchmarks/baselines/<name>.json, unless name is already a path to a JSON file."""
+    if name.endswith(".json") or os.sep in name:
+        return name
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def _save(df, directory: str) -> int:
+    """save_data_to_db into a new database (removed afterwards, so every run is a first load)."""
+    db_path = os.path.join(directory, f"suite_{time.perf_counter_ns()}.db")
+    conn = create_connection(db_path)
+    try:
+        rows_written = save_data_to_db(df, conn, config.DB_TABLE_NAME)
+    finally:
+        conn.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    if rows_written is None:
+        raise SystemExit("save_data_to_db failed")
+    return rows_written
+
+
+def measure(name: str, func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Best wall time of repeat untraced runs and peak memory of one traced run."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    profiler = PipelineProfiler(enabled=True)
+    with profiler.stage(name):
+        func()
+    return {"wall_time_s": round(min(times), 6),
+            "peak_memory_bytes": profiler.stages[0]["peak_memory_bytes"]}
+
+
+def run_suite(sizes: List[int], repeat: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parser_backend": config.HTML_PARSER_BACKEND,
+        "load_mode": config.DB_LOAD_MODE,
+        "repeat": repeat,
+        "sizes": {},
+    }
+    print(f"{'rows':>8} {'stage':>10} {'best_s':>10} {'peak_mb':>9} {'rows_per_s':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for n_rows in sizes:
+            html = generate_page_html(n_rows)
+            raw_df = parse_sp500_table(html)
+            transformed_df = transform_data(raw_df)
+            if raw_df is None or transformed_df is None or len(transformed_df) != n_rows:
+                raise SystemExit(f"The pipeline did not return {n_rows} rows for the synthetic page")
+            _save(transformed_df, directory) # Warm-up, as parse and transform just ran once
+            stages = {
+                "parse": measure("parse", lambda: parse_sp500_table(html), repeat),
+                "transform": measure("transform", lambda: transform_data(raw_df), repeat),
+                "save": measure("save", lambda: _save(transformed_df, directory), repeat),
+            }
+            results["sizes"][str(n_rows)] = {"html_bytes": len(html), "stages": stages}
+            for stage, metrics in stages.items():
+                print(f"{n_rows:>8} {stage:>10} {metrics['wall_time_s']:>10.4f} "
+                      f"{metrics['peak_memory_bytes'] / 2**20:>9.1f} {n_rows / metrics['wall_time_s']:>11.0f}")
+            del html, raw_df, transformed_df
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+            min_time_s: float, min_memory_bytes: int) -> List[str]:
+    """Prints current vs baseline per size, stage and metric. Returns the regressions."""
+    regressions = []
+    print(f"\n{'rows':>8} {'stage':>10} {'metric':>7} {'baseline':>10} {'current':>10} {'change':>8}")
+    for size, current in results["sizes"].items():
+        reference = baseline["sizes"].get(size)
+        if reference is None:
+            print(f"{size:>8} (not in the baseline)")
+            continue
+        for stage in STAGES:
+            for metric, unit, scale, floor in (("wall_time_s", "time", 1.0, min_time_s),
+                                               ("peak_memory_bytes", "memory", 2**-20, min_memory_bytes)):
+                old = reference["stages"][stage][metric]
+                new = current["stages"][stage][metric]
+                change = (new - old) / old if old else 0.0
+                regressed = change > threshold and new - old > floor
+                print(f"{size:>8} {stage:>10} {unit:>7} {old * scale:>10.4f} {new * scale:>10.4f} "
+                      f"{change:>+7.0%}{'  REGRESSION' if regressed else ''}")
+                if regressed:
+                    regressions.append(f"{stage} {unit} at {size} rows: {old * scale:.4f} -> {new * scale:.4f} "
+                                       f"({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[500, 10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", metavar="NAME", help="Write the results as a JSON baseline.")
+    parser.add_argument("--compare", metavar="NAME", help="Compare the results with a JSON baseline.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative increase (default 0.2 = 20%%).")
+    parser.add_argument("--min-time-ms", type=float, default=5.0)
+    parser.add_argument("--min-memory-mb", type=float, default=1.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(baseline_path(args.compare), encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise SystemExit(f"Could not read baseline '{args.compare}': {e}")
+
+    results = run_suite(args.rows, args.repeat)
+
+    if args.save:
+        path = baseline_path(args.save)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline written to {path}")
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold, args.min_time_ms / 1000,
+                              int(args.min_memory_mb * 2**20))
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"\nNo regression beyond {args.threshold:.0%} against {baseline_path(args.compare)}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: vectorized transform_data vs the previous per-row implementation
+(clean_founded_year / split_headquarters applied row by row).
+
+Run from the project root:
+    python -m benchmarks.bench_transform --rows 500 50000 1000000
+The legacy path is skipped above --legacy-max-rows because its per-row
+pd.Series construction takes minutes at 1M rows. Whenever both paths run,
+their outputs must be identical (except the headquarters columns, which are now
+resolved against the gazetteer: see bench_locations); the script aborts otherwise.
+"""
+import argparse
+import logging
+import time
+
+import pandas as pd
+
+from src import config
+from src.data_transformation import clean_founded_year, split_headquarters, transform_data
+from benchmarks.synthetic_html import generate_rows
+
+RAW_COLUMNS = list(config.TABLE_COLUMN_MAPPING_KEYS.keys())
+HEADQUARTERS_COLUMNS = ["Headquarters_City", "Headquarters_State", "Headquarters_Country"]
+
+
+def legacy_transform_data(df: pd.DataFrame) -> pd.DataFrame:
+    """Row-by-row reference implementation, kept verbatim for comparison."""
+    transformed_df = df.copy()
+    if 'Date_Added' in transformed_df.columns:
+        transformed_df['Date_Added'] = transformed_df['Date_Added'].str.replace(r'\[.*?\]', '', regex=True)
+        transformed_df['Date_Added'] = pd.to_datetime(transformed_df['Date_Added'], errors='coerce')
+    if 'Founded' in transformed_df.columns:
+        transformed_df['Founded_Year'] = transformed_df['Founded'].apply(clean_founded_year)
+    if 'Headquarters_Location' in transformed_df.columns:
+        hq_split_series = transformed_df['Headquarters_Location'].apply(
+            lambda x: pd.Series(split_headquarters(x), index=['Headquarters_City_temp', 'Headquarters_State_temp'])
+        )
+        transformed_df['Headquarters_City'] = hq_split_series['Headquarters_City_temp']
+        transformed_df['Headquarters_State'] = hq_split_series['Headquarters_State_temp']
+    if 'CIK' in transformed_df.columns:
+        cleaned_cik = transformed_df['CIK'].astype(str).str.replace(r'\D', '', regex=True)
+        transformed_df['CIK'] = pd.to_numeric(cleaned_cik, errors='coerce').astype('Int64')
+    final_df = pd.DataFrame()
+    for col_name in config.FINAL_COLUMNS:
+        if col_name in transformed_df.columns:
+            final_df[col_name] = transformed_df[col_name]
+        elif "Year" in col_name or "CIK" in col_name:
+            final_df[col_name] = pd.Series(pd.NA, index=transformed_df.index, dtype='Int64')
+        elif "Date" in col_name:
+            final_df[col_name] = pd.Series(pd.NaT, index=transformed_df.index, dtype='datetime64[ns]')
+        else:
+            final_df[col_name] = pd.Series(None, index=transformed_df.index, dtype=object)
+    return final_df
+
+
+def build_raw_frame(n_rows: int) -> pd.DataFrame:
+    """Raw frame shaped like parse_sp500_table output, with footnote brackets in some dates."""
+    rows = generate_rows(n_rows)
+    df = pd.DataFrame.from_records(rows, columns=RAW_COLUMNS)
+    df.loc[df.index % 7 == 0, "Date_Added"] = df["Date_Added"] + "[3]"
+    return df
+
+
+def _time(func, df, repeats):
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(df)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[500, 50000, 1000000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--legacy-max-rows", type=int, default=50000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"{'rows':>8} {'legacy_s':>10} {'vector_s':>10} {'speedup':>8}")
+    for n_rows in args.rows:
+        raw_df = build_raw_frame(n_rows)
+        new_df, new_time = _time(transform_data, raw_df, args.repeats)
+        if n_rows <= args.legacy_max_rows:
+            legacy_df, legacy_time = _time(legacy_transform_data, raw_df, 1)
+            pd.testing.assert_frame_equal(legacy_df.drop(columns=HEADQUARTERS_COLUMNS),
+                                          new_df.drop(columns=HEADQUARTERS_COLUMNS))
+            print(f"{n_rows:>8} {legacy_time:>10.3f} {new_time:>10.3f} {legacy_time / new_time:>7.1f}x")
+        else:
+            print(f"{n_rows:>8} {'skipped':>10} {new_time:>10.3f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Generator of synthetic Wikipedia-style pages with the same shape as the
+"List of S&P 500 companies" article: a long preamble, the `constituents`
+table and the historical "Selected changes" table after it.
+Used by the benchmark scripts so they do not depend on the live page.
+"""
+import random
+from datetime import date, timedelta
+from html import escape
+from typing import List, Optional, Sequence, Tuple
+
+SECTORS = [
+    "Industrials", "Health Care", "Information Technology", "Communication Services",
+    "Consumer Staples", "Consumer Discretionary", "Utilities", "Financials",
+    "Materials", "Real Estate", "Energy",
+]
+LOCATIONS = [
+    "Saint Paul, Minnesota", "Milwaukee, Wisconsin", "North Chicago, Illinois",
+    "Dublin, Ireland", "Santa Clara, California", "New York City, New York",
+    "Houston, Texas", "Atlanta, Georgia", "Zug, Switzerland", "Bermuda",
+    "Cupertino, California", "Boston, Massachusetts", "London, United Kingdom",
+]
+FOUNDED_FORMATS = ["{y}", "{y} ({y2})", "{y}/{y2}", "c. {y}", "unknown"]
+
+
+def generate_rows(n_rows: int, seed: int = 42) -> List[Tuple[str, ...]]:
+    """Returns n_rows raw rows: (Symbol, Security, Sector, Sub-Industry, Location, Date added, CIK, Founded)."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n_rows):
+        year = rng.randint(1800, 2020)
+        founded = rng.choice(FOUNDED_FORMATS).format(y=year, y2=year + rng.randint(1, 80))
+        date_added = f"{rng.randint(1957, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        sector = rng.choice(SECTORS)
+        rows.append((
+            f"S{i:06d}",
+            f"Company {i} & Co.",
+            sector,
+            f"{sector} Sub-Industry {rng.randint(1, 9)}",
+            rng.choice(LOCATIONS),
+            date_added,
+            f"{rng.randint(1, 2_000_000):010d}",
+            founded,
+        ))
+    return rows
+
+
+def _security_name(symbol: Optional[str]) -> Optional[str]:
+    """Security name used for a synthetic symbol (matches generate_rows for current members)."""
+    if symbol is None:
+        return None
+    return f"Company {int(symbol[1:])} & Co." if symbol.startswith("S") else f"Old Company {symbol}"
+
+
+def generate_changes(current_symbols: Sequence[str], n_changes: int, seed: int = 42,
+                     last_date: date = date(2025, 6, 30)) -> List[Tuple[date, Optional[str], Optional[str], Optional[str], Optional[str], str]]:
+    """
+    Returns n_changes index changes, newest first: (date, added symbol, added security,
+    removed symbol, removed security, reason). The history is consistent with
+    current_symbols: walking back from today, an added symbol leaves the member set and a
+    removed one (O-prefixed, never current) joins it. About 5% of the changes only add or
+    only remove a symbol. Several changes can share a date.
+    """
+    rng = random.Random(seed)
+    members = list(current_symbols)
+    changes = []
+    day = last_date
+    while len(changes) < n_changes:
+        day -= timedelta(days=rng.randint(1, 10))
+        reason = rng.choice(["Market capitalization change.", "Acquired.", "Spin-off.", "Index rebalancing."])
+        removed_today = [] # Joins the member set after the date, so no symbol enters and leaves on one day
+        for _ in range(rng.choice([1, 1, 1, 2, 3])):
+            if len(changes) >= n_changes:
+                break
+            kind = rng.random()
+            added = members.pop(rng.randrange(len(members))) if members and kind >= 0.05 else None
+            removed = f"O{len(changes):05d}" if added is None or kind < 0.95 else None
+            if removed is not None:
+                removed_today.append(removed)
+            changes.append((day, added, _security_name(added), removed, _security_name(removed), reason))
+        members.extend(removed_today)
+    return changes
+
+
+def _changes_rows_html(changes) -> List[str]:
+    """Renders the change rows the way Wikipedia does: a shared date/reason uses rowspan."""
+    parts = []
+    i = 0
+    while i < len(changes):
+        day, reason = changes[i][0], changes[i][5]
+        span = 1
+        while i + span < len(changes) and changes[i + span][0] == day and changes[i + span][5] == reason:
+            span += 1
+        for j in range(span):
+            _, added, added_security, removed, removed_security, _ = changes[i + j]
+            rowspan = f' rowspan="{span}"' if span > 1 else ""
+            date_cell = f"<td{rowspan}>{day:%B} {day.day}, {day.year}</td>" if j == 0 else ""
+            reason_cell = (f"<td{rowspan}>{reason}<sup class=\"reference\"><a>[{i}]</a></sup></td>"
+                           if j == 0 else "")
+            parts.append(
+                f"<tr>{date_cell}<td>{added or ''}</td><td>{escape(added_security or '')}</td>"
+                f"<td>{removed or ''}</td><td>{escape(removed_security or '')}</td>{reason_cell}</tr>\n"
+            )
+        i += span
+    return parts
+
+
+def _constituents_row_html(row: Tuple[str, ...], index: int) -> str:
+    symbol, security, sector, sub_industry, location, date_added, cik, founded = row
+    footnote = f'<sup id="cite_ref-{index}" class="reference"><a href="#cite_note-{index}">[{index % 50}]</a></sup>' if index % 7 == 0 else ""
+    return (
+        "<tr>\n"
+        f'<td><a rel="nofollow" class="external text" href="https://www.nyse.com/quote/XNYS:{symbol}">{symbol}</a></td>\n'
+        f'<td><a href="/wiki/{escape(security)}" title="{escape(security)}">{escape(security)}</a></td>\n'
+        f"<td>{sector}</td>\n"
+        f"<td>{escape(sub_industry)}</td>\n"
+        f'<td><a href="/wiki/{escape(location)}">{escape(location)}</a></td>\n'
+        f"<td>{date_added}{footnote}</td>\n"
+        f"<td>{cik}</td>\n"
+        f"<td>{escape(founded)}</td>\n"
+        "</tr>\n"
+    )
+
+
+def generate_page_html(n_rows: int, seed: int = 42, with_table_id: bool = True, n_changes: int = 400) -> str:
+    """
+    Builds a full page with n_rows constituents followed by a changes table of n_changes rows
+    (see generate_changes).
+    """
+    rows = generate_rows(n_rows, seed)
+    table_id = ' id="constituents"' if with_table_id else ""
+    parts = [
+        "<!DOCTYPE html><html><head><title>List of S&amp;P 500 companies</title>",
+        "<style>.wikitable{border:1px solid}</style><script>var wgTitle='S&P';</script></head><body>",
+        "<p>The S&amp;P 500 is a stock market index ...</p>\n" * 50,
+        f'<table class="wikitable sortable"{table_id}>\n<tbody><tr>\n',
+        "<th>Symbol</th>\n<th>Security</th>\n<th><a href=\"/wiki/GICS\">GICS</a> Sector</th>\n"
+        "<th>GICS Sub-Industry</th>\n<th>Headquarters Location</th>\n<th>Date added</th>\n"
+        "<th><a href=\"/wiki/Central_Index_Key\">CIK</a></th>\n<th>Founded</th>\n</tr>\n",
+    ]
+    parts.extend(_constituents_row_html(row, i) for i, row in enumerate(rows))
+    parts.append("</tbody></table>\n<h2>Selected changes to the list of S&amp;P 500 components</h2>\n")
+    parts.append(
+        '<table class="wikitable sortable" id="changes">\n<tbody><tr>\n'
+        '<th rowspan="2">Effective Date</th><th colspan="2">Added</th>'
+        '<th colspan="2">Removed</th><th rowspan="2">Reason</th></tr>\n'
+        "<tr><th>Ticker</th><th>Security</th><th>Ticker</th><th>Security</th></tr>\n"
+    )
+    parts.extend(_changes_rows_html(generate_changes([row[0] for row in rows], n_changes, seed + 1)))
+    parts.append("</tbody></table>\n")
+    parts.append("<div class=\"navbox\"><p>References and navigation ...</p></div>\n" * 200)
+    parts.append("</body></html>")
+    return "".join(parts)
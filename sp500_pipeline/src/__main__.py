@@ -0,0 +1,12 @@
+import os
+import sys
+
+from .cli import main
+
+# python -m src <command> (see cli.py)
+try:
+    sys.exit(main())
+except BrokenPipeError:
+    # Output piped into a command that stopped reading (e.g. | head)
+    os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    sys.exit(1)
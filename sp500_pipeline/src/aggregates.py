@@ -0,0 +1,121 @@
+import sqlite3
+import logging
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from . import config
+from .database_operations import RowChange
+from .sqlite_utils import quote_identifier, table_exists
+
+logger = logging.getLogger(__name__)
+# BasicConfig for logger is usually set in the main entry point (cli.py)
+
+# Count tables: (table name, grouped column). Rows with a NULL group value are not counted.
+COUNT_AGGREGATES: List[Tuple[str, str]] = [
+    (config.AGG_SECTOR_COUNTS_TABLE, "GICS_Sector"),
+    (config.AGG_STATE_COUNTS_TABLE, "Headquarters_State"),
+]
+
+
+def _ensure_aggregate_tables(conn: sqlite3.Connection) -> bool:
+    """Creates the summary tables if needed. Returns True if any of them was just created."""
+    created = False
+    for agg_table, column in COUNT_AGGREGATES:
+        if not table_exists(conn, agg_table):
+            conn.execute(f"CREATE TABLE {quote_identifier(agg_table)} "
+                         f"({quote_identifier(column)} TEXT PRIMARY KEY, \"Company_Count\" INTEGER NOT NULL)")
+            created = True
+    if not table_exists(conn, config.AGG_OLDEST_COMPANIES_TABLE):
+        conn.execute(f'CREATE TABLE {quote_identifier(config.AGG_OLDEST_COMPANIES_TABLE)} ("Rank" INTEGER PRIMARY KEY, '
+                     f'"Symbol" TEXT NOT NULL, "Security" TEXT, "Founded_Year" INTEGER NOT NULL)')
+        created = True
+    return created
+
+
+def _rebuild_counts(conn: sqlite3.Connection, source_table: str) -> None:
+    for agg_table, column in COUNT_AGGREGATES:
+        conn.execute(f"DELETE FROM {quote_identifier(agg_table)}")
+        conn.execute(
+            f"INSERT INTO {quote_identifier(agg_table)} ({quote_identifier(column)}, \"Company_Count\") "
+            f"SELECT {quote_identifier(column)}, COUNT(*) FROM {quote_identifier(source_table)} "
+            f"WHERE \"Is_Active\" = 1 AND {quote_identifier(column)} IS NOT NULL GROUP BY {quote_identifier(column)}"
+        )
+
+
+def _rebuild_oldest(conn: sqlite3.Connection, source_table: str) -> None:
+    """Recomputes the top-N oldest companies. Reads only N rows through the Founded_Year index."""
+    conn.execute(f"DELETE FROM {quote_identifier(config.AGG_OLDEST_COMPANIES_TABLE)}")
+    conn.execute(
+        f'INSERT INTO {quote_identifier(config.AGG_OLDEST_COMPANIES_TABLE)} ("Rank", "Symbol", "Security", "Founded_Year") '
+        f'SELECT ROW_NUMBER() OVER (ORDER BY "Founded_Year", "Symbol"), "Symbol", "Security", "Founded_Year" '
+        f'FROM (SELECT "Symbol", "Security", "Founded_Year" FROM {quote_identifier(source_table)} '
+        f'WHERE "Is_Active" = 1 AND "Founded_Year" IS NOT NULL ORDER BY "Founded_Year", "Symbol" LIMIT ?)',
+        (config.AGG_OLDEST_LIMIT,),
+    )
+
+
+def _apply_count_deltas(conn: sqlite3.Connection, row_changes: List[RowChange]) -> None:
+    """Adds +1/-1 per changed row to the count tables and removes groups that drop to zero."""
+    for agg_table, column in COUNT_AGGREGATES:
+        deltas: Counter = Counter()
+        for old_row, new_row in row_changes:
+            if old_row is not None and old_row.get(column) is not None:
+                deltas[old_row[column]] -= 1
+            if new_row is not None and new_row.get(column) is not None:
+                deltas[new_row[column]] += 1
+        deltas = {key: delta for key, delta in deltas.items() if delta != 0}
+        if not deltas:
+            continue
+        conn.executemany(
+            f"INSERT INTO {quote_identifier(agg_table)} ({quote_identifier(column)}, \"Company_Count\") VALUES (?, ?) "
+            f"ON CONFLICT({quote_identifier(column)}) DO UPDATE SET \"Company_Count\" = \"Company_Count\" + excluded.\"Company_Count\"",
+            list(deltas.items()),
+        )
+        conn.execute(f'DELETE FROM {quote_identifier(agg_table)} WHERE "Company_Count" <= 0')
+        logger.debug(f"Applied {len(deltas)} count deltas to '{agg_table}'.")
+
+
+def _oldest_affected(conn: sqlite3.Connection, row_changes: List[RowChange]) -> bool:
+    """
+    Tells whether the changes can alter the top-N oldest list: a listed company changed or
+    left, or a company with a founding year within the current cut-off appeared.
+    """
+    listed = conn.execute(f'SELECT "Symbol", "Founded_Year" FROM {quote_identifier(config.AGG_OLDEST_COMPANIES_TABLE)}').fetchall()
+    listed_symbols = {symbol for symbol, _ in listed}
+    cutoff = max((year for _, year in listed), default=None)
+    is_full = len(listed) >= config.AGG_OLDEST_LIMIT
+    for old_row, new_row in row_changes:
+        if old_row is not None and old_row.get("Symbol") in listed_symbols:
+            return True
+        if new_row is not None and new_row.get("Founded_Year") is not None:
+            if not is_full or new_row["Founded_Year"] <= cutoff:
+                return True
+    return False
+
+
+def refresh_aggregates(conn: sqlite3.Connection, source_table: str,
+                       row_changes: Optional[List[RowChange]] = None) -> None:
+    """
+    Maintains the dashboard summary tables (sector counts, state counts, oldest companies)
+    from the active rows of source_table. Meant to run inside the load transaction, as the
+    on_changes hook of database_operations.save_data_to_db.
+
+    Args:
+        conn: Open SQLite connection (inside the caller's transaction).
+        source_table: Companies table the summaries are derived from.
+        row_changes: Changed rows of the load. Counts are updated by deltas and the oldest list
+                     is recomputed only if the changes can affect it. None (full rewrite) or a
+                     missing summary table triggers a complete rebuild.
+    """
+    created = _ensure_aggregate_tables(conn)
+    if row_changes is None or created:
+        _rebuild_counts(conn, source_table)
+        _rebuild_oldest(conn, source_table)
+        logger.info("Summary tables rebuilt from the full companies table.")
+        return
+
+    _apply_count_deltas(conn, row_changes)
+    if _oldest_affected(conn, row_changes):
+        _rebuild_oldest(conn, source_table)
+        logger.debug(f"'{config.AGG_OLDEST_COMPANIES_TABLE}' recomputed (top {config.AGG_OLDEST_LIMIT}).")
+    logger.info(f"Summary tables updated incrementally from {len(row_changes)} changed rows.")
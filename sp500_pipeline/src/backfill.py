@@ -0,0 +1,295 @@
+import glob
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import pandas as pd
+
+from . import config
+from .aggregates import refresh_aggregates
+from .data_extraction import parse_sp500_table
+from .data_transformation import transform_data
+from .database_operations import (RowChange, clear_load_marker, create_connection, upsert_companies,
+                                  with_generation_bump)
+from .locations import LocationLookup
+from .snapshots import SnapshotArchive
+
+logger = logging.getLogger(__name__)
+# BasicConfig for logger is usually set in the main entry point (cli.py)
+
+# Revision date in a file name: 2019-03-15, 20190315, 2019-03-15T12:00:00, 20190315_120000 ...
+_REVISION_DATE_PATTERN = re.compile(r"((?:19|20)\d{2})-?(\d{2})-?(\d{2})(?:[T_ -]?(\d{2})[:-]?(\d{2})(?:[:-]?(\d{2}))?)?")
+
+
+class Revision(NamedTuple):
+    """A saved page revision. Files are identified by name, size and mtime in the manifest."""
+    path: str
+    timestamp: datetime
+    size: int
+    mtime_ns: int
+
+    @property
+    def date(self) -> str:
+        return self.timestamp.date().isoformat()
+
+    @property
+    def manifest_id(self) -> str:
+        return f"{os.path.basename(self.path)}:{self.size}:{self.mtime_ns}"
+
+
+def revision_timestamp(path: str, mtime: Optional[float] = None) -> datetime:
+    """
+    Timestamp of a saved revision, taken from its file name (e.g. 'sp500_2019-03-15.html',
+    '20190315_120000.html'); files without a date in their name fall back to their mtime.
+    """
+    match = _REVISION_DATE_PATTERN.search(os.path.basename(path))
+    if match:
+        try:
+            return datetime(*(int(part) for part in match.groups() if part is not None))
+        except ValueError:
+            pass # Digits that only look like a date (e.g. a revision ID)
+    return datetime.fromtimestamp(os.path.getmtime(path) if mtime is None else mtime)
+
+
+def list_revisions(directory: str, patterns: Sequence[str] = config.BACKFILL_FILE_PATTERNS) -> List[Revision]:
+    """HTML revisions in directory, in revision order (timestamp, then file name)."""
+    paths = sorted({path for pattern in patterns for path in glob.glob(os.path.join(directory, pattern))})
+    revisions = []
+    for path in paths:
+        stat = os.stat(path)
+        revisions.append(Revision(path, revision_timestamp(path, stat.st_mtime), stat.st_size, stat.st_mtime_ns))
+    revisions.sort(key=lambda revision: (revision.timestamp, os.path.basename(revision.path)))
+    return revisions
+
+
+def _init_worker(log_level: int) -> None:
+    """Process pool initializer: keeps the per-page parser/transform logs out of the backfill output."""
+    logging.getLogger().setLevel(log_level)
+
+
+def process_revision(path: str, location_lookup: Optional[LocationLookup] = None
+                     ) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    Parses and transforms one saved page (runs in a worker process, on its own copy of
+    location_lookup).
+
+    Returns:
+        (transformed DataFrame, None) on success, (None, error message) otherwise.
+    """
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            html_content = f.read()
+        raw_df = parse_sp500_table(html_content)
+        if raw_df is None or raw_df.empty:
+            return None, "constituents table not found or empty"
+        transformed_df = transform_data(raw_df, location_lookup)
+        if transformed_df is None or transformed_df.empty:
+            return None, "transformation returned no data"
+        return transformed_df, None
+    except Exception as e: # A broken revision must not abort the backfill
+        return None, f"{type(e).__name__}: {e}"
+
+
+def _on_history_changes(conn: sqlite3.Connection, table_name: str, row_changes: Optional[List[RowChange]]) -> None:
+    """
+    Load hook of the 'history' target: refreshes the summary tables and clears the pipeline
+    load marker of the table, in the same transaction. The table now holds a revision, not
+    the output of the last pipeline load, so the next run must load again.
+    """
+    refresh_aggregates(conn, table_name, row_changes)
+    clear_load_marker(conn, table_name)
+
+
+def _read_manifest(manifest_path: str) -> Dict[str, Set[str]]:
+    """Targets already merged per revision (manifest_id -> targets)."""
+    merged: Dict[str, Set[str]] = {}
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # Partial line written during a crash
+                merged.setdefault(entry["revision"], set()).update(entry["targets"])
+    except FileNotFoundError:
+        pass
+    return merged
+
+
+def _append_manifest(manifest_path: str, revision: Revision, targets: Iterable[str]) -> None:
+    entry = {"revision": revision.manifest_id, "path": revision.path, "date": revision.timestamp.isoformat(),
+             "targets": sorted(targets), "merged_at": datetime.now().isoformat(timespec="seconds")}
+    with open(manifest_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _ordered_results(revisions: Sequence[Revision], workers: int, location_lookup: LocationLookup):
+    """
+    Yields (revision, (DataFrame, error)) in revision order while the pool parses ahead.
+    At most workers * config.BACKFILL_QUEUE_FACTOR revisions are in flight, so results
+    waiting behind a slow revision do not pile up in memory. Raises BrokenProcessPool if a
+    worker process dies.
+    """
+    if workers == 1:
+        for revision in revisions:
+            yield revision, process_revision(revision.path, location_lookup)
+        return
+
+    window = workers * config.BACKFILL_QUEUE_FACTOR
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(config.BACKFILL_WORKER_LOG_LEVEL,)) as executor:
+        pending: Deque[Tuple[Revision, Future]] = deque()
+        upcoming = iter(revisions)
+        for revision in upcoming:
+            pending.append((revision, executor.submit(process_revision, revision.path, location_lookup)))
+            if len(pending) >= window:
+                break
+        while pending:
+            revision, future = pending.popleft()
+            next_revision = next(upcoming, None)
+            if next_revision is not None:
+                pending.append((next_revision, executor.submit(process_revision, next_revision.path, location_lookup)))
+            yield revision, future.result()
+
+
+def backfill_revisions(directory: str, targets: Sequence[str] = ("snapshots",), db_path: Optional[str] = None,
+                       manifest_path: Optional[str] = None, max_workers: Optional[int] = None) -> Optional[Dict[str, int]]:
+    """
+    Parses and transforms every saved HTML revision in directory across a process pool and
+    merges the results in revision order into the target stores:
+      'snapshots': the snapshot of the revision date in the SnapshotArchive (a later revision
+                   of the same day replaces it). Complete months are compacted at the end.
+      'history':   an incremental load of config.DB_TABLE_NAME with the revision date as
+                   load date, so companies_history gets the historical Valid_From/Valid_To.
+                   Revisions older than the newest version already in the history are not
+                   loaded (counted as out of order). A table that already holds data but no
+                   history is refused: its rows would be dated as of the first revision.
+    Every merged revision is appended to the manifest (JSON Lines) once its targets are
+    written, so an interrupted backfill resumes after the last merged revision.
+
+    Args:
+        directory: Folder with the saved pages (config.BACKFILL_FILE_PATTERNS).
+        targets: Stores to merge into (see config.BACKFILL_TARGETS).
+        db_path: Database of the 'history' target. Defaults to config.DB_PATH.
+        manifest_path: Defaults to config.BACKFILL_MANIFEST_PATH.
+        max_workers: Worker processes. Defaults to config.BACKFILL_MAX_WORKERS or the CPU count.
+
+    Returns:
+        Dict with the number of revisions found, merged, already merged (resumed), failed,
+        skipped as out of order and left unprocessed because the backfill stopped (remaining:
+        a snapshot or history write failed, or a worker process crashed); or None if the
+        backfill could not start.
+    """
+    unknown = set(targets) - set(config.BACKFILL_TARGETS)
+    if not targets or unknown:
+        logger.error(f"Invalid backfill targets {sorted(unknown) or list(targets)}. Expected any of {config.BACKFILL_TARGETS}.")
+        return None
+    if not os.path.isdir(directory):
+        logger.error(f"Backfill directory '{directory}' not found.")
+        return None
+
+    archive = None
+    if "snapshots" in targets:
+        archive = SnapshotArchive.from_config()
+        if archive is None:
+            logger.error("The snapshot archive is disabled (config.SNAPSHOT_DIR) or pyarrow is missing. Backfill aborted.")
+            return None
+    conn = None
+    last_loaded = None
+    if "history" in targets:
+        conn = create_connection(db_path or config.DB_PATH)
+        if not conn:
+            logger.error("Failed to establish database connection. Backfill aborted.")
+            return None
+        try:
+            last_loaded = conn.execute(f'SELECT MAX("Valid_From") FROM "{config.DB_HISTORY_TABLE_NAME}"').fetchone()[0]
+        except sqlite3.OperationalError: # History table not created yet
+            last_loaded = None
+            try:
+                current_rows = conn.execute(f'SELECT COUNT(*) FROM "{config.DB_TABLE_NAME}"').fetchone()[0]
+            except sqlite3.OperationalError: # Companies table not created yet either
+                current_rows = 0
+            if current_rows:
+                # The history would be seeded with these rows as valid from the first revision date
+                logger.error(f"'{config.DB_TABLE_NAME}' already holds {current_rows} rows but has no history. "
+                             f"Backfill the history into a new database (or before the first load) and load "
+                             f"the current page afterwards. Backfill aborted.")
+                conn.close()
+                return None
+
+    manifest_path = manifest_path or config.BACKFILL_MANIFEST_PATH
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    merged_before = _read_manifest(manifest_path)
+    revisions = list_revisions(directory)
+    todo = [revision for revision in revisions if not set(targets) <= merged_before.get(revision.manifest_id, set())]
+    summary = {"revisions": len(revisions), "merged": 0, "resumed": len(revisions) - len(todo),
+               "failed": 0, "out_of_order": 0, "remaining": 0}
+    workers = max(1, min(len(todo), max_workers or config.BACKFILL_MAX_WORKERS or os.cpu_count() or 1))
+
+    logger.info(f"--- Backfilling {len(todo)} revisions from '{directory}' into {', '.join(targets)} "
+                f"with {workers} worker processes ({summary['resumed']} already merged) ---")
+    # Read once and sent to the workers with every revision (a few hundred entries). Locations
+    # the workers resolve stay in their copies: only the sequential path (one worker) adds
+    # new entries to the persistent table.
+    location_lookup = LocationLookup.open(config.LOCATION_LOOKUP_PATH)
+    start = last_report = time.perf_counter()
+    done = 0
+    try:
+        for done, (revision, (transformed_df, error)) in enumerate(_ordered_results(todo, workers, location_lookup), start=1):
+            previous = merged_before.get(revision.manifest_id, set())
+            pending = set(targets) - previous
+            if transformed_df is None:
+                logger.warning(f"Skipping revision {revision.path}: {error}")
+                summary["failed"] += 1
+                pending = set()
+            if "history" in pending and last_loaded is not None and revision.date < last_loaded[:10]:
+                logger.warning(f"Not loading revision {revision.path} into the history: older than the "
+                               f"history already loaded ({last_loaded}).")
+                summary["out_of_order"] += 1
+                pending.discard("history")
+            if "snapshots" in pending and archive.write(transformed_df, revision.date) is None:
+                logger.error(f"Backfill stopped: the snapshot of {revision.path} could not be written.")
+                summary["failed"] += 1
+                summary["remaining"] = len(todo) - done
+                break
+            if "history" in pending:
+                if upsert_companies(transformed_df, conn, config.DB_TABLE_NAME, load_date=revision.date,
+                                    on_changes=with_generation_bump(_on_history_changes)) is None:
+                    logger.error(f"Backfill stopped: loading {revision.path} into the history failed.")
+                    summary["failed"] += 1
+                    summary["remaining"] = len(todo) - done
+                    break
+                last_loaded = revision.date
+            if pending:
+                _append_manifest(manifest_path, revision, pending | previous)
+                summary["merged"] += 1
+
+            now = time.perf_counter()
+            if now - last_report >= config.BACKFILL_PROGRESS_INTERVAL_S or done == len(todo):
+                rate = done / (now - start)
+                logger.info(f"Backfill progress: {done}/{len(todo)} revisions ({rate:.1f}/s, "
+                            f"ETA {(len(todo) - done) / rate:.0f}s, revision date {revision.date}).")
+                last_report = now
+    except BrokenProcessPool as e: # A worker died (killed, out of memory): keep what was merged
+        summary["remaining"] = len(todo) - done
+        logger.error(f"Backfill stopped: a worker process crashed ({e}). {done} revisions were processed; "
+                     f"run the backfill again to resume with the remaining {summary['remaining']}.")
+    finally:
+        if conn is not None:
+            conn.close()
+        location_lookup.save()
+
+    if archive is not None:
+        archive.compact()
+    logger.info(f"--- Backfill finished: {summary} ---")
+    return summary
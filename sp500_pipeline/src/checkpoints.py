@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import time
+from types import ModuleType
+from typing import Any, List, Optional, Tuple, Union
+
+from . import config
+
+logger = logging.getLogger(__name__)
+# BasicConfig for logger is usually set in the main entry point (cli.py)
+
+
+def content_hash(data: Union[str, bytes]) -> str:
+    """SHA-256 hex digest of a text (UTF-8) or bytes payload."""
+    return hashlib.sha256(data.encode("utf-8") if isinstance(data, str) else data).hexdigest()
+
+
+_module_fingerprints = {}
+
+
+def module_fingerprint(module: ModuleType) -> str:
+    """Hash of a module's source file, so checkpoints are invalidated when the stage code changes."""
+    path = module.__file__
+    if path not in _module_fingerprints:
+        with open(path, "rb") as f:
+            _module_fingerprints[path] = content_hash(f.read())
+    return _module_fingerprints[path]
+
+
+def stage_key(stage: str, input_hash: str, *config_parts: Any) -> str:
+    """
+    Checkpoint key of a stage: hash of the stage name, the hash of its input and the
+    configuration values (and code fingerprints) its output depends on.
+    config_parts must be JSON-serializable.
+    """
+    payload = json.dumps([stage, input_hash, list(config_parts)], sort_keys=True, default=str)
+    return f"{stage}-{content_hash(payload)[:32]}"
+
+
+class CheckpointStore:
+    """
+    On-disk store of stage outputs keyed by stage_key. Values are pickled (highest protocol,
+    fast for DataFrames) and written atomically. Reading an entry refreshes its modification
+    time, so size-based eviction drops the least recently used entries first.
+    """
+
+    def __init__(self, directory: str, max_age_seconds: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.directory = directory
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_config(cls) -> Optional["CheckpointStore"]:
+        """Store configured by config.CHECKPOINT_*, or None if checkpoints are disabled."""
+        if not config.CHECKPOINT_DIR:
+            return None
+        return cls(config.CHECKPOINT_DIR, config.CHECKPOINT_MAX_AGE_DAYS * 86400, config.CHECKPOINT_MAX_BYTES)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the stored value, or None if missing, expired or unreadable."""
+        path = self._path(key)
+        try:
+            if self.max_age_seconds is not None and time.time() - os.path.getmtime(path) > self.max_age_seconds:
+                self._remove(path)
+                return None
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path) # Mark as recently used
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            self._remove(path)
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        """Stores a value (atomic replace) and evicts old entries. Failures are logged, not raised."""
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError) as e:
+            logger.warning(f"Could not write checkpoint {path}: {e}")
+            return
+        self.evict()
+
+    def evict(self) -> int:
+        """Removes entries older than max_age_seconds, then the least recently used ones above max_bytes."""
+        entries: List[Tuple[float, int, str]] = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        removed = 0
+        now = time.time()
+        if self.max_age_seconds is not None:
+            expired = [entry for entry in entries if now - entry[0] > self.max_age_seconds]
+            for _, _, path in expired:
+                removed += self._remove(path)
+            entries = [entry for entry in entries if entry not in expired]
+        if self.max_bytes is not None:
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries): # Oldest (least recently used) first
+                if total <= self.max_bytes:
+                    break
+                removed += self._remove(path)
+                total -= size
+        if removed:
+            logger.debug(f"Evicted {removed} checkpoints from {self.directory}.")
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
@@ -0,0 +1,173 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+from . import config
+
+# Entry point of the pipeline: python -m src <command>. Only the standard library is imported at
+# startup; pandas, requests, bs4 and pyarrow are imported inside the commands that need them
+# (run, backfill, serve), so the read-only commands (status, query) answer from SQLite in milliseconds.
+
+logger = logging.getLogger(__name__)
+
+
+def configure_logging(level: int = config.LOG_LEVEL) -> None:
+    """Configures the root logger for the whole application (all modules use logging.getLogger(__name__))."""
+    logging.basicConfig(level=level, format=config.LOG_FORMAT, force=True)
+
+
+# --- Output ---
+
+def _print_rows(columns: List[str], rows: List[tuple], output_format: str) -> None:
+    if output_format == "json":
+        print(json.dumps([dict(zip(columns, row)) for row in rows], indent=2, default=str))
+    elif output_format == "csv":
+        writer = csv.writer(sys.stdout, lineterminator="\n")
+        writer.writerow(columns)
+        writer.writerows(rows)
+    else:
+        texts = [["" if value is None else str(value) for value in row] for row in rows]
+        widths = [max([len(column)] + [len(row[i]) for row in texts]) for i, column in enumerate(columns)]
+        print("  ".join(column.ljust(width) for column, width in zip(columns, widths)).rstrip())
+        print("  ".join("-" * width for width in widths))
+        for row in texts:
+            print("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+
+
+# --- Commands ---
+
+def _cmd_run(args: argparse.Namespace) -> int:
+    from .main_pipeline import run_index_pipeline, run_pipeline # pandas, requests, bs4
+    if args.all_indexes:
+        return 0 if run_index_pipeline() else 1
+    succeeded = run_pipeline(profile=args.profile or args.cprofile, cprofile=args.cprofile,
+                             stream=args.stream, batch_size=args.batch_size)
+    return 0 if succeeded else 1
+
+
+def _cmd_backfill(args: argparse.Namespace) -> int:
+    from .backfill import backfill_revisions # pandas, bs4, pyarrow
+    summary = backfill_revisions(args.directory, targets=args.target, max_workers=args.workers)
+    return 0 if summary is not None and not summary["failed"] and not summary["remaining"] else 1
+
+
+def _cmd_serve(args: argparse.Namespace) -> int:
+    from .server import serve # asyncio server (standard library only)
+    return 0 if serve(host=args.host, port=args.port, pool_size=args.pool_size, cache_size=args.cache_size) else 1
+
+
+def _cmd_status(args: argparse.Namespace) -> int:
+    from .queries import connect_readonly, load_status
+    conn = connect_readonly()
+    if conn is None:
+        return 1
+    try:
+        status = load_status(conn)
+    finally:
+        conn.close()
+    status = {"database": config.DB_PATH, "database_bytes": os.path.getsize(config.DB_PATH), **status}
+    if args.format == "json":
+        print(json.dumps(status, indent=2))
+        return 0
+
+    last_run = status["last_run"]
+    lines = [
+        ("Database", f"{status['database']} ({status['database_bytes'] / 2**20:.1f} MB)"),
+        ("Last run", "never recorded" if last_run is None else
+         f"{last_run['status']} ({last_run['mode']}), started {last_run['started_at']}, "
+         f"finished {last_run['finished_at']}"),
+        ("Companies", f"{status['active_companies']} active, {status['removed_companies']} removed"),
+        ("Last change", status["last_history_change"]),
+        ("Index changes", f"{status['index_changes']} (latest effective {status['last_index_change']})"),
+    ]
+    for label, value in lines:
+        print(f"{label + ':':<15}{'-' if value is None else value}")
+    return 0
+
+
+def _cmd_query(args: argparse.Namespace) -> int:
+    from . import queries
+    handlers: Dict[str, Callable[..., Any]] = {
+        "sectors": lambda conn: queries.sector_counts(conn, args.limit),
+        "states": lambda conn: queries.state_counts(conn, args.limit),
+        "oldest": lambda conn: queries.oldest_companies(conn, args.limit),
+        "company": lambda conn: queries.company(conn, args.symbol),
+        "members": lambda conn: queries.members_as_of(conn, args.as_of),
+    }
+    conn = queries.connect_readonly()
+    if conn is None:
+        return 1
+    try:
+        result = handlers[args.query](conn)
+    finally:
+        conn.close()
+    if result is None:
+        return 1
+    _print_rows(result.columns, result.rows, args.format)
+    return 0
+
+
+# --- Parser ---
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src", description="S&P 500 data pipeline.")
+    parser.add_argument("--db", metavar="PATH", help=f"SQLite database (default: {config.DB_PATH}).")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND", required=True)
+
+    run = commands.add_parser("run", help="Extract, transform and load the S&P 500 page.")
+    run.add_argument("--profile", action="store_true",
+                     help=f"Write per-stage metrics (time, CPU, peak memory, rows, bytes) to {config.METRICS_PATH}.")
+    run.add_argument("--cprofile", action="store_true",
+                     help=f"With --profile, dump a cProfile of the slowest stage to {config.PROFILE_DIR}.")
+    run.add_argument("--stream", action="store_true",
+                     help="Stream row batches from the parser to the database, committing each batch.")
+    run.add_argument("--batch-size", type=int, default=None,
+                     help=f"Rows per batch with --stream (default: {config.STREAM_BATCH_SIZE}).")
+    run.add_argument("--all-indexes", action="store_true",
+                     help=f"Load every source of config.INDEX_SOURCES into '{config.MULTI_INDEX_TABLE_NAME}' instead.")
+    run.set_defaults(handler=_cmd_run, log_level=config.LOG_LEVEL)
+
+    backfill = commands.add_parser("backfill", help="Parse saved HTML revisions in parallel and merge them in order.")
+    backfill.add_argument("directory", help="Folder with the saved revisions (dated file names, e.g. sp500_2019-03-15.html).")
+    backfill.add_argument("--target", nargs="+", choices=config.BACKFILL_TARGETS, default=["snapshots"],
+                          help="Stores to merge into (default: snapshots).")
+    backfill.add_argument("--workers", type=int, default=None,
+                          help="Worker processes (default: config.BACKFILL_MAX_WORKERS or the CPU count).")
+    backfill.set_defaults(handler=_cmd_backfill, log_level=logging.INFO)
+
+    serve = commands.add_parser("serve", help="Serve the database over a read-only HTTP/JSON API.")
+    serve.add_argument("--host", default=config.API_HOST)
+    serve.add_argument("--port", type=int, default=config.API_PORT, help="TCP port (0 = any free port).")
+    serve.add_argument("--pool-size", type=int, default=config.API_POOL_SIZE, help="Read-only connections.")
+    serve.add_argument("--cache-size", type=int, default=config.API_CACHE_SIZE,
+                       help="Cached results (LRU); 0 disables the cache.")
+    serve.set_defaults(handler=_cmd_serve, log_level=logging.INFO)
+
+    status = commands.add_parser("status", help="Show the state of the last load (read-only).")
+    status.add_argument("--format", choices=["text", "json"], default="text")
+    status.set_defaults(handler=_cmd_status, log_level=logging.WARNING)
+
+    query = commands.add_parser("query", help="Answer the dashboard questions from SQLite (read-only).")
+    query.add_argument("--format", choices=["table", "csv", "json"], default="table")
+    queries = query.add_subparsers(dest="query", metavar="QUERY", required=True)
+    for name, help_text in (("sectors", "Active companies per GICS sector."),
+                            ("states", "Active companies per headquarters state."),
+                            ("oldest", "Oldest active companies by founding year.")):
+        queries.add_parser(name, help=help_text).add_argument("--limit", type=int, default=None)
+    queries.add_parser("company", help="Stored row of one company.").add_argument("symbol")
+    queries.add_parser("members", help="Index members on a date (YYYY-MM-DD).").add_argument("as_of")
+    query.set_defaults(handler=_cmd_query, log_level=logging.WARNING)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs the CLI and returns the exit code."""
+    args = build_parser().parse_args(argv)
+    configure_logging(args.log_level)
+    if args.db:
+        config.DB_PATH = args.db
+    return args.handler(args)
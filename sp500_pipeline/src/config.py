@@ -3,14 +3,51 @@ import logging
 # --- General Configuration ---
 WIKIPEDIA_URL = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
 
+# --- HTTP Settings ---
+HTTP_TIMEOUT = 15                          # Request timeout in seconds
+HTTP_USER_AGENT = "sp500-pipeline/1.0 (https://github.com/JoaquinRamirez98/promtior-data-engenier)"
+HTTP_MAX_RETRIES = 3                       # Bounded retries for connection errors and retryable statuses
+HTTP_BACKOFF_FACTOR = 0.5                  # Exponential backoff: 0.5s, 1s, 2s, ...
+HTTP_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+HTTP_CACHE_DIR = "data/http_cache"         # On-disk cache of bodies + ETag/Last-Modified validators (None disables it)
+
 # --- Database Settings ---
 DB_PATH = "data/sp500_companies.db" # Relative path to the SQLite database file
 DB_TABLE_NAME = "companies"         # Name of the table to store company data
+DB_KEY_COLUMN = "Symbol"            # Business key used to match incoming rows with stored rows
+DB_HISTORY_TABLE_NAME = "companies_history" # Versioned change history (Valid_From / Valid_To)
+# Load strategy for save_data_to_db:
+#   "incremental" -> diff against stored rows; insert/update/soft-delete only changed rows
+#                    in one transaction and append each change to DB_HISTORY_TABLE_NAME.
+#   "replace"     -> drop and rewrite the whole table on every run (original behaviour).
+DB_LOAD_MODE = "incremental"
+# Columns the dashboards filter/group by (and CIK, for point lookups of the read API); each gets
+# a secondary index on the companies table.
+DB_INDEXED_COLUMNS = ["GICS_Sector", "Headquarters_State", "Founded_Year", "CIK"]
+# Bulk loads above this many rows drop the secondary indexes and rebuild them once at the end.
+DB_BULK_REINDEX_THRESHOLD = 50000
+# Summary tables maintained at load time for the Power BI questions (only active companies count).
+AGG_SECTOR_COUNTS_TABLE = "agg_sector_counts"
+AGG_STATE_COUNTS_TABLE = "agg_state_counts"
+AGG_OLDEST_COMPANIES_TABLE = "agg_oldest_companies"
+AGG_OLDEST_LIMIT = 10
+# PRAGMAs applied by create_connection to every connection.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",     # Readers (e.g. Power BI) are not blocked while a load is running
+    "synchronous": "NORMAL",   # Safe with WAL, avoids an fsync per transaction
+    "cache_size": -64000,      # Negative = KiB, i.e. ~64 MB page cache
+    "mmap_size": 268435456,    # 256 MB memory-mapped I/O for reads
+    "temp_store": "MEMORY",
+}
 
 # --- Logging Configuration ---
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 LOG_LEVEL = logging.DEBUG # Set to logging.INFO for less verbose output in production
 
+# --- Profiling / Metrics (enabled with: python -m src run --profile) ---
+METRICS_PATH = "data/metrics/pipeline_runs.jsonl" # One JSON record per profiled run
+PROFILE_DIR = "data/metrics/profiles"             # cProfile dumps of the slowest stage (--cprofile)
+
 # --- Data Extraction Configuration ---
 # Defines the mapping between desired DataFrame column names (keys)
 # and the exact text of the HTML table headers <th> (values) on Wikipedia.
@@ -26,11 +63,149 @@ TABLE_COLUMN_MAPPING_KEYS = {
     "Founded": "Founded"
 }
 
+# --- HTML Parsing Configuration ---
+# Backend used by parse_sp500_table:
+#   "stream" -> event-based scan (html.parser) that only materializes the target table
+#               and stops as soon as it closes. Default, lowest time and memory.
+#   "bs4"    -> builds the full BeautifulSoup tree of the page (original implementation).
+HTML_PARSER_BACKEND = "stream"
+CONSTITUENTS_TABLE_ID = "constituents"     # Preferred locator for the main table
+FALLBACK_TABLE_CLASS = "wikitable sortable" # Fallback locator when the ID is missing
+FALLBACK_HEADER_TEXT = "GICS Sector"        # Header that identifies the correct fallback table
+
+# --- Stage Checkpoints ---
+# Outputs of parse/transform are stored under a key made of the hash of the stage input, the
+# config values below and the stage's source code. A byte-identical page then skips parsing and
+# transforming, and the load is skipped when the database already holds that exact result
+# (marker in DB_METADATA_TABLE_NAME). Set CHECKPOINT_DIR = None to disable.
+CHECKPOINT_DIR = "data/checkpoints"
+CHECKPOINT_MAX_AGE_DAYS = 7                  # Entries not written/read for this long are evicted
+CHECKPOINT_MAX_BYTES = 256 * 1024 * 1024     # Least recently used entries are evicted above this size
+DB_METADATA_TABLE_NAME = "pipeline_metadata" # Key/value table for load markers
+
+# --- Daily Snapshot Archive (requires pyarrow; see src/snapshots.py) ---
+# Every loaded transform_data output is archived as daily/YYYY-MM-DD.arrow (Arrow IPC, read
+# memory-mapped); complete months are compacted into monthly/YYYY-MM.arrow. Set SNAPSHOT_DIR = None to disable.
+SNAPSHOT_DIR = "data/snapshots"
+SNAPSHOT_COMPACTED_COMPRESSION = "zstd" # Codec of the monthly files ("lz4", "zstd" or None); daily files are uncompressed
+
+# --- Backfill of Saved Revisions (python -m src backfill DIR) ---
+# Saved HTML revisions of the page are parsed/transformed in a process pool and merged in
+# revision order (date taken from the file name, e.g. sp500_2019-03-15.html, else the mtime).
+BACKFILL_FILE_PATTERNS = ("*.html", "*.htm")
+BACKFILL_TARGETS = ("snapshots", "history")   # Stores a backfill can merge into (see backfill.backfill_revisions)
+BACKFILL_MAX_WORKERS = None                   # Worker processes (None = CPU count)
+BACKFILL_QUEUE_FACTOR = 4                     # Revisions in flight per worker ahead of the ordered merge
+BACKFILL_MANIFEST_PATH = "data/backfill_manifest.jsonl" # Merged revisions, read to resume after a crash
+BACKFILL_PROGRESS_INTERVAL_S = 5              # Seconds between progress log lines
+BACKFILL_WORKER_LOG_LEVEL = logging.WARNING   # Log level inside the worker processes
+
+# --- Read API (python -m src serve; see src/server.py) ---
+API_HOST = "127.0.0.1"
+API_PORT = 8080
+API_POOL_SIZE = 4                # Read-only SQLite connections (and query threads)
+API_CACHE_SIZE = 4096            # Cached results (LRU); 0 disables the cache
+API_GENERATION_POLL_S = 0.5      # Seconds between checks of the load generation (max. staleness of cached results)
+API_MAX_BATCH = 1000             # Max. symbols/CIKs per batch lookup
+API_MAX_BODY_BYTES = 1048576     # Max. request body size
+
+# --- Streaming Mode (run_pipeline(stream=True) / --stream) ---
+# Rows flow parser -> transform -> loader in batches of STREAM_BATCH_SIZE, each batch committed
+# on its own, so peak memory depends on the batch size instead of the table size.
+STREAM_BATCH_SIZE = 1000
+STREAM_FEED_CHUNK_SIZE = 65536 # Characters of HTML handed to the scanner per feed() call
+
+# --- Multi-Index Sources ---
+# Registry of index-constituent pages fetched and parsed concurrently by
+# data_extraction.get_index_constituents_data and loaded into MULTI_INDEX_TABLE_NAME.
+# Each entry: page URL, table locator (ID + fallback header) and column mapping.
+# A mapping value may be a list of alternative header texts (first match wins).
+INDEX_SOURCES = {
+    "S&P 500": {
+        "url": WIKIPEDIA_URL,
+        "table_id": "constituents",
+        "header_hint": "GICS Sector",
+        "column_mapping": TABLE_COLUMN_MAPPING_KEYS,
+    },
+    "S&P 400": {
+        "url": "https://en.wikipedia.org/wiki/List_of_S%26P_400_companies",
+        "table_id": "constituents",
+        "header_hint": "GICS Sector",
+        "column_mapping": {
+            "Symbol": "Symbol",
+            "Security": ["Security", "Company"],
+            "GICS_Sector": "GICS Sector",
+            "GICS_Sub_Industry": "GICS Sub-Industry",
+            "Headquarters_Location": "Headquarters Location",
+            "CIK": "CIK",
+        },
+    },
+    "S&P 600": {
+        "url": "https://en.wikipedia.org/wiki/List_of_S%26P_600_companies",
+        "table_id": "constituents",
+        "header_hint": "GICS Sector",
+        "column_mapping": {
+            "Symbol": "Symbol",
+            "Security": ["Company", "Security"],
+            "GICS_Sector": "GICS Sector",
+            "GICS_Sub_Industry": "GICS Sub-Industry",
+            "Headquarters_Location": "Headquarters Location",
+            "CIK": "CIK",
+        },
+    },
+    "Nasdaq-100": {
+        "url": "https://en.wikipedia.org/wiki/Nasdaq-100",
+        "table_id": "constituents",
+        "header_hint": "GICS Sector",
+        "column_mapping": {
+            "Symbol": ["Ticker", "Symbol"],
+            "Security": ["Company", "Security"],
+            "GICS_Sector": "GICS Sector",
+            "GICS_Sub_Industry": "GICS Sub-Industry",
+        },
+    },
+    "DJIA": {
+        "url": "https://en.wikipedia.org/wiki/Dow_Jones_Industrial_Average",
+        "table_id": "constituents",
+        "header_hint": "Exchange", # "Symbol" is in nearly every table of the page
+        # The page only has an "Industry" column, not the GICS classification: GICS_Sector stays empty
+        "column_mapping": {
+            "Symbol": "Symbol",
+            "Security": "Company",
+            "Date_Added": "Date added",
+        },
+    },
+}
+MAX_CONCURRENT_FETCHES = 4              # Upper bound of parallel source fetches
+MULTI_INDEX_TABLE_NAME = "index_constituents" # One row per (Index_Name, Symbol)
+
+# --- Index Changes / Point-in-Time Membership ---
+# The "Selected changes" table of the same page (additions and removals with their effective date).
+# Its header has two rows (Added/Removed over Ticker/Security), so cells are mapped by position.
+CHANGES_TABLE_ID = "changes"
+CHANGES_HEADER_TEXT = "Reason" # Header that identifies the changes table in the fallback search
+CHANGES_COLUMNS = [
+    "Effective_Date", "Added_Symbol", "Added_Security",
+    "Removed_Symbol", "Removed_Security", "Reason",
+]
+CHANGES_TABLE_NAME = "constituent_changes"
+# Membership intervals derived from the changes: a symbol is a member on D if Start_Date <= D < End_Date.
+MEMBERSHIP_TABLE_NAME = "index_membership"
+MEMBERSHIP_START_SENTINEL = "0000-01-01" # Member since before the first recorded change
+MEMBERSHIP_END_SENTINEL = "9999-12-31"   # Still a member
+
 # --- Data Transformation Configuration ---
+# Persistent lookup of resolved headquarters locations (locations.py): each distinct
+# 'Headquarters Location' text is resolved against the gazetteer once, not on every run.
+# run_pipeline and the backfill read it before transforming and write the new entries after;
+# it is a separate file so it survives rebuilding the database. None keeps it in memory only.
+LOCATION_LOOKUP_PATH = "data/location_lookup.db"
+LOCATION_LOOKUP_TABLE_NAME = "location_lookup"
+
 # Defines the final set of columns expected in the DataFrame after transformation
 # and to be loaded into the database.
 FINAL_COLUMNS = [
     "Symbol", "Security", "GICS_Sector", "GICS_Sub_Industry",
-    "Headquarters_City", "Headquarters_State", "Date_Added",
+    "Headquarters_City", "Headquarters_State", "Headquarters_Country", "Date_Added",
     "CIK", "Founded_Year"
 ]
\ No newline at end of file
@@ -1,51 +1,424 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup, Tag
+from html.parser import HTMLParser
 import pandas as pd
+import hashlib
+import json
 import logging
-from typing import List, Dict, Optional
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Iterable, Iterator, NamedTuple, Sequence, Tuple, Union
 
 from . import config 
+from .profiling import PipelineProfiler
 
 logger = logging.getLogger(__name__)
-# BasicConfig for logger is usually set in the main entry point (main_pipeline.py)
+# BasicConfig for logger is usually set in the main entry point (cli.py)
 
-def fetch_html(url: str, timeout: int = 15) -> Optional[str]:
+class FetchResult(NamedTuple):
+    """Outcome of an HTTP fetch: the body plus whether it was served from the local cache."""
+    content: Optional[str]
+    from_cache: bool
+    status_code: Optional[int]
+    bytes_downloaded: int
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
     """
-    Fetches HTML content from the given URL.
+    Returns the module-wide requests.Session, creating it on first use.
+    The session keeps connections alive between requests and retries connection errors
+    and retryable HTTP statuses with bounded exponential backoff.
+    """
+    global _session
+    with _session_lock: # Sources may be fetched from several threads
+        if _session is not None:
+            return _session
+        retry_policy = Retry(
+            total=config.HTTP_MAX_RETRIES,
+            backoff_factor=config.HTTP_BACKOFF_FACTOR,
+            status_forcelist=config.HTTP_RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False, # Hand the final response back so raise_for_status() reports it
+        )
+        adapter = HTTPAdapter(max_retries=retry_policy, pool_maxsize=max(10, config.MAX_CONCURRENT_FETCHES))
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"User-Agent": config.HTTP_USER_AGENT})
+        _session = session
+        return _session
+
+
+def _cache_paths(url: str, cache_dir: str) -> Tuple[str, str]:
+    """Returns the (body, metadata) file paths used to cache the given URL."""
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{key}.html"), os.path.join(cache_dir, f"{key}.json")
+
+
+def _load_cached_response(url: str, cache_dir: str) -> Optional[Dict[str, str]]:
+    """Loads a cached body and its validators. Returns None if missing or unreadable."""
+    body_path, meta_path = _cache_paths(url, cache_dir)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        with open(body_path, "r", encoding="utf-8") as f:
+            cached["body"] = f.read()
+        return cached
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable HTTP cache entry for {url}: {e}")
+        return None
+
+
+def _store_cached_response(url: str, cache_dir: str, response: requests.Response) -> None:
+    """Persists the body and validators of a 200 response. Files are replaced atomically."""
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not etag and not last_modified:
+        logger.debug(f"Response from {url} has no ETag/Last-Modified; not caching.")
+        return
+
+    body_path, meta_path = _cache_paths(url, cache_dir)
+    meta = {"url": url, "etag": etag, "last_modified": last_modified}
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for path, payload in ((body_path, response.text), (meta_path, json.dumps(meta))):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        logger.debug(f"Cached response for {url} (ETag={etag}, Last-Modified={last_modified}).")
+    except OSError as e:
+        logger.warning(f"Could not write HTTP cache for {url}: {e}")
+
+
+def fetch_html_conditional(url: str, timeout: int = config.HTTP_TIMEOUT,
+                           cache_dir: Optional[str] = config.HTTP_CACHE_DIR) -> FetchResult:
+    """
+    Fetches HTML content with a conditional GET backed by an on-disk cache.
+    If a cached copy exists, its ETag/Last-Modified validators are sent as
+    If-None-Match/If-Modified-Since and a 304 response reuses the cached body.
 
     Args:
         url: The URL to fetch.
         timeout: Request timeout in seconds.
+        cache_dir: Directory for cached bodies and validators. None disables caching.
 
     Returns:
-        HTML content as a string if successful, None otherwise.
+        FetchResult; its content is None if the request failed.
     """
+    cached = _load_cached_response(url, cache_dir) if cache_dir else None
+    request_headers: Dict[str, str] = {}
+    if cached:
+        if cached.get("etag"):
+            request_headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            request_headers["If-Modified-Since"] = cached["last_modified"]
+
     try:
-        response = requests.get(url, timeout=timeout)
+        response = get_http_session().get(url, timeout=timeout, headers=request_headers)
+        if response.status_code == 304 and cached:
+            logger.info(f"Content at {url} not modified (304). Reusing cached body.")
+            return FetchResult(cached["body"], True, 304, 0)
         response.raise_for_status() # Raises HTTPError for bad responses (4XX or 5XX)
         logger.info(f"Successfully fetched HTML from {url}")
-        return response.text
+        if cache_dir:
+            _store_cached_response(url, cache_dir, response)
+        return FetchResult(response.text, False, response.status_code, len(response.content))
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching URL {url}: {e}")
+        return FetchResult(None, False, None, 0)
+
+
+def fetch_html(url: str, timeout: int = config.HTTP_TIMEOUT) -> Optional[str]:
+    """
+    Fetches HTML content from the given URL (using the shared session and HTTP cache).
+
+    Args:
+        url: The URL to fetch.
+        timeout: Request timeout in seconds.
+
+    Returns:
+        HTML content as a string if successful, None otherwise.
+    """
+    return fetch_html_conditional(url, timeout=timeout).content
+
+
+class _StopScan(Exception):
+    """Raised internally to abort the event-based scan once the target table has closed."""
+
+
+class _TableScanner(HTMLParser):
+    """
+    Event-based scanner that captures a single HTML table without building a document tree.
+    It mirrors the table-selection rules of the BeautifulSoup path:
+    the table with id=table_id wins; otherwise the first table whose class attribute is
+    fallback_class and that contains a <th> with text header_hint is used.
+    Header texts and the cell texts of every <tr> in the first <tbody> are kept as plain tuples.
+    With expand_rowspans, a <td rowspan="n"> is repeated at the same position in the next n-1 rows.
+    """
+    _SKIP_TEXT_TAGS = ("script", "style", "template")
+
+    def __init__(self, table_id: str, fallback_class: str, header_hint: str, expand_rowspans: bool = False):
+        super().__init__(convert_charrefs=True)
+        self.table_id = table_id
+        self.fallback_class = fallback_class
+        self.header_hint = header_hint
+        self.expand_rowspans = expand_rowspans
+
+        self.found_by_id = False
+        self.result: Optional[Dict] = None           # Captured table selected by ID
+        self.id_capture: Optional[Dict] = None       # Table with the ID while it is still being scanned
+        self.fallback_result: Optional[Dict] = None  # First fallback candidate matching header_hint
+        self.fallback_candidates = 0
+
+        self._capture: Optional[Dict] = None
+        self._table_depth = 0      # Nesting depth inside the captured table (1 = its own level)
+        self._skip_text_depth = 0
+        self._th_parts: Optional[List[str]] = None
+        self._td_parts: Optional[List[str]] = None
+        self._row: Optional[List[str]] = None
+        self._td_rowspan = 1
+        self._carried: Dict[int, List] = {} # Column -> [text, rows left] of cells spanning down
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP_TEXT_TAGS:
+            self._skip_text_depth += 1
+            return
+
+        if tag == "table":
+            if self._capture is not None:
+                self._table_depth += 1
+                return
+            attrs_dict = dict(attrs)
+            is_id_match = attrs_dict.get("id") == self.table_id
+            is_candidate = (
+                self.fallback_result is None
+                and " ".join((attrs_dict.get("class") or "").split()) == self.fallback_class
+            )
+            if is_id_match or is_candidate:
+                if not is_id_match:
+                    self.fallback_candidates += 1
+                self._capture = {
+                    "by_id": is_id_match, "classes": (attrs_dict.get("class") or "").split(),
+                    "headers": [], "rows": [], "has_tbody": False, "in_tbody": False,
+                }
+                self._table_depth = 1
+                if is_id_match:
+                    self.id_capture = self._capture # Lets a streaming reader drain its rows as they close
+            return
+
+        if self._capture is None:
+            return
+
+        # Nested tables are not expected; their text simply flows into the enclosing cell.
+        if self._table_depth != 1:
+            return
+        if tag == "tbody" and not self._capture["has_tbody"]:
+            self._capture["has_tbody"] = True
+            self._capture["in_tbody"] = True
+        elif tag == "tr" and self._capture["in_tbody"]:
+            self._close_row()
+            self._row = []
+        elif tag == "th":
+            self._close_th()
+            self._th_parts = []
+        elif tag == "td" and self._row is not None:
+            self._close_td()
+            self._td_parts = []
+            if self.expand_rowspans:
+                self._fill_carried()
+                rowspan = dict(attrs).get("rowspan") or "1"
+                self._td_rowspan = int(rowspan) if rowspan.isdigit() else 1
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP_TEXT_TAGS:
+            self._skip_text_depth = max(0, self._skip_text_depth - 1)
+            return
+        if self._capture is None:
+            return
+
+        if tag == "table":
+            self._table_depth -= 1
+            if self._table_depth == 0:
+                self._finish_table()
+        elif self._table_depth != 1:
+            return
+        elif tag == "th":
+            self._close_th()
+        elif tag == "td":
+            self._close_td()
+        elif tag == "tr":
+            self._close_row()
+        elif tag == "tbody":
+            self._close_row()
+            self._capture["in_tbody"] = False
+
+    def handle_data(self, data):
+        if self._capture is None or self._skip_text_depth:
+            return
+        if self._th_parts is not None:
+            self._th_parts.append(data)
+        if self._td_parts is not None:
+            self._td_parts.append(data)
+
+    def _close_th(self):
+        if self._th_parts is not None:
+            self._capture["headers"].append("".join(self._th_parts).strip())
+            self._th_parts = None
+
+    def _close_td(self):
+        if self._td_parts is not None:
+            text = "".join(self._td_parts).strip()
+            self._row.append(text)
+            self._td_parts = None
+            if self._td_rowspan > 1:
+                self._carried[len(self._row) - 1] = [text, self._td_rowspan - 1]
+                self._td_rowspan = 1
+
+    def _fill_carried(self):
+        """Inserts the cells spanning down from previous rows at the current position."""
+        while len(self._row) in self._carried:
+            carried = self._carried[len(self._row)]
+            self._row.append(carried[0])
+            carried[1] -= 1
+            if carried[1] == 0:
+                del self._carried[len(self._row) - 1]
+
+    def _close_row(self):
+        self._close_td()
+        if self._row is not None and self._carried:
+            self._fill_carried() # Trailing cells spanning down (e.g. a shared reason)
+        if self._row is not None:
+            self._capture["rows"].append(tuple(self._row))
+            self._row = None
+
+    def _finish_table(self):
+        self._close_th()
+        self._close_row()
+        captured, self._capture = self._capture, None
+        if captured["by_id"]:
+            self.found_by_id = True
+            self.result = captured
+            raise _StopScan()
+        logger.debug(f"  Fallback Candidate {self.fallback_candidates - 1} - Headers: {captured['headers']}")
+        if self.header_hint in captured["headers"]:
+            self.fallback_result = captured
+
+
+class TableSpec(NamedTuple):
+    """Where a constituents table lives in a page and how its headers map to DataFrame columns."""
+    table_id: str
+    fallback_class: str
+    header_hint: str
+    column_mapping: Dict[str, Union[str, Sequence[str]]]
+
+
+def default_table_spec() -> TableSpec:
+    """TableSpec of the S&P 500 constituents table, built from config."""
+    return TableSpec(
+        table_id=config.CONSTITUENTS_TABLE_ID,
+        fallback_class=config.FALLBACK_TABLE_CLASS,
+        header_hint=config.FALLBACK_HEADER_TEXT,
+        column_mapping=config.TABLE_COLUMN_MAPPING_KEYS,
+    )
+
+
+def _resolve_column_map(header_texts: List[str],
+                        column_mapping: Dict[str, Union[str, Sequence[str]]]) -> Optional[Dict[str, int]]:
+    """
+    Maps the table headers to the DataFrame columns of column_mapping.
+    A mapping value may list alternative header texts; the first one present is used.
+    Returns {df_col_name: html_table_index}, or None if no column could be mapped.
+    """
+    logger.debug(f"Actual HTML Headers from Selected Table: {header_texts}")
+
+    html_header_to_index_map: Dict[str, int] = {
+        text: i for i, text in enumerate(header_texts)
+    }
+
+    column_map_for_df: Dict[str, int] = {} # Stores {df_col_name: html_table_index}
+    for df_col_name, html_header_text_from_config in column_mapping.items():
+        candidates = [html_header_text_from_config] if isinstance(html_header_text_from_config, str) else html_header_text_from_config
+        matched_header = next((text for text in candidates if text in html_header_to_index_map), None)
+        if matched_header is not None:
+            column_map_for_df[df_col_name] = html_header_to_index_map[matched_header]
+        else:
+            logger.warning(f"Configuration Mismatch: HTML header '{html_header_text_from_config}' (for DF column '{df_col_name}') not found in selected table. Actual headers: {list(html_header_to_index_map.keys())}")
+
+    # Ensure a minimum number of columns are mapped to proceed
+    # This prevents parsing with largely incorrect or missing column definitions
+    successfully_mapped_count = len(column_map_for_df)
+    if successfully_mapped_count == 0:
+         logger.error(f"Critical: Mapped 0 columns. Aborting parse. Headers in table: {list(html_header_to_index_map.keys())}")
+         return None
+    elif successfully_mapped_count < len(column_mapping):
+        logger.warning(f"Partial Map: Mapped {successfully_mapped_count}/{len(column_mapping)} columns. Proceeding, but review config/HTML if critical data is missing.")
+    else:
+         logger.info(f"Successfully mapped all {successfully_mapped_count} columns: {column_map_for_df}")
+    return column_map_for_df
+
+
+def _select_row_values(rows: Iterable[Sequence[str]], column_indices: List[int],
+                       first_row_number: int = 1) -> List[Tuple[str, ...]]:
+    """Keeps the mapped cells of every row; rows with too few cells are skipped."""
+    max_needed_index = max(column_indices) # Computed once, not per row
+    rows_data: List[Tuple[str, ...]] = []
+    for i, cells in enumerate(rows, first_row_number):
+        if len(cells) <= max_needed_index:
+            if any(cells): # Log only if the skipped row had some content
+                 logger.debug(f"Skipping row {i} (insufficient cells: {len(cells)}, need >{max_needed_index}): {list(cells)}")
+            continue
+        rows_data.append(tuple(cells[idx] for idx in column_indices))
+    return rows_data
+
+
+def _build_companies_dataframe(header_texts: List[str], rows: Iterable[Sequence[str]],
+                               column_mapping: Dict[str, Union[str, Sequence[str]]]) -> Optional[pd.DataFrame]:
+    """
+    Maps the table headers to the DataFrame columns of column_mapping and builds the DataFrame
+    from rows given as sequences of cell texts. Shared by every parser backend.
+    """
+    column_map_for_df = _resolve_column_map(header_texts, column_mapping)
+    if column_map_for_df is None:
         return None
 
-def parse_sp500_table(html_content: str) -> Optional[pd.DataFrame]:
+    # --- Row Parsing ---
+    rows_data = _select_row_values(rows, list(column_map_for_df.values()))
+    if not rows_data:
+        logger.warning("No data rows were extracted from the table's tbody.")
+        return None
+
+    df = pd.DataFrame.from_records(rows_data, columns=list(column_map_for_df.keys()))
+    logger.info(f"Successfully parsed {len(df)} company rows into DataFrame.")
+    return df
+
+
+def _parse_with_bs4(html_content: str, spec: TableSpec) -> Optional[pd.DataFrame]:
     """
-    Parses the S&P 500 companies table from the provided HTML content.
-    It first tries to locate the table by its specific ID 'constituents'.
-    If not found, it falls back to searching for tables with class 'wikitable sortable'
-    and identifies the correct one by looking for a unique header (e.g., "GICS Sector").
+    Parses the constituents table by building a full BeautifulSoup tree of the page.
+    It first tries to locate the table by its specific ID (spec.table_id, e.g. 'constituents').
+    If not found, it falls back to searching for tables with class spec.fallback_class
+    and identifies the correct one by looking for a unique header (spec.header_hint, e.g. "GICS Sector").
     """
     soup = BeautifulSoup(html_content, 'html.parser')
-    
+
     table: Optional[Tag] = None
 
     # Attempt 1: Direct selection by ID (most specific and preferred)
-    logger.debug("Attempting to find table directly by id='constituents'")
-    table = soup.find('table', id='constituents')
+    logger.debug(f"Attempting to find table directly by id='{spec.table_id}'")
+    table = soup.find('table', id=spec.table_id)
 
     if table:
-        logger.info("Successfully found table by id='constituents'.")
+        logger.info(f"Successfully found table by id='{spec.table_id}'.")
         if 'wikitable' in table.get('class', []) and 'sortable' in table.get('class', []):
             logger.debug("Confirmed table also has 'wikitable sortable' classes.")
         else:
@@ -53,118 +426,373 @@ def parse_sp500_table(html_content: str) -> Optional[pd.DataFrame]:
             logger.warning("Table found by ID lacks expected 'wikitable sortable' classes.")
     else:
         # Attempt 2: Fallback - search by class and identify by unique header content.
-        logger.warning("Could not find table by id='constituents'. Falling back to class and header search.")
-        all_wikitables = soup.find_all('table', {'class': 'wikitable sortable'})
-        
+        logger.warning(f"Could not find table by id='{spec.table_id}'. Falling back to class and header search.")
+        all_wikitables = soup.find_all('table', {'class': spec.fallback_class})
+
         if not all_wikitables:
-            logger.error("Fallback failed: No tables with class 'wikitable sortable' found.")
+            logger.error(f"Fallback failed: No tables with class '{spec.fallback_class}' found.")
             return None
 
-        logger.debug(f"Found {len(all_wikitables)} tables with class 'wikitable sortable'. Inspecting headers...")
-        target_header_text = "GICS Sector" # Assumed unique identifier for the correct table
-        found_correct_table_in_fallback = False
+        logger.debug(f"Found {len(all_wikitables)} tables with class '{spec.fallback_class}'. Inspecting headers...")
+        target_header_text = spec.header_hint # Assumed unique identifier for the correct table
         for i, t_candidate in enumerate(all_wikitables):
-            headers_th = t_candidate.find_all('th')
-            header_texts_in_current_table = [th.text.strip() for th in headers_th]
+            header_texts_in_current_table = [th.text.strip() for th in t_candidate.find_all('th')]
             logger.debug(f"  Fallback Candidate {i} - Headers: {header_texts_in_current_table}")
             if target_header_text in header_texts_in_current_table:
                 table = t_candidate
                 logger.info(f"Identified correct table via fallback (Candidate {i}) by header '{target_header_text}'.")
-                found_correct_table_in_fallback = True
                 break
-        
-        if not found_correct_table_in_fallback:
+
+        if table is None:
             logger.error(f"Fallback failed: Could not identify table by header '{target_header_text}'.")
             return None
 
-    # --- Header Parsing and Column Mapping ---
-    rows_data: List[Dict[str, str]] = []
-    headers_html_elements = table.find_all('th') 
-    
     # Extract actual header texts from the selected table for mapping
-    actual_header_texts_from_html = [th.text.strip() for th in headers_html_elements]
-    logger.debug(f"Actual HTML Headers from Selected Table: {actual_header_texts_from_html}")
+    header_texts = [th.text.strip() for th in table.find_all('th')]
 
-    html_header_to_index_map: Dict[str, int] = {
-        text: i for i, text in enumerate(actual_header_texts_from_html)
-    }
-    
-    column_map_for_df: Dict[str, int] = {} # Stores {df_col_name: html_table_index}
-    successfully_mapped_count = 0
-    for df_col_name, html_header_text_from_config in config.TABLE_COLUMN_MAPPING_KEYS.items():
-        if html_header_text_from_config in html_header_to_index_map:
-            column_map_for_df[df_col_name] = html_header_to_index_map[html_header_text_from_config]
-            successfully_mapped_count += 1
-        else:
-            logger.warning(f"Configuration Mismatch: HTML header '{html_header_text_from_config}' (for DF column '{df_col_name}') not found in selected table. Actual headers: {list(html_header_to_index_map.keys())}")
+    tbody = table.find('tbody')
+    if not tbody:
+        logger.error("No <tbody> found in the selected table. Cannot parse rows.")
+        return None
 
-    # Ensure a minimum number of columns are mapped to proceed
-    # This prevents parsing with largely incorrect or missing column definitions
-    if successfully_mapped_count == 0:
-         logger.error(f"Critical: Mapped 0 columns. Aborting parse. Headers in table: {list(html_header_to_index_map.keys())}")
-         return None
-    elif successfully_mapped_count < len(config.TABLE_COLUMN_MAPPING_KEYS):
-        logger.warning(f"Partial Map: Mapped {successfully_mapped_count}/{len(config.TABLE_COLUMN_MAPPING_KEYS)} columns. Proceeding, but review config/HTML if critical data is missing.")
+    rows = (
+        tuple(td.text.strip() for td in row_tr.find_all('td'))
+        for row_tr in tbody.find_all('tr')
+    )
+    return _build_companies_dataframe(header_texts, rows, spec.column_mapping)
+
+
+def _select_scanned_table(scanner: _TableScanner, spec: TableSpec) -> Optional[Dict]:
+    """Returns the table captured by a finished scan (by ID, else the fallback), logging the outcome."""
+    if scanner.found_by_id:
+        captured = scanner.result
+        logger.info(f"Successfully found table by id='{spec.table_id}'.")
+        if 'wikitable' in captured["classes"] and 'sortable' in captured["classes"]:
+            logger.debug("Confirmed table also has 'wikitable sortable' classes.")
+        else:
+            logger.warning("Table found by ID lacks expected 'wikitable sortable' classes.")
     else:
-         logger.info(f"Successfully mapped all {successfully_mapped_count} columns: {column_map_for_df}")
+        logger.warning(f"Could not find table by id='{spec.table_id}'. Falling back to class and header search.")
+        if scanner.fallback_candidates == 0:
+            logger.error(f"Fallback failed: No tables with class '{spec.fallback_class}' found.")
+            return None
+        captured = scanner.fallback_result
+        if captured is None:
+            logger.error(f"Fallback failed: Could not identify table by header '{spec.header_hint}'.")
+            return None
+        logger.info(f"Identified correct table via fallback by header '{spec.header_hint}'.")
 
-    # --- Row Parsing ---
-    tbody = table.find('tbody')
-    if not tbody:
+    if not captured["has_tbody"]:
         logger.error("No <tbody> found in the selected table. Cannot parse rows.")
         return None
-        
-    table_rows = tbody.find_all('tr') 
-
-    for i, row_tr in enumerate(table_rows):
-        cells_td = row_tr.find_all('td')
-        
-        max_needed_index = max(column_map_for_df.values()) if column_map_for_df else -1
-        
-        if len(cells_td) <= max_needed_index:
-            row_content_debug = [c.text.strip() for c in cells_td]
-            if any(row_content_debug): # Log only if the skipped row had some content
-                 logger.debug(f"Skipping row {i+1} (insufficient cells: {len(cells_td)}, need >{max_needed_index}): {row_content_debug}")
-            continue
+    return captured
 
-        company_data_row: Dict[str, str] = {}
-        for df_col_name, html_col_idx in column_map_for_df.items():
-            try:
-                company_data_row[df_col_name] = cells_td[html_col_idx].text.strip()
-            except IndexError:
-                # This should be rare if max_needed_index check is correct
-                logger.error(f"IndexError for col '{df_col_name}' (idx {html_col_idx}) in row {i+1}. Should have been caught by cell count check.")
-                company_data_row[df_col_name] = "" # Default to empty string on unexpected error
-        
-        rows_data.append(company_data_row)
 
-    if not rows_data:
-        logger.warning("No data rows were extracted from the table's tbody.")
+def _parse_with_stream(html_content: str, spec: TableSpec) -> Optional[pd.DataFrame]:
+    """
+    Parses the constituents table with an event-based scan of the page.
+    Only the selected table is materialized (headers and rows as plain tuples) and scanning
+    stops as soon as the table identified by ID closes. Selection rules match _parse_with_bs4.
+    """
+    scanner = _TableScanner(
+        table_id=spec.table_id,
+        fallback_class=spec.fallback_class,
+        header_hint=spec.header_hint,
+    )
+    logger.debug(f"Scanning HTML for table id='{spec.table_id}'")
+    try:
+        scanner.feed(html_content)
+        scanner.close()
+    except _StopScan:
+        pass # Target table closed; the rest of the page is never parsed.
+
+    captured = _select_scanned_table(scanner, spec)
+    if captured is None:
         return None
+    return _build_companies_dataframe(captured["headers"], captured["rows"], spec.column_mapping)
 
-    df = pd.DataFrame(rows_data)
-    logger.info(f"Successfully parsed {len(df)} company rows into DataFrame.")
-    return df
 
+_PARSER_BACKENDS = {
+    "stream": _parse_with_stream,
+    "bs4": _parse_with_bs4,
+}
+
+
+def parse_sp500_table(html_content: str, backend: Optional[str] = None,
+                      spec: Optional[TableSpec] = None) -> Optional[pd.DataFrame]:
+    """
+    Parses the S&P 500 companies table from the provided HTML content.
+    It first tries to locate the table by its specific ID 'constituents'.
+    If not found, it falls back to searching for tables with class 'wikitable sortable'
+    and identifies the correct one by looking for a unique header (e.g., "GICS Sector").
+
+    Args:
+        html_content: Raw HTML of the Wikipedia page.
+        backend: Parser backend ("stream" or "bs4"). Defaults to config.HTML_PARSER_BACKEND.
+                 Both backends produce the same DataFrame.
+        spec: Table locator and column mapping. Defaults to the S&P 500 constituents table
+              (see default_table_spec); other index pages pass their own (see table_spec_for_source).
+
+    Returns:
+        DataFrame with one column per mapped header, or None if parsing fails.
+    """
+    backend = backend or config.HTML_PARSER_BACKEND
+    parser_func = _PARSER_BACKENDS.get(backend)
+    if parser_func is None:
+        logger.error(f"Unknown HTML parser backend '{backend}'. Available: {list(_PARSER_BACKENDS)}")
+        return None
+    logger.debug(f"Parsing HTML with '{backend}' backend.")
+    return parser_func(html_content, spec or default_table_spec())
+
+
+class TableParseError(ValueError):
+    """
+    Raised by iter_sp500_table_batches when the table cannot be parsed. Batches yielded before
+    the error are valid rows, but the table is incomplete: consumers must not treat the keys
+    they received as the full constituents list.
+    """
+
+
+def iter_sp500_table_batches(html_content: str, batch_size: Optional[int] = None,
+                             spec: Optional[TableSpec] = None) -> Iterator[pd.DataFrame]:
+    """
+    Streaming variant of parse_sp500_table: yields the table as DataFrames of at most
+    batch_size rows while the page is scanned, instead of building the whole table first.
+    The HTML is fed to the event-based scanner in config.STREAM_FEED_CHUNK_SIZE chunks and the
+    rows of the table selected by ID are drained after every chunk, so only about one batch
+    of rows is held at a time. The column mapping is resolved from the headers seen before the
+    first row. When the ID is missing the fallback table can only be chosen once the page
+    has been scanned, so that path buffers the table and then yields it in batches.
+    Batches contain the same rows and columns as parse_sp500_table's DataFrame, in order.
+
+    Args:
+        html_content: Raw HTML of the Wikipedia page.
+        batch_size: Rows per yielded DataFrame. Defaults to config.STREAM_BATCH_SIZE.
+        spec: Table locator and column mapping. Defaults to the S&P 500 constituents table.
 
-def get_sp500_companies_data() -> Optional[pd.DataFrame]:
-    """Orchestrates the fetching and parsing of S&P 500 company data."""
+    Raises:
+        TableParseError: The table could not be found, mapped or read completely.
+    """
+    spec = spec or default_table_spec()
+    batch_size = batch_size or config.STREAM_BATCH_SIZE
+    chunk_size = config.STREAM_FEED_CHUNK_SIZE
+    scanner = _TableScanner(
+        table_id=spec.table_id,
+        fallback_class=spec.fallback_class,
+        header_hint=spec.header_hint,
+    )
+    column_map: Optional[Dict[str, int]] = None
+    pending: List[Tuple[str, ...]] = []
+    rows_scanned = 0
+    rows_yielded = 0
+    position = 0
+    finished = False
+    logger.debug(f"Streaming scan of HTML for table id='{spec.table_id}' (batches of {batch_size} rows)")
+
+    while not finished:
+        try:
+            if position < len(html_content):
+                scanner.feed(html_content[position:position + chunk_size])
+                position += chunk_size
+            else:
+                scanner.close()
+                finished = True
+        except _StopScan:
+            finished = True # Target table closed; the rest of the page is never parsed.
+
+        captured = scanner.id_capture
+        if captured is not None and captured["rows"]:
+            if column_map is None:
+                column_map = _resolve_column_map(captured["headers"], spec.column_mapping)
+                if column_map is None:
+                    raise TableParseError(f"No column of the table id='{spec.table_id}' could be mapped.")
+            pending.extend(_select_row_values(captured["rows"], list(column_map.values()), rows_scanned + 1))
+            rows_scanned += len(captured["rows"])
+            captured["rows"].clear()
+
+        while pending and (len(pending) >= batch_size or finished):
+            batch, pending = pending[:batch_size], pending[batch_size:]
+            rows_yielded += len(batch)
+            yield pd.DataFrame.from_records(batch, columns=list(column_map.keys()))
+
+    if scanner.found_by_id:
+        _select_scanned_table(scanner, spec) # Same checks and log messages as the other backends
+        if rows_yielded == 0:
+            raise TableParseError("No data rows were extracted from the table's tbody.")
+        logger.info(f"Successfully streamed {rows_yielded} company rows.")
+        return
+    if scanner.id_capture is not None:
+        raise TableParseError(f"Table id='{spec.table_id}' was never closed; the page looks truncated.")
+
+    captured = _select_scanned_table(scanner, spec)
+    if captured is None:
+        raise TableParseError("The constituents table could not be located.")
+    column_map = _resolve_column_map(captured["headers"], spec.column_mapping)
+    if column_map is None:
+        raise TableParseError("No column of the fallback table could be mapped.")
+    rows_data = _select_row_values(captured["rows"], list(column_map.values()))
+    if not rows_data:
+        raise TableParseError("No data rows were extracted from the table's tbody.")
+    for start in range(0, len(rows_data), batch_size):
+        yield pd.DataFrame.from_records(rows_data[start:start + batch_size], columns=list(column_map.keys()))
+    logger.info(f"Successfully streamed {len(rows_data)} company rows.")
+
+
+def fetch_sp500_page(profiler: Optional[PipelineProfiler] = None) -> Optional[FetchResult]:
+    """
+    Fetches the S&P 500 page through the conditional-GET cache (measured as the 'extract' stage).
+    Returns None if it failed.
+    """
+    profiler = profiler or PipelineProfiler(enabled=False)
+    with profiler.stage("extract") as metrics:
+        fetch_result = fetch_html_conditional(config.WIKIPEDIA_URL, cache_dir=config.HTTP_CACHE_DIR)
+        metrics["bytes_downloaded"] = fetch_result.bytes_downloaded
+        metrics["from_cache"] = fetch_result.from_cache
+    if not fetch_result.content:
+        logger.error("Aborting extraction: Failed to fetch HTML content.")
+        return None
+    logger.info(f"HTML content {'served from cache' if fetch_result.from_cache else 'downloaded'} "
+                f"({fetch_result.bytes_downloaded} bytes downloaded).")
+    return fetch_result
+
+
+def get_sp500_companies_data(profiler: Optional[PipelineProfiler] = None) -> Optional[pd.DataFrame]:
+    """
+    Orchestrates the fetching and parsing of S&P 500 company data.
+    The returned DataFrame reports how the page was obtained in its attrs:
+    'from_cache' (True when the server answered 304 and the cached body was reused)
+    and 'bytes_downloaded'. If a profiler is given, the fetch and the parse are
+    measured as the 'extract' and 'parse' stages.
+    """
     if not logging.getLogger().hasHandlers(): # Ensure logger is configured if module run standalone
          logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
+    profiler = profiler or PipelineProfiler(enabled=False)
          
     logger.info("--- Starting S&P 500 Data Extraction Process ---")
-    html_content = fetch_html(config.WIKIPEDIA_URL)
-    if not html_content:
-        logger.error("Aborting extraction: Failed to fetch HTML content.")
+    fetch_result = fetch_sp500_page(profiler)
+    if fetch_result is None:
         return None
+    html_content = fetch_result.content
     
-    companies_df = parse_sp500_table(html_content)
+    with profiler.stage("parse", bytes_in=len(html_content)) as metrics:
+        companies_df = parse_sp500_table(html_content)
+        metrics["rows_out"] = 0 if companies_df is None else len(companies_df)
     if companies_df is None: # Covers cases where parsing fails or yields no data
         logger.error("Aborting extraction: Parsing the S&P 500 table failed or returned no DataFrame.")
         return None
+    companies_df.attrs["from_cache"] = fetch_result.from_cache
+    companies_df.attrs["bytes_downloaded"] = fetch_result.bytes_downloaded
     
     logger.info("--- S&P 500 Data Extraction Process Finished Successfully ---")
     return companies_df
 
+
+def parse_changes_table(html_content: str) -> Optional[pd.DataFrame]:
+    """
+    Parses the "Selected changes" table (additions and removals of the index) from the page.
+    The table is located by its ID (config.CHANGES_TABLE_ID) or, failing that, as the
+    'wikitable sortable' table with a config.CHANGES_HEADER_TEXT header. Dates and reasons
+    shared by several changes use rowspan; they are repeated on every row they cover.
+    Cells are mapped by position to config.CHANGES_COLUMNS, as the two-row header repeats
+    'Ticker'/'Security' under 'Added' and 'Removed'.
+
+    Returns:
+        DataFrame with the raw cell texts in config.CHANGES_COLUMNS, or None if parsing fails.
+    """
+    scanner = _TableScanner(
+        table_id=config.CHANGES_TABLE_ID,
+        fallback_class=config.FALLBACK_TABLE_CLASS,
+        header_hint=config.CHANGES_HEADER_TEXT,
+        expand_rowspans=True,
+    )
+    spec = TableSpec(config.CHANGES_TABLE_ID, config.FALLBACK_TABLE_CLASS, config.CHANGES_HEADER_TEXT, {})
+    try:
+        scanner.feed(html_content)
+        scanner.close()
+    except _StopScan:
+        pass # Changes table closed; the rest of the page is never parsed.
+
+    captured = _select_scanned_table(scanner, spec)
+    if captured is None:
+        return None
+    rows_data = _select_row_values(captured["rows"], list(range(len(config.CHANGES_COLUMNS))))
+    if not rows_data:
+        logger.warning("No change rows were extracted from the changes table.")
+        return None
+    df = pd.DataFrame.from_records(rows_data, columns=config.CHANGES_COLUMNS)
+    logger.info(f"Successfully parsed {len(df)} index changes into DataFrame.")
+    return df
+
+
+def table_spec_for_source(source: Dict) -> TableSpec:
+    """Builds the TableSpec of a config.INDEX_SOURCES entry."""
+    return TableSpec(
+        table_id=source.get("table_id", config.CONSTITUENTS_TABLE_ID),
+        fallback_class=source.get("fallback_class", config.FALLBACK_TABLE_CLASS),
+        header_hint=source.get("header_hint", config.FALLBACK_HEADER_TEXT),
+        column_mapping=source["column_mapping"],
+    )
+
+
+def _extract_index_source(index_name: str, source: Dict) -> Optional[pd.DataFrame]:
+    """Fetches and parses one index source. Runs in a worker thread."""
+    fetch_result = fetch_html_conditional(source["url"], cache_dir=config.HTTP_CACHE_DIR)
+    if not fetch_result.content:
+        logger.error(f"[{index_name}] Failed to fetch {source['url']}. Source skipped.")
+        return None
+    df = parse_sp500_table(fetch_result.content, spec=table_spec_for_source(source))
+    if df is None:
+        logger.error(f"[{index_name}] Parsing the constituents table failed. Source skipped.")
+        return None
+    df.insert(0, "Index_Name", index_name)
+    logger.info(f"[{index_name}] {len(df)} constituents parsed "
+                f"({'served from cache' if fetch_result.from_cache else f'{fetch_result.bytes_downloaded} bytes downloaded'}).")
+    return df
+
+
+def get_index_constituents_data(sources: Optional[Dict[str, Dict]] = None,
+                                max_workers: Optional[int] = None) -> Optional[pd.DataFrame]:
+    """
+    Fetches and parses several index-constituent pages concurrently and stacks them into one
+    DataFrame with an 'Index_Name' column. Fetches run in a thread pool bounded by
+    max_workers, so the total time is close to the slowest single source.
+
+    Args:
+        sources: Mapping index name -> source entry (url, table_id, header_hint, column_mapping).
+                 Defaults to config.INDEX_SOURCES.
+        max_workers: Concurrency limit. Defaults to config.MAX_CONCURRENT_FETCHES.
+
+    Returns:
+        Combined raw DataFrame (columns missing from a source are left empty), or None if
+        no source could be extracted. Failed sources are logged and skipped.
+    """
+    if not logging.getLogger().hasHandlers(): # Ensure logger is configured if module run standalone
+         logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
+    sources = sources if sources is not None else config.INDEX_SOURCES
+    if not sources:
+        logger.error("No index sources configured.")
+        return None
+    workers = max(1, min(len(sources), max_workers or config.MAX_CONCURRENT_FETCHES))
+
+    logger.info(f"--- Extracting {len(sources)} index sources with {workers} concurrent workers ---")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="index-source") as executor:
+        futures = {name: executor.submit(_extract_index_source, name, source) for name, source in sources.items()}
+        frames = []
+        for name, future in futures.items(): # Keep registry order in the output
+            try:
+                df = future.result()
+            except Exception as e: # A failing source must not abort the others
+                logger.error(f"[{name}] Unexpected error during extraction: {e}")
+                continue
+            if df is not None:
+                frames.append(df)
+
+    if not frames:
+        logger.error("Aborting extraction: no index source could be extracted.")
+        return None
+    combined_df = pd.concat(frames, ignore_index=True)
+    logger.info(f"--- Extracted {len(combined_df)} constituents from {len(frames)}/{len(sources)} sources ---")
+    return combined_df
+
 # Removed the __main__ block for direct testing from here,
 # as it's better practice to test via a separate test script or main_pipeline.
\ No newline at end of file
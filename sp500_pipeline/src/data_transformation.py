@@ -1,12 +1,13 @@
 import pandas as pd
 import re
 import logging
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 from . import config
+from .locations import LocationLookup
 
 logger = logging.getLogger(__name__)
-# BasicConfig for logger is usually set in the main entry point (main_pipeline.py)
+# BasicConfig for logger is usually set in the main entry point (cli.py)
 
 def clean_founded_year(founded_str: Optional[str]) -> Optional[int]:
     """
@@ -44,74 +45,169 @@ def split_headquarters(location_str: Optional[str]) -> Tuple[Optional[str], Opti
         return location_str.strip(), None
     return None, None # Should not be reached if logic above is complete
 
-def transform_data(df: pd.DataFrame) -> Optional[pd.DataFrame]: # Return Optional[pd.DataFrame]
+def _text_values(series: pd.Series) -> pd.Series:
+    """
+    Returns the series with every non-string value replaced by a missing value,
+    so the column-level .str operations match the per-value isinstance(str) checks.
+    """
+    if not pd.api.types.is_object_dtype(series.dtype):
+        return series if pd.api.types.is_string_dtype(series.dtype) else pd.Series(None, index=series.index, dtype=object)
+    if pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty"): # Fast path, checked in C
+        return series
+    return series.where(series.map(type, na_action='ignore') == str)
+
+
+def _as_inferred_column(values: pd.Series, index: pd.Index) -> pd.Series:
+    """
+    Rebuilds a column from its values (missing -> None) so pandas infers the same dtype
+    it would for per-row results: strings with missing values, or float64 NaN if all are missing.
+    """
+    if values.isna().all():
+        return pd.Series(float('nan'), index=index)
+    values = values.astype(object)
+    return pd.Series(values.where(values.notna(), None).to_numpy(), index=index)
+
+
+def extract_founded_years(founded: pd.Series) -> pd.Series:
+    """
+    Vectorized clean_founded_year: extracts the first 4-digit year of every value in one pass.
+    Returns int64 when every value has a year, float64 (NaN for misses) otherwise.
+    """
+    years = _text_values(founded).str.extract(r'\b(\d{4})\b', expand=False)
+    missing = years.isna()
+    if missing.all():
+        return pd.Series([None] * len(founded), index=founded.index, dtype=object)
+    if missing.any():
+        logger.debug(f"Could not parse year from {int(missing.sum())} 'Founded' values.")
+    # Through object values: a string-dtype column would otherwise give nullable Int64
+    return pd.to_numeric(years.astype(object))
+
+
+def normalize_headquarters_columns(locations: pd.Series, location_lookup: Optional[LocationLookup] = None
+                                   ) -> Tuple[pd.Series, pd.Series, pd.Series]:
+    """
+    Resolves the headquarters locations into (city, state, country) columns against the
+    gazetteer (locations.resolve_location). Only the distinct values are resolved, through
+    location_lookup (a new in-memory lookup if None), and mapped back to the rows with their
+    factorize codes.
+    """
+    location_lookup = location_lookup if location_lookup is not None else LocationLookup()
+    codes, uniques = pd.factorize(_text_values(locations)) # Missing values get code -1
+    resolved = location_lookup.resolve_many(uniques.tolist())
+    columns = []
+    for field in range(3):
+        # One extra None at the end, picked by code -1
+        values = pd.Series([location[field] for location in resolved] + [None], dtype=object)
+        columns.append(_as_inferred_column(values.take(codes), locations.index))
+    return tuple(columns)
+
+def transform_data(df: pd.DataFrame, location_lookup: Optional[LocationLookup] = None
+                   ) -> Optional[pd.DataFrame]: # Return Optional[pd.DataFrame]
     """
     Cleans, transforms, and structures the raw S&P 500 data.
     Converts data types, extracts specific information, and selects final columns.
+    The input is not modified and no intermediate copy of it is made: derived columns are
+    collected first and the output DataFrame is assembled once. Works the same on a full
+    table or on one batch of it (streaming mode). Headquarters locations already in
+    location_lookup are not resolved again; the lookup is only read and extended in memory
+    (the caller persists it, see LocationLookup.save).
     """
     if df.empty:
         logger.warning("Input DataFrame for transformation is empty. No transformation performed.")
         return None # Return None if input is empty, as no meaningful transformation can occur.
 
     logger.info(f"Starting data transformation for {len(df)} rows.")
-    
-    transformed_df = df.copy() # Work on a copy to avoid SettingWithCopyWarning
+
+    # Output columns by name; raw columns are reused as they are, derived ones replace/extend them.
+    columns: Dict[str, pd.Series] = {col: df[col] for col in df.columns}
 
     # 1. Date Added: Clean and convert to datetime.
-    if 'Date_Added' in transformed_df.columns:
-        # Remove bracketed references (e.g., [10]) often found in Wikipedia dates
-        transformed_df['Date_Added'] = transformed_df['Date_Added'].str.replace(r'\[.*?\]', '', regex=True)
-        transformed_df['Date_Added'] = pd.to_datetime(transformed_df['Date_Added'], errors='coerce')
+    if 'Date_Added' in columns:
+        # Remove bracketed references (e.g., [10]) often found in Wikipedia dates and parse in one pass.
         # 'coerce' will turn unparseable dates into NaT (Not a Time)
+        columns['Date_Added'] = pd.to_datetime(
+            df['Date_Added'].str.replace(r'\[.*?\]', '', regex=True), errors='coerce'
+        )
     else:
         logger.warning("Column 'Date_Added' not found. It will be missing in the transformed data.")
-        # transformed_df['Date_Added'] = pd.NaT # No need to add if not selecting later
 
-    # 2. Founded Year: Extract year from 'Founded' string.
-    if 'Founded' in transformed_df.columns:
-        transformed_df['Founded_Year'] = transformed_df['Founded'].apply(clean_founded_year)
-        # apply() will pass NaN for unparseable years if clean_founded_year returns None
+    # 2. Founded Year: Extract year from 'Founded' string (vectorized equivalent of clean_founded_year).
+    if 'Founded' in columns:
+        columns['Founded_Year'] = extract_founded_years(df['Founded'])
     else:
         logger.warning("Column 'Founded' not found. 'Founded_Year' will be missing.")
 
-    # 3. Headquarters Location: Split into City and State.
-    if 'Headquarters_Location' in transformed_df.columns:
-        # Apply the split_headquarters function and expand the tuple result into two new columns
-        hq_split_series = transformed_df['Headquarters_Location'].apply(
-            lambda x: pd.Series(split_headquarters(x), index=['Headquarters_City_temp', 'Headquarters_State_temp'])
-        )
-        transformed_df['Headquarters_City'] = hq_split_series['Headquarters_City_temp']
-        transformed_df['Headquarters_State'] = hq_split_series['Headquarters_State_temp']
+    # 3. Headquarters Location: Resolve into City, State (or province/region) and Country,
+    # once per distinct location (see normalize_headquarters_columns).
+    if 'Headquarters_Location' in columns:
+        (columns['Headquarters_City'], columns['Headquarters_State'],
+         columns['Headquarters_Country']) = normalize_headquarters_columns(df['Headquarters_Location'], location_lookup)
     else:
-        logger.warning("Column 'Headquarters_Location' not found. City/State columns will be missing.")
+        logger.warning("Column 'Headquarters_Location' not found. City/State/Country columns will be missing.")
 
     # 4. CIK: Clean (remove non-digits) and convert to nullable Integer.
-    if 'CIK' in transformed_df.columns:
+    if 'CIK' in columns:
         # Remove any non-digit characters before attempting numeric conversion
-        cleaned_cik = transformed_df['CIK'].astype(str).str.replace(r'\D', '', regex=True)
+        cleaned_cik = df['CIK'].astype(str).str.replace(r'\D', '', regex=True)
         # Convert to numeric, coercing errors to <NA>. Use Int64 for nullable integers.
-        transformed_df['CIK'] = pd.to_numeric(cleaned_cik, errors='coerce').astype('Int64')
+        columns['CIK'] = pd.to_numeric(cleaned_cik, errors='coerce').astype('Int64')
     else:
         logger.warning("Column 'CIK' not found. It will be missing.")
         
     # Ensure all FINAL_COLUMNS are present, adding them with appropriate nulls if missing from source.
     # This guarantees a consistent output schema.
-    final_df = pd.DataFrame()
+    final_columns: Dict[str, pd.Series] = {}
     for col_name in config.FINAL_COLUMNS:
-        if col_name in transformed_df.columns:
-            final_df[col_name] = transformed_df[col_name]
+        if col_name in columns:
+            final_columns[col_name] = columns[col_name]
         else:
             logger.warning(f"Final column '{col_name}' not generated during transformation. Will be added as a column of nulls.")
             # Assign appropriate null type based on expected content
             if "Year" in col_name or "CIK" in col_name: # Assuming these are intended as numeric
-                final_df[col_name] = pd.Series(pd.NA, index=transformed_df.index, dtype='Int64')
+                final_columns[col_name] = pd.Series(pd.NA, index=df.index, dtype='Int64')
             elif "Date" in col_name:
-                final_df[col_name] = pd.Series(pd.NaT, index=transformed_df.index, dtype='datetime64[ns]')
+                final_columns[col_name] = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
             else: # Default to object (string) type for others
-                final_df[col_name] = pd.Series(None, index=transformed_df.index, dtype=object)
+                final_columns[col_name] = pd.Series(None, index=df.index, dtype=object)
+    final_df = pd.DataFrame(final_columns, index=df.index)
     
     logger.info(f"Data transformation completed. Output DataFrame shape: {final_df.shape}")
     logger.debug(f"Final columns in DataFrame: {final_df.columns.tolist()}")
     logger.debug(f"Sample of transformed data (first 3 rows):\n{final_df.head(3)}")
     
-    return final_df
\ No newline at end of file
+    return final_df
+
+def _strip_references(series: pd.Series) -> pd.Series:
+    """Removes bracketed references (e.g. [10]) and surrounding blanks; empty texts become missing."""
+    cleaned = series.str.replace(r'\[.*?\]', '', regex=True).str.strip()
+    return cleaned.where(cleaned != '')
+
+def transform_changes(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    Cleans the raw changes table (see data_extraction.parse_changes_table): parses the
+    effective dates, strips reference markers and turns empty cells (a change that only
+    adds or only removes a symbol) into missing values. Rows without a parseable date or
+    without any symbol cannot be placed on the timeline and are dropped.
+    """
+    if df.empty:
+        logger.warning("Input changes DataFrame is empty. No transformation performed.")
+        return None
+
+    columns: Dict[str, pd.Series] = {col: _strip_references(df[col]) for col in config.CHANGES_COLUMNS if col in df.columns}
+    missing_columns = [col for col in config.CHANGES_COLUMNS if col not in columns]
+    if missing_columns:
+        logger.error(f"Changes DataFrame lacks columns {missing_columns}. Transformation aborted.")
+        return None
+    columns['Effective_Date'] = pd.to_datetime(columns['Effective_Date'], errors='coerce')
+    changes_df = pd.DataFrame(columns, index=df.index)
+
+    usable = changes_df['Effective_Date'].notna() & (changes_df['Added_Symbol'].notna() | changes_df['Removed_Symbol'].notna())
+    if not usable.all():
+        logger.warning(f"Dropping {int((~usable).sum())} change rows without a parseable date or any symbol.")
+        changes_df = changes_df[usable].reset_index(drop=True)
+    if changes_df.empty:
+        logger.error("No usable change rows after transformation.")
+        return None
+    logger.info(f"Changes transformation completed: {len(changes_df)} changes from "
+                f"{changes_df['Effective_Date'].min():%Y-%m-%d} to {changes_df['Effective_Date'].max():%Y-%m-%d}.")
+    return changes_df
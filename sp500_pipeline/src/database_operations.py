@@ -1,18 +1,45 @@
 import sqlite3
-from typing import Optional
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import numpy as np
 import pandas as pd
 import logging
+import math
 import os
 
 from . import config
+from .sqlite_utils import (LOAD_GENERATION_KEY, apply_pragmas, get_load_generation, get_metadata,
+                           quote_identifier, table_columns)
 
 logger = logging.getLogger(__name__)
-# BasicConfig for logger is usually set in the main entry point (main_pipeline.py)
+# BasicConfig for logger is usually set in the main entry point (cli.py)
+
+# A row change is (old active row, new active row) as {column: value} dicts; None on the missing side.
+RowChange = Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+# Hook run inside the load transaction: (conn, table_name, row changes or None when the whole table was rewritten).
+ChangeHook = Callable[[sqlite3.Connection, str, Optional[List[RowChange]]], None]
+
+# Managed column types for the companies table (and its history). Columns not listed here
+# fall back to a type inferred from the DataFrame dtype.
+COLUMN_TYPES: Dict[str, str] = {
+    "Symbol": "TEXT",
+    "Security": "TEXT",
+    "GICS_Sector": "TEXT",
+    "GICS_Sub_Industry": "TEXT",
+    "Headquarters_City": "TEXT",
+    "Headquarters_State": "TEXT",
+    "Headquarters_Country": "TEXT",
+    "Date_Added": "TIMESTAMP", # Stored as 'YYYY-MM-DD HH:MM:SS' text, as to_sql did
+    "CIK": "INTEGER",
+    "Founded_Year": "INTEGER",
+}
+
 
 def create_connection(db_path: str) -> Optional[sqlite3.Connection]:
     """
     Establishes a connection to the SQLite database specified by db_path.
-    Creates the directory for the database file if it doesn't exist.
+    Creates the directory for the database file if it doesn't exist
+    and applies the performance PRAGMAs from config.SQLITE_PRAGMAS.
     """
     conn: Optional[sqlite3.Connection] = None
     try:
@@ -22,6 +49,7 @@ def create_connection(db_path: str) -> Optional[sqlite3.Connection]:
             os.makedirs(db_dir, exist_ok=True)
             
         conn = sqlite3.connect(db_path)
+        apply_pragmas(conn)
         logger.info(f"Successfully connected to SQLite database: {db_path}")
         return conn
     except sqlite3.Error as e:
@@ -32,22 +60,573 @@ def create_connection(db_path: str) -> Optional[sqlite3.Connection]:
         return None
 
 
-def save_data_to_db(df: pd.DataFrame, conn: sqlite3.Connection, table_name: str):
+def set_metadata(conn: sqlite3.Connection, key: str, value: str) -> None:
+    """
+    Writes a value of the pipeline metadata table, creating the table if needed.
+    Runs in the caller's transaction if one is open; the caller commits.
+    """
+    conn.execute(f'CREATE TABLE IF NOT EXISTS "{config.DB_METADATA_TABLE_NAME}" ("Key" TEXT PRIMARY KEY, "Value" TEXT)')
+    conn.execute(f'INSERT INTO "{config.DB_METADATA_TABLE_NAME}" ("Key", "Value") VALUES (?, ?) '
+                 f'ON CONFLICT("Key") DO UPDATE SET "Value" = excluded."Value"', (key, value))
+
+
+def load_marker_key(table_name: str) -> str:
+    """pipeline_metadata key holding the load checkpoint key of the last pipeline load of table_name."""
+    return f"{table_name}_load_key"
+
+
+def clear_load_marker(conn: sqlite3.Connection, table_name: str) -> None:
+    """
+    Forgets the last pipeline load of table_name, so the next run loads the page again even if
+    it is unchanged. Used when another writer (the backfill) changed the table. Runs in the
+    caller's transaction if one is open; the caller commits.
+    """
+    try:
+        conn.execute(f'DELETE FROM "{config.DB_METADATA_TABLE_NAME}" WHERE "Key" = ?', (load_marker_key(table_name),))
+    except sqlite3.OperationalError: # Table not created yet: nothing recorded
+        pass
+
+
+def bump_load_generation(conn: sqlite3.Connection) -> int:
+    """Increments the load generation inside the caller's transaction and returns the new value."""
+    generation = get_load_generation(conn) + 1
+    set_metadata(conn, LOAD_GENERATION_KEY, str(generation))
+    return generation
+
+
+def with_generation_bump(on_changes: Optional[ChangeHook] = None) -> ChangeHook:
+    """
+    Wraps a load hook so the load generation is bumped in the same transaction as the data.
+    Readers that cache results by generation (see server.py) then never keep a result of
+    data that was replaced, and loads that change nothing keep their caches warm.
+    """
+    def hook(conn: sqlite3.Connection, table_name: str, row_changes: Optional[List[RowChange]]) -> None:
+        if on_changes is not None:
+            on_changes(conn, table_name, row_changes)
+        bump_load_generation(conn)
+    return hook
+
+
+def _to_db_value(value: Any) -> Any:
+    """
+    Converts a pandas/numpy cell value to the Python value stored by SQLite,
+    matching what DataFrame.to_sql writes (timestamps as 'YYYY-MM-DD HH:MM:SS' text).
+    """
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return int(value) if value.is_integer() else value
+    if isinstance(value, np.bool_):
+        return bool(value)
+    return value
+
+
+def _column_db_values(series: pd.Series) -> List[Any]:
+    """Converts a whole column to SQLite-ready Python values (missing values -> None)."""
+    missing = series.isna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        values = series.dt.strftime('%Y-%m-%d %H:%M:%S').to_numpy(dtype=object, copy=True)
+    elif pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_integer_dtype(series.dtype):
+        values = series.astype(object).to_numpy(dtype=object, copy=True)
+    elif pd.api.types.is_float_dtype(series.dtype):
+        present = series[~missing]
+        if (present == present.round()).all(): # Integral floats (e.g. years with NaN) -> int
+            values = series.astype('Int64').astype(object).to_numpy(dtype=object, copy=True)
+        else:
+            values = series.astype(object).to_numpy(dtype=object, copy=True)
+    elif pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty"):
+        values = series.to_numpy(dtype=object, copy=True)
+    else:
+        return [_to_db_value(v) for v in series]
+    values[missing] = None
+    return values.tolist()
+
+
+def _dataframe_records(df: pd.DataFrame) -> List[Tuple[Any, ...]]:
+    """Returns the DataFrame rows as tuples of SQLite-ready values (converted column by column)."""
+    return list(zip(*(_column_db_values(df[col]) for col in df.columns)))
+
+
+def _sqlite_type(dtype) -> str:
+    """Maps a pandas dtype to the SQLite column type used when creating tables."""
+    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "TIMESTAMP"
+    return "TEXT"
+
+
+def _column_definitions(df: pd.DataFrame) -> List[str]:
+    """Returns 'name TYPE' definitions for the DataFrame columns using the managed COLUMN_TYPES."""
+    return [f"{quote_identifier(col)} {COLUMN_TYPES.get(col) or _sqlite_type(df[col].dtype)}" for col in df.columns]
+
+
+def _primary_key_columns(conn: sqlite3.Connection, table_name: str) -> List[str]:
+    """Returns the primary key columns of a table, in key order."""
+    info = conn.execute(f"PRAGMA table_info({quote_identifier(table_name)})").fetchall()
+    return [row[1] for row in sorted((r for r in info if r[5]), key=lambda r: r[5])]
+
+
+def _create_secondary_indexes(conn: sqlite3.Connection, table_name: str, columns: List[str]) -> None:
+    """Creates the config.DB_INDEXED_COLUMNS indexes that apply to the given columns."""
+    for col in config.DB_INDEXED_COLUMNS:
+        if col in columns:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {quote_identifier(f'idx_{table_name}_{col}')} "
+                         f"ON {quote_identifier(table_name)} ({quote_identifier(col)})")
+
+
+def _drop_secondary_indexes(conn: sqlite3.Connection, table_name: str) -> None:
+    """Drops the config.DB_INDEXED_COLUMNS indexes (used around large bulk loads)."""
+    for col in config.DB_INDEXED_COLUMNS:
+        conn.execute(f"DROP INDEX IF EXISTS {quote_identifier(f'idx_{table_name}_{col}')}")
+
+
+def ensure_companies_schema(conn: sqlite3.Connection, df: pd.DataFrame, table_name: str,
+                            key_column: Union[str, Sequence[str]] = config.DB_KEY_COLUMN) -> None:
+    """
+    Creates or upgrades the managed companies table: typed columns, PRIMARY KEY on key_column
+    (a column name or a list of columns for a composite key), an Is_Active soft-delete flag
+    and secondary indexes on config.DB_INDEXED_COLUMNS.
+    Tables created by pandas' to_sql (no primary key) are rebuilt once, keeping their rows.
+    Must be called inside the caller's transaction.
+    """
+    key_columns = [key_column] if isinstance(key_column, str) else list(key_column)
+    key_sql = ", ".join(quote_identifier(col) for col in key_columns)
+    existing_columns = table_columns(conn, table_name)
+    columns = list(df.columns)
+    for col in existing_columns:
+        if col not in columns and col != "Is_Active":
+            columns.append(col) # Keep columns that only exist in the stored table
+    definitions = [
+        f"{quote_identifier(col)} {COLUMN_TYPES.get(col) or (_sqlite_type(df[col].dtype) if col in df.columns else 'TEXT')}"
+        for col in columns
+    ]
+    create_sql = (f"CREATE TABLE {quote_identifier(table_name)} ({', '.join(definitions)}, "
+                  f'"Is_Active" INTEGER NOT NULL DEFAULT 1, PRIMARY KEY ({key_sql}))')
+
+    if not existing_columns:
+        conn.execute(create_sql)
+        logger.info(f"Created managed table '{table_name}' (PRIMARY KEY {key_columns}).")
+    elif _primary_key_columns(conn, table_name) != key_columns:
+        logger.info(f"Migrating table '{table_name}' to the managed schema (PRIMARY KEY {key_columns}).")
+        legacy_table = f"{table_name}__legacy"
+        conn.execute(f"ALTER TABLE {quote_identifier(table_name)} RENAME TO {quote_identifier(legacy_table)}")
+        conn.execute(create_sql)
+        copy_columns = ", ".join(quote_identifier(col) for col in existing_columns)
+        # INSERT OR REPLACE keeps the last row for duplicated keys
+        conn.execute(f"INSERT OR REPLACE INTO {quote_identifier(table_name)} ({copy_columns}) "
+                     f"SELECT {copy_columns} FROM {quote_identifier(legacy_table)} "
+                     f"WHERE {' AND '.join(f'{quote_identifier(col)} IS NOT NULL' for col in key_columns)}")
+        conn.execute(f"DROP TABLE {quote_identifier(legacy_table)}")
+    else:
+        for col in df.columns:
+            if col not in existing_columns:
+                conn.execute(f"ALTER TABLE {quote_identifier(table_name)} ADD COLUMN "
+                             f"{quote_identifier(col)} {COLUMN_TYPES.get(col) or _sqlite_type(df[col].dtype)}")
+                logger.info(f"Added missing column '{col}' to table '{table_name}'.")
+        if "Is_Active" not in existing_columns:
+            conn.execute(f'ALTER TABLE {quote_identifier(table_name)} ADD COLUMN "Is_Active" INTEGER NOT NULL DEFAULT 1')
+            logger.info(f"Added 'Is_Active' soft-delete flag to table '{table_name}'.")
+
+    _create_secondary_indexes(conn, table_name, columns)
+
+
+def _ensure_history_table(conn: sqlite3.Connection, df: pd.DataFrame, table_name: str,
+                          history_table: str, key_column: str, load_date: str) -> None:
+    """
+    Creates the history table if needed (indexed on key + Valid_To for closing open versions)
+    and adds any missing columns. A newly created history table is seeded with the active rows.
+    """
+    history_columns = table_columns(conn, history_table)
+    if not history_columns:
+        conn.execute(f"CREATE TABLE {quote_identifier(history_table)} ({', '.join(_column_definitions(df))}, "
+                     f'"Change_Type" TEXT NOT NULL, "Valid_From" TEXT NOT NULL, "Valid_To" TEXT)')
+        cols_sql = ", ".join(quote_identifier(col) for col in df.columns)
+        seeded = conn.execute(
+            f"INSERT INTO {quote_identifier(history_table)} ({cols_sql}, \"Change_Type\", \"Valid_From\") "
+            f"SELECT {cols_sql}, 'initial', ? FROM {quote_identifier(table_name)} WHERE \"Is_Active\" = 1",
+            (load_date,),
+        ).rowcount
+        logger.info(f"Created history table '{history_table}' (seeded with {seeded} active rows).")
+    else:
+        for col in df.columns:
+            if col not in history_columns:
+                conn.execute(f"ALTER TABLE {quote_identifier(history_table)} ADD COLUMN "
+                             f"{quote_identifier(col)} {COLUMN_TYPES.get(col) or _sqlite_type(df[col].dtype)}")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {quote_identifier(f'idx_{history_table}_open_version')} "
+                 f'ON {quote_identifier(history_table)} ({quote_identifier(key_column)}, "Valid_To")')
+
+
+def _diff_rows(existing: Dict[Any, Tuple[Tuple[Any, ...], int]], incoming: Dict[Any, Tuple[Any, ...]]) -> Dict[str, list]:
+    """
+    Compares incoming rows with stored rows, both keyed by the business key.
+    existing maps key -> (row values, Is_Active); incoming maps key -> row values.
+    Returns the keys/rows to insert, update (changed or re-activated) and soft-delete.
+    """
+    changes: Dict[str, list] = {"insert": [], "update": [], "reactivate": [], "delete": [], "unchanged": []}
+    for key, row in incoming.items():
+        stored = existing.get(key)
+        if stored is None:
+            changes["insert"].append(row)
+        elif not stored[1]:
+            changes["reactivate"].append(row)
+        elif stored[0] != row:
+            changes["update"].append(row)
+        else:
+            changes["unchanged"].append(key)
+    for key, (row, is_active) in existing.items():
+        if is_active and key not in incoming:
+            changes["delete"].append(key)
+    return changes
+
+
+def _write_changes(conn: sqlite3.Connection, table_name: str, history_table: str, columns: List[str],
+                   key_column: str, existing: Dict[Any, Tuple[Tuple[Any, ...], int]],
+                   changes: Dict[str, list], load_date: str, on_changes: Optional[ChangeHook]) -> None:
+    """
+    Applies a _diff_rows result inside the caller's transaction: inserts and updates with
+    executemany, soft-deletes, history versions and the on_changes hook (if anything changed).
+    existing must hold the stored rows of every updated and deleted key.
+    """
+    key_idx = columns.index(key_column)
+    cols_sql = ", ".join(quote_identifier(col) for col in columns)
+    placeholders = ", ".join("?" for _ in columns)
+    non_key_columns = [col for col in columns if col != key_column]
+    set_sql = ", ".join(f"{quote_identifier(col)} = ?" for col in non_key_columns)
+    table_sql, history_sql, key_sql = quote_identifier(table_name), quote_identifier(history_table), quote_identifier(key_column)
+
+    def update_params(rows):
+        return [tuple(row[i] for i, col in enumerate(columns) if col != key_column) + (row[key_idx],) for row in rows]
+
+    conn.executemany(f"INSERT INTO {table_sql} ({cols_sql}) VALUES ({placeholders})", changes["insert"])
+    conn.executemany(
+        f'UPDATE {table_sql} SET {set_sql}, "Is_Active" = 1 WHERE {key_sql} = ?',
+        update_params(changes["update"] + changes["reactivate"]),
+    )
+    conn.executemany(f'UPDATE {table_sql} SET "Is_Active" = 0 WHERE {key_sql} = ?',
+                     [(key,) for key in changes["delete"]])
+
+    # History: close the open version of every changed key, then append the new versions.
+    closed_keys = [row[key_idx] for row in changes["update"]] + changes["delete"]
+    conn.executemany(f'UPDATE {history_sql} SET "Valid_To" = ? WHERE {key_sql} = ? AND "Valid_To" IS NULL',
+                     [(load_date, key) for key in closed_keys])
+    conn.executemany(
+        f'INSERT INTO {history_sql} ({cols_sql}, "Change_Type", "Valid_From") VALUES ({placeholders}, ?, ?)',
+        [row + ("insert", load_date) for row in changes["insert"]]
+        + [row + ("update", load_date) for row in changes["update"]]
+        + [row + ("reactivate", load_date) for row in changes["reactivate"]],
+    )
+
+    if on_changes is not None:
+        row_changes: List[RowChange] = (
+            [(None, dict(zip(columns, row))) for row in changes["insert"] + changes["reactivate"]]
+            + [(dict(zip(columns, existing[row[key_idx]][0])), dict(zip(columns, row))) for row in changes["update"]]
+            + [(dict(zip(columns, existing[key][0])), None) for key in changes["delete"]]
+        )
+        if row_changes:
+            on_changes(conn, table_name, row_changes)
+
+
+def upsert_companies(df: pd.DataFrame, conn: sqlite3.Connection, table_name: str,
+                     history_table: str = config.DB_HISTORY_TABLE_NAME,
+                     key_column: str = config.DB_KEY_COLUMN,
+                     load_date: Optional[str] = None,
+                     on_changes: Optional[ChangeHook] = None) -> Optional[Dict[str, int]]:
+    """
+    Incrementally loads the DataFrame into table_name, keyed on key_column.
+    Only new, changed and removed rows are written: inserts and updates use executemany,
+    removed rows are soft-deleted (Is_Active = 0). Every change closes the open version in
+    history_table (Valid_To) and appends the new version (Valid_From). All statements run
+    in a single transaction, so readers never observe a partially loaded table.
+
+    Args:
+        df: Transformed DataFrame (config.FINAL_COLUMNS).
+        conn: Open SQLite connection.
+        table_name: Target table.
+        history_table: Table receiving one row per version of each key.
+        key_column: Business key column.
+        load_date: ISO date used for Valid_From/Valid_To. Defaults to today.
+        on_changes: Optional hook called in the same transaction with the row changes
+                    (e.g. to maintain derived tables). Not called when nothing changed.
+
+    Returns:
+        Dict with the number of inserted, updated, reactivated, deleted and unchanged rows,
+        or None if the load failed (the transaction is rolled back).
+    """
+    if key_column not in df.columns:
+        logger.error(f"Key column '{key_column}' not found in DataFrame. Incremental load aborted.")
+        return None
+
+    load_date = load_date or date.today().isoformat()
+    columns = list(df.columns)
+    key_idx = columns.index(key_column)
+
+    incoming: Dict[Any, Tuple[Any, ...]] = {}
+    for record in _dataframe_records(df):
+        incoming[record[key_idx]] = record # Last occurrence wins on duplicate keys
+    if len(incoming) < len(df):
+        logger.warning(f"{len(df) - len(incoming)} duplicate '{key_column}' values in input; keeping the last occurrence.")
+
+    cols_sql = ", ".join(quote_identifier(col) for col in columns)
+
+    try:
+        with conn: # Single transaction: commit on success, rollback on any error
+            if not conn.in_transaction:
+                conn.execute("BEGIN") # Also covers the DDL below, which sqlite3 would otherwise autocommit
+            ensure_companies_schema(conn, df, table_name, key_column)
+            _ensure_history_table(conn, df, table_name, history_table, key_column, load_date)
+
+            existing = {
+                row[key_idx]: (tuple(row[:-1]), row[-1])
+                for row in conn.execute(f'SELECT {cols_sql}, "Is_Active" FROM {quote_identifier(table_name)}')
+            }
+            changes = _diff_rows(existing, incoming)
+            _write_changes(conn, table_name, history_table, columns, key_column, existing, changes, load_date, on_changes)
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(f"Incremental load into table '{table_name}' failed and was rolled back: {e}")
+        return None
+
+    summary = {
+        "inserted": len(changes["insert"]), "updated": len(changes["update"]),
+        "reactivated": len(changes["reactivate"]), "deleted": len(changes["delete"]),
+        "unchanged": len(changes["unchanged"]),
+    }
+    logger.info(f"Incremental load into '{table_name}' committed: {summary}")
+    return summary
+
+
+def upsert_companies_batches(batches: Iterable[Optional[pd.DataFrame]], conn: sqlite3.Connection, table_name: str,
+                             history_table: str = config.DB_HISTORY_TABLE_NAME,
+                             key_column: str = config.DB_KEY_COLUMN,
+                             load_date: Optional[str] = None,
+                             on_changes: Optional[ChangeHook] = None) -> Optional[Dict[str, int]]:
+    """
+    Streaming variant of upsert_companies: consumes transformed batches one at a time and
+    commits each batch in its own transaction, so only one batch is held in memory and the
+    load overlaps with the production of the next batch (parsing/transforming).
+    Every batch is diffed against the stored rows of its own keys only and written like
+    upsert_companies (history versions, on_changes hook with the batch's row changes).
+    The keys seen so far are tracked in a TEMP table; once the iterator is exhausted, the
+    active rows that were not seen are soft-deleted in a final transaction.
+
+    Unlike upsert_companies, readers can observe the table between batch commits. If the
+    iterator or a batch fails, the batches already committed stay (they are valid upserts)
+    and the final soft-delete is skipped, so no row is deleted because of an incomplete run.
+
+    Args:
+        batches: Transformed DataFrames with the same columns (None/empty batches are skipped).
+        conn: Open SQLite connection.
+        table_name, history_table, key_column, load_date, on_changes: As in upsert_companies.
+
+    Returns:
+        Dict with the summed counts of upsert_companies plus the number of committed 'batches',
+        or None if the load failed or no batch was received.
+    """
+    load_date = load_date or date.today().isoformat()
+    summary = {"inserted": 0, "updated": 0, "reactivated": 0, "deleted": 0, "unchanged": 0, "batches": 0}
+    seen_sql = quote_identifier(f"stream_keys_{table_name}")
+    table_sql, key_sql = quote_identifier(table_name), quote_identifier(key_column)
+    columns: Optional[List[str]] = None
+
+    try:
+        conn.execute(f'CREATE TEMP TABLE IF NOT EXISTS {seen_sql} ("Key" PRIMARY KEY, "Batch" INTEGER NOT NULL)')
+        conn.execute(f"DELETE FROM {seen_sql}")
+        conn.commit()
+
+        for df in batches:
+            if df is None or df.empty:
+                continue
+            if columns is None:
+                if key_column not in df.columns:
+                    logger.error(f"Key column '{key_column}' not found in DataFrame. Streaming load aborted.")
+                    return None
+                columns = list(df.columns)
+                key_idx = columns.index(key_column)
+                select_sql = ", ".join(f"t.{quote_identifier(col)}" for col in columns)
+            elif list(df.columns) != columns:
+                raise ValueError(f"Batch columns {list(df.columns)} differ from the first batch's {columns}.")
+            batch_number = summary["batches"] + 1
+
+            incoming: Dict[Any, Tuple[Any, ...]] = {}
+            for record in _dataframe_records(df):
+                incoming[record[key_idx]] = record # Last occurrence wins on duplicate keys
+            if len(incoming) < len(df):
+                logger.warning(f"{len(df) - len(incoming)} duplicate '{key_column}' values in batch {batch_number}; keeping the last occurrence.")
+
+            with conn:
+                if not conn.in_transaction:
+                    conn.execute("BEGIN")
+                if batch_number == 1:
+                    ensure_companies_schema(conn, df, table_name, key_column)
+                    _ensure_history_table(conn, df, table_name, history_table, key_column, load_date)
+                conn.executemany(f'INSERT OR REPLACE INTO {seen_sql} ("Key", "Batch") VALUES (?, ?)',
+                                 [(key, batch_number) for key in incoming])
+                existing = {
+                    row[key_idx]: (tuple(row[:-1]), row[-1])
+                    for row in conn.execute(
+                        f'SELECT {select_sql}, t."Is_Active" FROM {table_sql} AS t '
+                        f'JOIN {seen_sql} AS s ON t.{key_sql} = s."Key" WHERE s."Batch" = ?', (batch_number,))
+                }
+                changes = _diff_rows(existing, incoming) # Only this batch's keys: no deletes here
+                _write_changes(conn, table_name, history_table, columns, key_column, existing, changes, load_date, on_changes)
+
+            summary["batches"] = batch_number
+            summary["inserted"] += len(changes["insert"])
+            summary["updated"] += len(changes["update"])
+            summary["reactivated"] += len(changes["reactivate"])
+            summary["unchanged"] += len(changes["unchanged"])
+            logger.debug(f"Batch {batch_number} ({len(incoming)} rows) committed to '{table_name}'.")
+
+        if columns is None:
+            logger.warning(f"No batch received. Nothing loaded into table '{table_name}'.")
+            return None
+
+        with conn: # Rows absent from every batch left the source: soft-delete them
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            cols_sql = ", ".join(quote_identifier(col) for col in columns)
+            existing = {
+                row[key_idx]: (tuple(row[:-1]), row[-1])
+                for row in conn.execute(
+                    f'SELECT {cols_sql}, "Is_Active" FROM {table_sql} '
+                    f'WHERE "Is_Active" = 1 AND {key_sql} NOT IN (SELECT "Key" FROM {seen_sql})')
+            }
+            changes = {"insert": [], "update": [], "reactivate": [], "delete": list(existing), "unchanged": []}
+            _write_changes(conn, table_name, history_table, columns, key_column, existing, changes, load_date, on_changes)
+        summary["deleted"] = len(changes["delete"])
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(f"Streaming load into table '{table_name}' stopped after {summary['batches']} committed batches "
+                     f"(current batch rolled back, no row soft-deleted): {e}")
+        return None
+    finally:
+        try:
+            conn.execute(f"DROP TABLE IF EXISTS temp.{seen_sql}")
+        except sqlite3.Error as e:
+            logger.debug(f"Could not drop temporary table {seen_sql}: {e}")
+
+    logger.info(f"Streaming load into '{table_name}' committed: {summary}")
+    return summary
+
+def bulk_load_companies(df: pd.DataFrame, conn: sqlite3.Connection, table_name: str,
+                        key_column: Union[str, Sequence[str]] = config.DB_KEY_COLUMN,
+                        on_changes: Optional[ChangeHook] = None) -> Optional[int]:
+    """
+    Replaces the content of the managed table with the DataFrame using a prepared
+    executemany INSERT inside one transaction (instead of pandas' generic to_sql writer).
+    The table is never dropped, so readers keep seeing the previous rows until the commit.
+    Loads larger than config.DB_BULK_REINDEX_THRESHOLD rebuild the secondary indexes once at the end.
+    on_changes, if given, is called in the same transaction with row changes = None (full rewrite).
+
+    Returns:
+        Number of rows written, or None if the load failed (the transaction is rolled back).
+    """
+    columns = list(df.columns)
+    insert_sql = (f"INSERT OR REPLACE INTO {quote_identifier(table_name)} ({', '.join(quote_identifier(col) for col in columns)}) "
+                  f"VALUES ({', '.join('?' for _ in columns)})")
+    try:
+        with conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            ensure_companies_schema(conn, df, table_name, key_column)
+            reindex = len(df) > config.DB_BULK_REINDEX_THRESHOLD
+            if reindex:
+                _drop_secondary_indexes(conn, table_name)
+            conn.execute(f"DELETE FROM {quote_identifier(table_name)}")
+            conn.executemany(insert_sql, _dataframe_records(df))
+            if reindex:
+                _create_secondary_indexes(conn, table_name, table_columns(conn, table_name))
+            if on_changes is not None:
+                on_changes(conn, table_name, None)
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(f"Bulk load into table '{table_name}' failed and was rolled back: {e}")
+        return None
+    logger.info(f"Bulk-loaded {len(df)} rows into table '{table_name}'.")
+    return len(df)
+
+
+def save_data_to_db(df: pd.DataFrame, conn: sqlite3.Connection, table_name: str, mode: Optional[str] = None,
+                    on_changes: Optional[ChangeHook] = None) -> Optional[int]:
     """
     Saves the provided DataFrame to a specified table in the SQLite database.
-    If the table already exists, it will be replaced.
+    With mode 'incremental' (default, see config.DB_LOAD_MODE) only changed rows are written
+    and changes are recorded in the history table; with mode 'replace' the table content is
+    replaced through the bulk-insert path. Both keep the managed schema and its indexes.
+    on_changes is forwarded to the loader and runs inside the load transaction.
+
+    Returns:
+        Number of rows written (inserted, updated or soft-deleted), or None if nothing could be saved.
     """
     if df.empty:
         logger.warning(f"DataFrame is empty. No data saved to table '{table_name}'.")
-        return
+        return None
 
+    mode = mode or config.DB_LOAD_MODE
+    if mode == "incremental":
+        summary = upsert_companies(df, conn, table_name, on_changes=on_changes)
+        return None if summary is None else sum(v for k, v in summary.items() if k != "unchanged")
+    if mode == "replace":
+        return bulk_load_companies(df, conn, table_name, on_changes=on_changes)
+    logger.error(f"Unknown load mode '{mode}'. Expected 'incremental' or 'replace'. No data saved.")
+    return None
+
+
+def save_batches_to_db(batches: Iterable[Optional[pd.DataFrame]], conn: sqlite3.Connection, table_name: str,
+                       on_changes: Optional[ChangeHook] = None) -> Optional[int]:
+    """
+    Saves transformed batches as they arrive (streaming mode), committing each batch.
+    Always loads incrementally (see upsert_companies_batches): a 'replace' load spread over
+    several commits would expose a partially rewritten table.
+
+    Returns:
+        Number of rows written (inserted, updated or soft-deleted), or None if nothing could be saved.
+    """
+    summary = upsert_companies_batches(batches, conn, table_name, on_changes=on_changes)
+    return None if summary is None else sum(v for k, v in summary.items() if k not in ("unchanged", "batches"))
+
+
+def save_constituent_changes(df: pd.DataFrame, conn: sqlite3.Connection,
+                             table_name: str = config.CHANGES_TABLE_NAME,
+                             on_changes: Optional[ChangeHook] = None) -> Optional[int]:
+    """
+    Replaces the content of the index changes table (config.CHANGES_COLUMNS, indexed on
+    Effective_Date) with the DataFrame in one transaction. The page always lists the full
+    history, so a rewrite is simpler than diffing and the table stays small.
+    on_changes, if given, runs in the same transaction with row changes = None
+    (e.g. membership.rebuild_index_membership).
+
+    Returns:
+        Number of change rows written, or None if the load failed (the transaction is rolled back).
+    """
+    if df.empty:
+        logger.warning(f"DataFrame is empty. No data saved to table '{table_name}'.")
+        return None
+    columns = list(df.columns)
     try:
-        # Using 'replace' ensures the table is overwritten if it exists,
-        # making the operation idempotent for a given DataFrame.
-        # 'index=False' prevents pandas DataFrame index from being written to the table.
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
-        logger.info(f"Successfully saved {len(df)} rows to table '{table_name}' in the database.")
-    except (pd.io.sql.DatabaseError, sqlite3.Error, Exception) as e: # Broader exception catch for to_sql
-        logger.error(f"Error saving DataFrame to table '{table_name}': {e}")
-
-# The optional comment about CREATE TABLE is fine as it explains a design choice.
\ No newline at end of file
+        with conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {quote_identifier(table_name)} ({', '.join(_column_definitions(df))})")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {quote_identifier(f'idx_{table_name}_Effective_Date')} "
+                         f'ON {quote_identifier(table_name)} ("Effective_Date")')
+            conn.execute(f"DELETE FROM {quote_identifier(table_name)}")
+            conn.executemany(
+                f"INSERT INTO {quote_identifier(table_name)} ({', '.join(quote_identifier(col) for col in columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                _dataframe_records(df),
+            )
+            if on_changes is not None:
+                on_changes(conn, table_name, None)
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(f"Loading index changes into table '{table_name}' failed and was rolled back: {e}")
+        return None
+    logger.info(f"Saved {len(df)} index changes into table '{table_name}'.")
+    return len(df)
@@ -0,0 +1,92 @@
+# Offline gazetteer used to normalize headquarters locations (see locations.py).
+# Full names are matched case-insensitively after removing dots and extra blanks ("new  york"
+# is "New York"). Abbreviations (postal codes, "D.C.", "USA"...) only match in upper case,
+# dots and blanks aside: "D.C." and "DC" are the same key, "dc" matches nothing. Editing this
+# file changes the gazetteer version: the persistent location lookup and the transform
+# checkpoints are rebuilt on the next run.
+
+UNITED_STATES = "United States"
+CANADA = "Canada"
+
+# US states, the federal district and the inhabited territories: name -> USPS code
+US_STATES = {
+    "Alabama": "AL", "Alaska": "AK", "Arizona": "AZ", "Arkansas": "AR", "California": "CA",
+    "Colorado": "CO", "Connecticut": "CT", "Delaware": "DE", "Florida": "FL", "Georgia": "GA",
+    "Hawaii": "HI", "Idaho": "ID", "Illinois": "IL", "Indiana": "IN", "Iowa": "IA",
+    "Kansas": "KS", "Kentucky": "KY", "Louisiana": "LA", "Maine": "ME", "Maryland": "MD",
+    "Massachusetts": "MA", "Michigan": "MI", "Minnesota": "MN", "Mississippi": "MS", "Missouri": "MO",
+    "Montana": "MT", "Nebraska": "NE", "Nevada": "NV", "New Hampshire": "NH", "New Jersey": "NJ",
+    "New Mexico": "NM", "New York": "NY", "North Carolina": "NC", "North Dakota": "ND", "Ohio": "OH",
+    "Oklahoma": "OK", "Oregon": "OR", "Pennsylvania": "PA", "Rhode Island": "RI", "South Carolina": "SC",
+    "South Dakota": "SD", "Tennessee": "TN", "Texas": "TX", "Utah": "UT", "Vermont": "VT",
+    "Virginia": "VA", "Washington": "WA", "West Virginia": "WV", "Wisconsin": "WI", "Wyoming": "WY",
+    "District of Columbia": "DC",
+    "Puerto Rico": "PR", "Guam": "GU", "U.S. Virgin Islands": "VI", "American Samoa": "AS",
+    "Northern Mariana Islands": "MP",
+}
+
+# Other spellings of US states (the USPS codes are added by locations.py)
+US_STATE_ALIASES = {
+    "Washington DC": "District of Columbia", "Washington D.C.": "District of Columbia",
+    "D.C.": "District of Columbia",
+    "US Virgin Islands": "U.S. Virgin Islands", "United States Virgin Islands": "U.S. Virgin Islands",
+}
+
+# Canadian provinces and territories: name -> postal code
+CANADIAN_PROVINCES = {
+    "Alberta": "AB", "British Columbia": "BC", "Manitoba": "MB", "New Brunswick": "NB",
+    "Newfoundland and Labrador": "NL", "Nova Scotia": "NS", "Ontario": "ON", "Prince Edward Island": "PE",
+    "Quebec": "QC", "Saskatchewan": "SK", "Northwest Territories": "NT", "Nunavut": "NU", "Yukon": "YT",
+}
+
+CANADIAN_PROVINCE_ALIASES = {"Québec": "Quebec", "Newfoundland": "Newfoundland and Labrador"}
+
+# Countries and territories (ISO 3166-1 short names, as commonly written in English)
+COUNTRIES = [
+    "Afghanistan", "Albania", "Algeria", "Andorra", "Angola", "Anguilla", "Antigua and Barbuda",
+    "Argentina", "Armenia", "Aruba", "Australia", "Austria", "Azerbaijan", "Bahamas", "Bahrain",
+    "Bangladesh", "Barbados", "Belarus", "Belgium", "Belize", "Benin", "Bermuda", "Bhutan", "Bolivia",
+    "Bosnia and Herzegovina", "Botswana", "Brazil", "British Virgin Islands", "Brunei", "Bulgaria",
+    "Burkina Faso", "Burundi", "Cambodia", "Cameroon", CANADA, "Cape Verde", "Cayman Islands",
+    "Central African Republic", "Chad", "Chile", "China", "Colombia", "Comoros", "Costa Rica",
+    "Croatia", "Cuba", "Curaçao", "Cyprus", "Czech Republic", "Democratic Republic of the Congo",
+    "Denmark", "Djibouti", "Dominica", "Dominican Republic", "Ecuador", "Egypt", "El Salvador",
+    "Equatorial Guinea", "Eritrea", "Estonia", "Eswatini", "Ethiopia", "Faroe Islands", "Fiji",
+    "Finland", "France", "French Polynesia", "Gabon", "Gambia", "Georgia", "Germany", "Ghana",
+    "Gibraltar", "Greece", "Greenland", "Grenada", "Guatemala", "Guernsey", "Guinea", "Guinea-Bissau",
+    "Guyana", "Haiti", "Honduras", "Hong Kong", "Hungary", "Iceland", "India", "Indonesia", "Iran",
+    "Iraq", "Ireland", "Isle of Man", "Israel", "Italy", "Ivory Coast", "Jamaica", "Japan", "Jersey",
+    "Jordan", "Kazakhstan", "Kenya", "Kiribati", "Kosovo", "Kuwait", "Kyrgyzstan", "Laos", "Latvia",
+    "Lebanon", "Lesotho", "Liberia", "Libya", "Liechtenstein", "Lithuania", "Luxembourg", "Macau",
+    "Madagascar", "Malawi", "Malaysia", "Maldives", "Mali", "Malta", "Marshall Islands", "Mauritania",
+    "Mauritius", "Mexico", "Micronesia", "Moldova", "Monaco", "Mongolia", "Montenegro", "Morocco",
+    "Mozambique", "Myanmar", "Namibia", "Nauru", "Nepal", "Netherlands", "New Caledonia", "New Zealand",
+    "Nicaragua", "Niger", "Nigeria", "North Korea", "North Macedonia", "Norway", "Oman", "Pakistan",
+    "Palau", "Palestine", "Panama", "Papua New Guinea", "Paraguay", "Peru", "Philippines", "Poland",
+    "Portugal", "Qatar", "Republic of the Congo", "Romania", "Russia", "Rwanda", "Saint Kitts and Nevis",
+    "Saint Lucia", "Saint Vincent and the Grenadines", "Samoa", "San Marino", "São Tomé and Príncipe",
+    "Saudi Arabia", "Senegal", "Serbia", "Seychelles", "Sierra Leone", "Singapore", "Sint Maarten",
+    "Slovakia", "Slovenia", "Solomon Islands", "Somalia", "South Africa", "South Korea", "South Sudan",
+    "Spain", "Sri Lanka", "Sudan", "Suriname", "Sweden", "Switzerland", "Syria", "Taiwan", "Tajikistan",
+    "Tanzania", "Thailand", "Timor-Leste", "Togo", "Tonga", "Trinidad and Tobago", "Tunisia", "Turkey",
+    "Turkmenistan", "Turks and Caicos Islands", "Tuvalu", "Uganda", "Ukraine", "United Arab Emirates",
+    "United Kingdom", UNITED_STATES, "Uruguay", "Uzbekistan", "Vanuatu", "Vatican City", "Venezuela",
+    "Vietnam", "Yemen", "Zambia", "Zimbabwe",
+]
+
+# Other names of countries -> name in COUNTRIES
+COUNTRY_ALIASES = {
+    "US": UNITED_STATES, "U.S.": UNITED_STATES, "USA": UNITED_STATES, "U.S.A.": UNITED_STATES,
+    "United States of America": UNITED_STATES,
+    "UK": "United Kingdom", "U.K.": "United Kingdom", "Great Britain": "United Kingdom", "Britain": "United Kingdom",
+    "England": "United Kingdom", "Scotland": "United Kingdom", "Wales": "United Kingdom",
+    "Northern Ireland": "United Kingdom",
+    "Republic of Ireland": "Ireland", "Éire": "Ireland",
+    "The Netherlands": "Netherlands", "Holland": "Netherlands",
+    "The Bahamas": "Bahamas", "Korea": "South Korea", "Republic of Korea": "South Korea",
+    "People's Republic of China": "China", "PRC": "China", "Czechia": "Czech Republic",
+    "Côte d'Ivoire": "Ivory Coast", "Cote d'Ivoire": "Ivory Coast", "Swaziland": "Eswatini",
+    "Burma": "Myanmar", "East Timor": "Timor-Leste", "Macao": "Macau", "Curacao": "Curaçao",
+    "Türkiye": "Turkey", "Russian Federation": "Russia", "UAE": "United Arab Emirates",
+    "Virgin Islands (British)": "British Virgin Islands", "BVI": "British Virgin Islands",
+}
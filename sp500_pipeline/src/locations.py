@@ -0,0 +1,215 @@
+import logging
+import os
+import re
+import sqlite3
+import sys
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from . import config, gazetteer
+from .checkpoints import content_hash, module_fingerprint
+
+logger = logging.getLogger(__name__)
+# BasicConfig for logger is usually set in the main entry point (cli.py)
+
+# Headquarters normalization: every distinct 'Headquarters Location' text is resolved once
+# against the bundled gazetteer (gazetteer.py) into city, state/province and country. The
+# pipeline keeps the results in a persistent lookup table (LocationLookup.open / save), so a
+# run only resolves texts it has never seen.
+
+_REFERENCE_PATTERN = re.compile(r"\[.*?\]") # Wikipedia footnote markers, e.g. [3]
+
+
+class Location(NamedTuple):
+    city: Optional[str]
+    state: Optional[str] # State, province or region
+    country: Optional[str]
+
+
+# (abbreviations, full names) -> canonical name
+Index = Tuple[Dict[str, str], Dict[str, str]]
+
+
+def _compact(text: str) -> str:
+    """Abbreviation key: no dots nor blanks, case kept ('D.C.' -> 'DC', 'U. S.' -> 'US')."""
+    return "".join(text.replace(".", "").split())
+
+
+def _key(name: str) -> str:
+    """Full-name key: no dots, single blanks, case-folded ('New  york' == 'New York')."""
+    return " ".join(name.replace(".", " ").split()).casefold()
+
+
+def _index(entries: Iterable[Tuple[str, str]]) -> Index:
+    """
+    Indexes (text, canonical name) entries. Abbreviations (USPS/postal codes, 'D.C.', 'USA')
+    only match in upper case, so words such as 'in', 'or', 'me' or 'de' are not taken for
+    states; full names match regardless of case.
+    """
+    abbreviations, names = {}, {}
+    for text, name in entries:
+        if _compact(text).isupper():
+            abbreviations[_compact(text)] = name
+        else:
+            names[_key(text)] = name
+    return abbreviations, names
+
+
+def _match(index: Index, part: str) -> Optional[str]:
+    abbreviations, names = index
+    return abbreviations.get(_compact(part)) or names.get(_key(part))
+
+
+def _subdivision_index(names: Dict[str, str], aliases: Dict[str, str]) -> Index:
+    """Index of the names, their codes and their aliases."""
+    return _index([(name, name) for name in names] + [(code, name) for name, code in names.items()]
+                  + list(aliases.items()))
+
+
+_US_STATES = _subdivision_index(gazetteer.US_STATES, gazetteer.US_STATE_ALIASES)
+_CANADIAN_PROVINCES = _subdivision_index(gazetteer.CANADIAN_PROVINCES, gazetteer.CANADIAN_PROVINCE_ALIASES)
+_COUNTRIES = _index([(name, name) for name in gazetteer.COUNTRIES] + list(gazetteer.COUNTRY_ALIASES.items()))
+_SUBDIVISIONS = {gazetteer.UNITED_STATES: _US_STATES, gazetteer.CANADA: _CANADIAN_PROVINCES}
+
+
+def gazetteer_version() -> str:
+    """Version of the resolution: changes whenever the gazetteer or the rules below change."""
+    return content_hash(module_fingerprint(gazetteer) + module_fingerprint(sys.modules[__name__]))
+
+
+def _subdivision(part: str) -> Optional[Location]:
+    """A US state or Canadian province (with its country), or None."""
+    for country, subdivisions in _SUBDIVISIONS.items():
+        name = _match(subdivisions, part)
+        if name is not None:
+            return Location(None, name, country)
+    return None
+
+
+def resolve_location(text: Optional[str]) -> Location:
+    """
+    Resolves a headquarters text ('City, State', 'City, Country', 'City, Region, Country',
+    'Country'...) against the gazetteer:
+      - a trailing US state/Canadian province (name, upper-case postal code or alias) gives the state and
+        the country ('Washington, D.C.' -> Washington / District of Columbia / United States);
+      - a trailing country gives the country; the part before it is the state or region
+        when there are at least two parts left ('Toronto, Ontario, Canada'), or when it is a
+        subdivision of that country;
+      - the first remaining part is the city.
+    A US state wins over a country of the same name when no country follows ('Atlanta, Georgia').
+    A bare subdivision name stays the city, as in the previous split, since it can also be a
+    city ('New York', 'Washington'); only its country is filled in.
+    Texts whose last part is not in the gazetteer keep the previous split (city before the
+    first comma, state after it) and get no country.
+    """
+    if not isinstance(text, str):
+        return Location(None, None, None)
+    parts = [part.strip() for part in _REFERENCE_PATTERN.sub("", text).split(",")]
+    parts = [part for part in parts if part]
+    if not parts:
+        return Location(None, None, None)
+
+    subdivision = _subdivision(parts[-1])
+    if subdivision is not None:
+        if len(parts) == 1: # 'New York' alone: the city or the state, keep it as the city
+            return Location(parts[0], None, subdivision.country)
+        return Location(parts[0], subdivision.state, subdivision.country)
+
+    country = _match(_COUNTRIES, parts[-1])
+    if country is None:
+        return Location(parts[0], parts[1] if len(parts) > 1 else None, None)
+    rest = parts[:-1]
+    state = None
+    if rest:
+        known = _match(_SUBDIVISIONS[country], rest[-1]) if country in _SUBDIVISIONS else None
+        if known is not None or len(rest) > 1:
+            state = known or rest[-1]
+            rest = rest[:-1]
+    return Location(rest[0] if rest else None, state, country)
+
+
+class LocationLookup:
+    """
+    Resolved locations by raw text, in memory. transform_data only calls resolve_many, which
+    never touches the disk; the caller (run_pipeline, backfill_revisions) reads the persistent
+    lookup table once with open() and writes the newly resolved texts once with save().
+    Entries of another gazetteer version are dropped when the table is read, so they are
+    resolved again.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path # SQLite lookup table; None keeps the lookup in memory only
+        self.version = gazetteer_version()
+        self._resolved: Dict[str, Location] = {}
+        self._new: Dict[str, Location] = {} # Resolved since the last open() / save()
+
+    @classmethod
+    def open(cls, path: Optional[str]) -> "LocationLookup":
+        """Lookup of path (e.g. config.LOCATION_LOOKUP_PATH) with the texts already resolved there."""
+        lookup = cls(path)
+        lookup._load()
+        return lookup
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{config.LOCATION_LOOKUP_TABLE_NAME}" ('
+                     f'"Location" TEXT PRIMARY KEY, "City" TEXT, "State" TEXT, "Country" TEXT, '
+                     f'"Gazetteer_Version" TEXT NOT NULL)')
+        return conn
+
+    def _load(self) -> None:
+        if self.path is None:
+            return
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    stale = conn.execute(f'DELETE FROM "{config.LOCATION_LOOKUP_TABLE_NAME}" '
+                                         f'WHERE "Gazetteer_Version" != ?', (self.version,)).rowcount
+                rows = conn.execute(f'SELECT "Location", "City", "State", "Country" '
+                                    f'FROM "{config.LOCATION_LOOKUP_TABLE_NAME}"').fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read the location lookup '{self.path}': {e}. Resolving every location.")
+            return
+        self._resolved.update((text, Location(city, state, country)) for text, city, state, country in rows)
+        logger.debug(f"Loaded {len(rows)} resolved locations from '{self.path}'"
+                     f"{f' ({stale} of an older gazetteer dropped)' if stale else ''}.")
+
+    def save(self) -> None:
+        """Writes the texts resolved since open() to the lookup table, in one transaction."""
+        if self.path is None or not self._new:
+            return
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(
+                        f'INSERT OR REPLACE INTO "{config.LOCATION_LOOKUP_TABLE_NAME}" '
+                        f'("Location", "City", "State", "Country", "Gazetteer_Version") VALUES (?, ?, ?, ?, ?)',
+                        [(text, *location, self.version) for text, location in self._new.items()],
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error as e: # The lookup is only a cache: the next run resolves them again
+            logger.warning(f"Could not store {len(self._new)} resolved locations in '{self.path}': {e}")
+            return
+        logger.debug(f"Stored {len(self._new)} resolved locations in '{self.path}'.")
+        self._new.clear()
+
+    def resolve_many(self, texts: Iterable[str]) -> List[Location]:
+        """Resolves distinct location texts; only texts not seen before are parsed."""
+        texts = list(texts)
+        new = {text: resolve_location(text) for text in texts if text not in self._resolved}
+        if new:
+            self._resolved.update(new)
+            self._new.update(new)
+            unresolved = [text for text, location in new.items() if location.country is None]
+            logger.info(f"Resolved {len(new)} new headquarters locations ({len(texts) - len(new)} from the lookup).")
+            if unresolved:
+                logger.warning(f"{len(unresolved)} headquarters locations not found in the gazetteer "
+                               f"(kept as 'City, State'): {unresolved[:10]}")
+        return [self._resolved[text] for text in texts]
@@ -1,63 +1,393 @@
+import json
 import logging
+import sqlite3
+import sys
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional
 
-from . import config
-from .data_extraction import get_sp500_companies_data
-from .data_transformation import transform_data
-from .database_operations import create_connection, save_data_to_db
+import pandas as pd
+
+from . import aggregates, config, data_extraction, data_transformation, database_operations, locations, membership
+from .checkpoints import CheckpointStore, content_hash, module_fingerprint, stage_key
+from .data_extraction import (fetch_sp500_page, get_index_constituents_data, iter_sp500_table_batches,
+                              parse_changes_table, parse_sp500_table)
+from .data_transformation import transform_changes, transform_data
+from .database_operations import (bulk_load_companies, create_connection, get_metadata, load_marker_key,
+                                  save_batches_to_db, save_constituent_changes, save_data_to_db, set_metadata,
+                                  with_generation_bump)
+from .aggregates import refresh_aggregates
+from .locations import LocationLookup
+from .membership import rebuild_index_membership
+from .profiling import PipelineProfiler
+from .snapshots import SnapshotArchive
 
-# Configure root logger for the entire application.
-# This ensures all loggers created via logging.getLogger(__name__) inherit this config.
-logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT, force=True)
 logger = logging.getLogger(__name__) # Get logger for this specific module
+# The root logger is configured by the entry point (cli.py), not at import time, so importing
+# this module (or running a read-only CLI command) has no side effects.
+
+def _companies_stage_keys(page_hash: str, load_mode: str) -> Dict[str, str]:
+    """
+    Checkpoint keys of the companies stages. Each key chains the key of the previous stage
+    with the configuration and the source of the module that produce the stage output, so
+    a change in the page, the config or the code invalidates that stage and every later one.
+    """
+    parse_key = stage_key("parse", page_hash, config.TABLE_COLUMN_MAPPING_KEYS, config.CONSTITUENTS_TABLE_ID,
+                          config.FALLBACK_TABLE_CLASS, config.FALLBACK_HEADER_TEXT,
+                          module_fingerprint(data_extraction))
+    transform_key = stage_key("transform", parse_key, config.FINAL_COLUMNS, module_fingerprint(data_transformation),
+                              locations.gazetteer_version())
+    load_key = stage_key("load", transform_key, config.DB_TABLE_NAME, config.DB_KEY_COLUMN,
+                         config.DB_HISTORY_TABLE_NAME, load_mode,
+                         module_fingerprint(database_operations), module_fingerprint(aggregates))
+    return {"parse": parse_key, "transform": transform_key, "load": load_key}
+
+
+def _changes_stage_keys(page_hash: str) -> Dict[str, str]:
+    """Checkpoint keys of the index changes stages (see _companies_stage_keys)."""
+    parse_key = stage_key("parse_changes", page_hash, config.CHANGES_TABLE_ID, config.CHANGES_HEADER_TEXT,
+                          config.CHANGES_COLUMNS, config.FALLBACK_TABLE_CLASS, module_fingerprint(data_extraction))
+    transform_key = stage_key("transform_changes", parse_key, module_fingerprint(data_transformation))
+    load_key = stage_key("load_changes", transform_key, config.CHANGES_TABLE_NAME, config.MEMBERSHIP_TABLE_NAME,
+                         config.DB_TABLE_NAME, module_fingerprint(database_operations), module_fingerprint(membership))
+    return {"parse": parse_key, "transform": transform_key, "load": load_key}
+
+
+def _is_loaded(conn: sqlite3.Connection, table_name: str, load_key: str) -> bool:
+    """True if the last successful load of table_name had this load key (the table already holds its output)."""
+    return get_metadata(conn, load_marker_key(table_name)) == load_key
 
-def run_pipeline():
+
+def _mark_loaded(conn: sqlite3.Connection, table_name: str, load_key: str) -> None:
+    """Records the load key of a successful load. A failure only costs a reload on the next run."""
+    try:
+        set_metadata(conn, load_marker_key(table_name), load_key)
+        conn.commit()
+    except sqlite3.Error as e:
+        logger.warning(f"Could not record the load checkpoint of '{table_name}': {e}")
+
+
+def _checkpointed_stage(profiler: PipelineProfiler, store: Optional[CheckpointStore], name: str, key: str,
+                        compute: Callable[[], Optional[pd.DataFrame]], **counters: Any) -> Optional[pd.DataFrame]:
+    """
+    Runs a stage through the checkpoint store: returns the stored output for key if there is
+    one, otherwise computes it and stores it (None results are not stored). The stage metrics
+    record whether the output came from a checkpoint.
+    """
+    with profiler.stage(name, **counters) as metrics:
+        result = store.get(key) if store is not None else None
+        metrics["from_checkpoint"] = result is not None
+        if result is None:
+            result = compute()
+            if result is not None and store is not None:
+                store.put(key, result)
+        metrics["rows_out"] = 0 if result is None else len(result)
+    if metrics["from_checkpoint"]:
+        logger.info(f"Stage '{name}' output reused from checkpoint {key}.")
+    return result
+
+
+def _transformed_companies(profiler: PipelineProfiler, html_content: str, keys: Dict[str, str],
+                           store: Optional[CheckpointStore], location_lookup: LocationLookup) -> Optional[pd.DataFrame]:
+    """Parse + transform of the companies table, reusing checkpointed outputs. Returns None on failure."""
+    transformed_df = store.get(keys["transform"]) if store is not None else None
+    if transformed_df is not None:
+        logger.info(f"Parse and transform outputs reused from checkpoint {keys['transform']}.")
+        with profiler.stage("transform", from_checkpoint=True, rows_out=len(transformed_df)):
+            pass
+        return transformed_df
+
+    raw_df = _checkpointed_stage(profiler, store, "parse", keys["parse"],
+                                 lambda: parse_sp500_table(html_content), bytes_in=len(html_content))
+    if raw_df is None or raw_df.empty:
+        logger.error("Parsing the S&P 500 table failed or returned no data. Pipeline aborted.")
+        return None
+    return _checkpointed_stage(profiler, store, "transform", keys["transform"],
+                               lambda: transform_data(raw_df, location_lookup), rows_in=len(raw_df))
+
+
+def _archive_snapshot(profiler: PipelineProfiler, archive: SnapshotArchive, transformed_df: pd.DataFrame,
+                      key: str) -> None:
+    """Archives today's transformed table and compacts complete months. Failures are only logged."""
+    with profiler.stage("snapshot", rows_in=len(transformed_df)) as metrics:
+        metrics["written"] = archive.write(transformed_df, key=key) is not None
+        metrics["compacted_files"] = archive.compact()
+    if not metrics["written"]:
+        logger.warning("Today's snapshot was not archived.")
+
+
+def _run_stages(profiler: PipelineProfiler, html_content: str, page_hash: str,
+                store: Optional[CheckpointStore], location_lookup: LocationLookup) -> bool:
+    """
+    Runs parse, transform and load of a fetched page and archives the result as today's snapshot.
+    Returns True if the data was loaded.
+    """
+    keys = _companies_stage_keys(page_hash, config.DB_LOAD_MODE)
+    archive = SnapshotArchive.from_config()
+    conn = create_connection(config.DB_PATH)
+    if not conn:
+        logger.error("Failed to establish database connection. Data not loaded.")
+        return False
+    try:
+        loaded = _is_loaded(conn, config.DB_TABLE_NAME, keys["load"])
+        # An unchanged table needs no new snapshot: reads as of today return the latest one
+        archived = archive is None or archive.latest_key() == keys["transform"]
+        if loaded and archived:
+            logger.info("Page, configuration and code unchanged since the last load. Skipping parse, transform and load.")
+            with profiler.stage("load", skipped=True):
+                pass
+            return True
+
+        # --- 2. Transformation Phase (parse included; both may come from checkpoints) ---
+        logger.info(">>> Step 2: Parsing and transforming data...")
+        transformed_df = _transformed_companies(profiler, html_content, keys, store, location_lookup)
+        if transformed_df is None: # transform_data now returns None on empty input or major failure
+            logger.error("Transformation process failed or resulted in no data. Pipeline aborted.")
+            return False
+        if transformed_df.empty: # Should be caught by 'is None' but as a safeguard
+            logger.warning("Transformation returned an empty DataFrame. Pipeline aborted.")
+            return False
+        logger.info(f"Transformation successful. {len(transformed_df)} records processed.")
+
+        # --- 3. Load Phase ---
+        if loaded:
+            logger.info(">>> Step 3: Load skipped (checkpoint hit): the table already holds this data; "
+                        "only archiving the snapshot.")
+        else:
+            logger.info(">>> Step 3: Loading data to SQLite database...")
+            with profiler.stage("load", rows_in=len(transformed_df)) as metrics:
+                # Summary tables for the dashboard and the load generation (read API cache) are
+                # maintained in the same transaction as the load
+                rows_written = save_data_to_db(transformed_df, conn, config.DB_TABLE_NAME,
+                                               on_changes=with_generation_bump(refresh_aggregates))
+                metrics["rows_out"] = rows_written or 0
+            if rows_written is None:
+                logger.error("Loading data into the database failed.")
+                return False
+            _mark_loaded(conn, config.DB_TABLE_NAME, keys["load"])
+            logger.info(f"Data successfully loaded ({rows_written} rows written). Database is at: {config.DB_PATH}")
+    finally: # Ensure connection is closed even if save_data_to_db fails
+        conn.close()
+        logger.debug("Database connection closed.")
+
+    if archive is not None and not archived:
+        _archive_snapshot(profiler, archive, transformed_df, keys["transform"])
+    return True
+
+
+def _run_streaming_stages(profiler: PipelineProfiler, html_content: str, page_hash: str,
+                          location_lookup: LocationLookup, batch_size: Optional[int] = None) -> bool:
+    """
+    Streaming variant of _run_stages: row batches flow parser -> transform -> loader and each
+    batch is committed before the next one is parsed. Batches are not checkpointed nor archived
+    as a snapshot (either would hold the whole table again); only the load marker is checked,
+    so an unchanged page is skipped. Returns True if the data was loaded.
+    """
+    batch_size = batch_size or config.STREAM_BATCH_SIZE
+    keys = _companies_stage_keys(page_hash, "incremental")
+    conn = create_connection(config.DB_PATH)
+    if not conn:
+        logger.error("Failed to establish database connection. Data not loaded.")
+        return False
+    try:
+        if _is_loaded(conn, config.DB_TABLE_NAME, keys["load"]):
+            logger.info("Page, configuration and code unchanged since the last load. Skipping the streaming load.")
+            with profiler.stage("stream", skipped=True):
+                pass
+            return True
+
+        logger.info(f">>> Steps 2-3: Parsing, transforming and loading batches of {batch_size} rows to SQLite database...")
+        # Parse, transform and load interleave per batch, so they are measured as one stage
+        with profiler.stage("stream", batch_size=batch_size, bytes_in=len(html_content), rows_in=0) as metrics:
+            def transformed_batches() -> Iterator[Optional[pd.DataFrame]]:
+                for raw_batch in iter_sp500_table_batches(html_content, batch_size):
+                    metrics["rows_in"] += len(raw_batch)
+                    yield transform_data(raw_batch, location_lookup) # Locations resolved once across batches
+
+            rows_written = save_batches_to_db(transformed_batches(), conn, config.DB_TABLE_NAME,
+                                              on_changes=with_generation_bump(refresh_aggregates))
+            metrics["rows_out"] = rows_written or 0
+        if rows_written is None:
+            logger.error("Streaming load failed; see the errors above.")
+            return False
+        _mark_loaded(conn, config.DB_TABLE_NAME, keys["load"])
+    finally:
+        conn.close()
+        logger.debug("Database connection closed.")
+    logger.info(f"Data successfully loaded ({metrics['rows_in']} rows streamed, {rows_written} rows written). "
+                f"Database is at: {config.DB_PATH}")
+    return True
+
+
+def _load_constituent_changes(profiler: PipelineProfiler, html_content: str, page_hash: str,
+                              store: Optional[CheckpointStore]) -> bool:
+    """
+    Parses the changes table of the page, saves it and rebuilds the point-in-time membership
+    intervals (index_membership) in the same transaction. Returns True if both were saved
+    (or were already up to date).
+    """
+    logger.info(">>> Step 4: Loading index changes and point-in-time membership...")
+    keys = _changes_stage_keys(page_hash)
+    conn = create_connection(config.DB_PATH)
+    if not conn:
+        logger.error("Failed to establish database connection. Index changes not loaded.")
+        return False
+    try:
+        if _is_loaded(conn, config.CHANGES_TABLE_NAME, keys["load"]):
+            logger.info("Index changes unchanged since the last load. Skipping.")
+            with profiler.stage("load_changes", skipped=True):
+                pass
+            return True
+        raw_changes_df = _checkpointed_stage(profiler, store, "parse_changes", keys["parse"],
+                                             lambda: parse_changes_table(html_content), bytes_in=len(html_content))
+        if raw_changes_df is None:
+            logger.error("Parsing the index changes table failed. Membership not updated.")
+            return False
+        changes_df = _checkpointed_stage(profiler, store, "transform_changes", keys["transform"],
+                                         lambda: transform_changes(raw_changes_df), rows_in=len(raw_changes_df))
+        if changes_df is None:
+            logger.error("Transformation of the index changes failed. Membership not updated.")
+            return False
+
+        with profiler.stage("load_changes", rows_in=len(changes_df)) as metrics:
+            rows_written = save_constituent_changes(changes_df, conn, config.CHANGES_TABLE_NAME,
+                                                    on_changes=with_generation_bump(rebuild_index_membership))
+            metrics["rows_out"] = rows_written or 0
+        if rows_written is None:
+            return False
+        _mark_loaded(conn, config.CHANGES_TABLE_NAME, keys["load"])
+    finally:
+        conn.close()
+    return True
+
+
+def _record_run(started_at: str, status: str, mode: str) -> None:
+    """Stores the outcome of the run in the metadata table (shown by `python -m src status`)."""
+    conn = create_connection(config.DB_PATH)
+    if not conn:
+        return
+    try:
+        set_metadata(conn, "last_run", json.dumps({
+            "started_at": started_at,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "status": status,
+            "mode": mode,
+        }))
+        conn.commit()
+    except sqlite3.Error as e:
+        logger.warning(f"Could not record the outcome of the run: {e}")
+    finally:
+        conn.close()
+
+
+def run_pipeline(profile: bool = False, cprofile: bool = False,
+                 stream: bool = False, batch_size: Optional[int] = None) -> bool:
     """
     Executes the full S&P 500 data pipeline:
     1. Extracts data from Wikipedia.
     2. Transforms the raw data into a clean, structured format.
-    3. Loads the transformed data into a local SQLite database.
+    3. Loads the transformed data into a local SQLite database and
+       refreshes the dashboard summary tables (agg_*). The transformed table is also
+       archived as today's snapshot (config.SNAPSHOT_DIR; not in streaming mode).
+    4. Loads the index changes table and rebuilds the point-in-time membership intervals.
+       A failure in this step is logged but does not fail the run (the companies are loaded).
+
+    Stage outputs are checkpointed by content hash (see src/checkpoints.py): when the page,
+    the relevant configuration and the stage code are unchanged, parse and transform outputs
+    are read from config.CHECKPOINT_DIR, and a load already applied to the database (marker
+    in config.DB_METADATA_TABLE_NAME) is skipped entirely.
+
+    Args:
+        profile: Record per-stage wall/CPU time, peak memory and row/byte counters
+                 and append them to config.METRICS_PATH (JSON Lines).
+        cprofile: With profile, also dump a cProfile of the slowest stage to config.PROFILE_DIR.
+        stream: Stream row batches from the parser through the transform to the loader,
+                committing each batch (memory bounded by the batch size; always incremental).
+        batch_size: Rows per batch in streaming mode. Defaults to config.STREAM_BATCH_SIZE.
+
+    Returns:
+        True if the pipeline finished and the data was loaded, False otherwise.
     """
+    if not logging.getLogger().hasHandlers(): # Ensure logger is configured if called outside the CLI
+        logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
     logger.info("========== Starting S&P 500 Data Pipeline ==========")
+    started_at = datetime.now().isoformat(timespec="seconds")
+    profiler = PipelineProfiler(enabled=profile, cprofile=cprofile)
+    succeeded = False
+    try:
+        # --- 1. Extraction Phase (the page is fetched once and shared by every step) ---
+        logger.info(">>> Step 1: Extracting data from Wikipedia...")
+        fetch_result = fetch_sp500_page(profiler)
+        if fetch_result is None:
+            logger.error("Extraction process failed. Pipeline aborted.")
+        else:
+            html_content = fetch_result.content
+            page_hash = content_hash(html_content)
+            store = CheckpointStore.from_config()
+            # Resolved headquarters locations: read once here, shared by every transform of the
+            # run and written back once (transform_data itself never touches the disk)
+            location_lookup = LocationLookup.open(config.LOCATION_LOOKUP_PATH)
+            if stream:
+                succeeded = _run_streaming_stages(profiler, html_content, page_hash, location_lookup, batch_size)
+            else:
+                succeeded = _run_stages(profiler, html_content, page_hash, store, location_lookup)
+            location_lookup.save()
+            if succeeded and not _load_constituent_changes(profiler, html_content, page_hash, store):
+                logger.warning("Index changes / membership were not updated in this run.")
+    finally:
+        profiler.write("success" if succeeded else "failed")
+        _record_run(started_at, "success" if succeeded else "failed", "stream" if stream else "full")
 
-    # --- 1. Extraction Phase ---
-    logger.info(">>> Step 1: Extracting data from Wikipedia...")
-    raw_df = get_sp500_companies_data()
-    
-    if raw_df is None:
-        logger.error("Extraction process failed or returned no DataFrame. Pipeline aborted.")
-        return
-    if raw_df.empty:
-        logger.warning("Extraction returned an empty DataFrame. Pipeline aborted as no data to process.")
-        return
-    logger.info(f"Extraction successful. {len(raw_df)} raw records fetched.")
+    if succeeded:
+        logger.info("========== S&P 500 Data Pipeline Finished Successfully ==========")
+    else:
+        logger.error("========== S&P 500 Data Pipeline Finished With Errors ==========")
+    return succeeded
 
-    # --- 2. Transformation Phase ---
-    logger.info(">>> Step 2: Transforming data...")
-    transformed_df = transform_data(raw_df)
+def run_index_pipeline(sources: Optional[Dict[str, Dict]] = None) -> bool:
+    """
+    Executes the multi-index pipeline: fetches and parses every source of config.INDEX_SOURCES
+    concurrently, transforms the combined table and replaces the content of
+    config.MULTI_INDEX_TABLE_NAME (one row per Index_Name + Symbol).
 
-    if transformed_df is None: # transform_data now returns None on empty input or major failure
-        logger.error("Transformation process failed or resulted in no data. Pipeline aborted.")
-        return
-    if transformed_df.empty: # Should be caught by 'is None' but as a safeguard
-        logger.warning("Transformation returned an empty DataFrame. Pipeline aborted.")
-        return
-    logger.info(f"Transformation successful. {len(transformed_df)} records processed.")
+    Args:
+        sources: Optional source registry overriding config.INDEX_SOURCES (e.g. local fixtures).
+
+    Returns:
+        True if the data was loaded, False otherwise.
+    """
+    if not logging.getLogger().hasHandlers(): # Ensure logger is configured if called outside the CLI
+        logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
+    logger.info("========== Starting Multi-Index Constituents Pipeline ==========")
+    raw_df = get_index_constituents_data(sources)
+    if raw_df is None or raw_df.empty:
+        logger.error("Multi-index extraction returned no data. Pipeline aborted.")
+        return False
+
+    location_lookup = LocationLookup.open(config.LOCATION_LOOKUP_PATH)
+    transformed_df = transform_data(raw_df.drop(columns="Index_Name"), location_lookup)
+    location_lookup.save()
+    if transformed_df is None or transformed_df.empty:
+        logger.error("Transformation of the multi-index data failed. Pipeline aborted.")
+        return False
+    transformed_df.insert(0, "Index_Name", raw_df["Index_Name"].to_numpy())
 
-    # --- 3. Load Phase ---
-    logger.info(">>> Step 3: Loading data to SQLite database...")
     conn = create_connection(config.DB_PATH)
-    if conn:
-        try:
-            save_data_to_db(transformed_df, conn, config.DB_TABLE_NAME)
-            logger.info(f"Data successfully loaded. Database is at: {config.DB_PATH}")
-        finally: # Ensure connection is closed even if save_data_to_db fails
-            conn.close()
-            logger.debug("Database connection closed.")
-    else:
+    if not conn:
         logger.error("Failed to establish database connection. Data not loaded.")
-
-    logger.info("========== S&P 500 Data Pipeline Finished Successfully ==========")
+        return False
+    try:
+        rows_written = bulk_load_companies(transformed_df, conn, config.MULTI_INDEX_TABLE_NAME,
+                                           key_column=["Index_Name", config.DB_KEY_COLUMN])
+    finally:
+        conn.close()
+    if rows_written is None:
+        logger.error("Loading the multi-index data failed.")
+        return False
+    logger.info(f"========== Multi-Index Pipeline Finished: {rows_written} rows in "
+                f"'{config.MULTI_INDEX_TABLE_NAME}' ==========")
+    return True
 
 if __name__ == "__main__":
-    # This allows the pipeline to be run directly using: python -m src.main_pipeline
-    run_pipeline()
\ No newline at end of file
+    # Kept for compatibility: python -m src.main_pipeline [options] is `python -m src run [options]`
+    from .cli import main
+    sys.exit(main(["run", *sys.argv[1:]]))
@@ -0,0 +1,123 @@
+import sqlite3
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from . import config
+from .sqlite_utils import as_iso_date, quote_identifier, table_columns
+
+logger = logging.getLogger(__name__)
+# BasicConfig for logger is usually set in the main entry point (cli.py)
+
+# Membership interval: (Symbol, Start_Date, End_Date) as 'YYYY-MM-DD' texts.
+# A symbol is a member on D if Start_Date <= D < End_Date (additions count from their
+# effective date, removals from theirs).
+Interval = Tuple[str, str, str]
+
+
+def build_membership_intervals(current_members: Iterable[str],
+                               changes: Iterable[Tuple[str, Optional[str], Optional[str]]]) -> List[Interval]:
+    """
+    Derives membership intervals by replaying the changes backwards from the current members.
+    Every current member starts with an interval open until config.MEMBERSHIP_END_SENTINEL.
+    Walking back in time, an addition on D sets the start of the symbol's open interval to D,
+    and a removal on D opens an interval ending on D. Intervals still open after the oldest
+    change start at config.MEMBERSHIP_START_SENTINEL.
+
+    Args:
+        current_members: Symbols in the index today.
+        changes: (effective date 'YYYY-MM-DD', added symbol or None, removed symbol or None),
+                 newest first.
+
+    Returns:
+        List of (Symbol, Start_Date, End_Date) intervals. Changes that contradict the replay
+        (adding a symbol that is not a member afterwards, removing one that is) are skipped.
+    """
+    open_until: Dict[str, str] = {symbol: config.MEMBERSHIP_END_SENTINEL for symbol in current_members}
+    intervals: List[Interval] = []
+    skipped = 0
+    for day, added, removed in changes:
+        if added is not None:
+            end = open_until.pop(added, None)
+            if end is None:
+                skipped += 1
+            elif day < end: # Added and removed on the same day: never a member
+                intervals.append((added, day, end))
+        if removed is not None:
+            if removed in open_until:
+                skipped += 1
+            else:
+                open_until[removed] = day
+    intervals.extend((symbol, config.MEMBERSHIP_START_SENTINEL, end) for symbol, end in open_until.items())
+    if skipped:
+        logger.warning(f"Skipped {skipped} changes inconsistent with the current member list while building membership intervals.")
+    return intervals
+
+
+def rebuild_index_membership(conn: sqlite3.Connection, changes_table: str = config.CHANGES_TABLE_NAME,
+                             row_changes: Optional[List[Any]] = None) -> None:
+    """
+    Rewrites config.MEMBERSHIP_TABLE_NAME from the changes table and the active rows of the
+    companies table (config.DB_TABLE_NAME). Meant to run inside the load transaction, as the
+    on_changes hook of database_operations.save_constituent_changes (row_changes is ignored:
+    the intervals are always rebuilt, which takes a single pass over the changes).
+    A covering index on (End_Date, Start_Date, Symbol) turns a point-in-time lookup into an
+    index range scan that never touches the table (see get_members_as_of).
+    """
+    companies_columns = table_columns(conn, config.DB_TABLE_NAME)
+    if "Symbol" in companies_columns:
+        active_filter = ' WHERE "Is_Active" = 1' if "Is_Active" in companies_columns else ""
+        current_members = [row[0] for row in conn.execute(
+            f'SELECT "Symbol" FROM {quote_identifier(config.DB_TABLE_NAME)}{active_filter}')]
+    else:
+        logger.warning(f"Table '{config.DB_TABLE_NAME}' not found; membership derived from the changes alone.")
+        current_members = []
+
+    changes = conn.execute(
+        f'SELECT substr("Effective_Date", 1, 10), "Added_Symbol", "Removed_Symbol" '
+        f'FROM {quote_identifier(changes_table)} ORDER BY "Effective_Date" DESC'
+    ).fetchall()
+    intervals = build_membership_intervals(current_members, changes)
+
+    table_sql = quote_identifier(config.MEMBERSHIP_TABLE_NAME)
+    conn.execute(f'CREATE TABLE IF NOT EXISTS {table_sql} ("Symbol" TEXT NOT NULL, "Start_Date" TEXT NOT NULL, '
+                 f'"End_Date" TEXT NOT NULL, PRIMARY KEY ("Symbol", "Start_Date"))')
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {quote_identifier(f'idx_{config.MEMBERSHIP_TABLE_NAME}_dates')} "
+                 f'ON {table_sql} ("End_Date", "Start_Date", "Symbol")')
+    conn.execute(f"DELETE FROM {table_sql}")
+    conn.executemany(f'INSERT OR REPLACE INTO {table_sql} ("Symbol", "Start_Date", "End_Date") VALUES (?, ?, ?)',
+                     intervals)
+    logger.info(f"Rebuilt '{config.MEMBERSHIP_TABLE_NAME}': {len(intervals)} intervals from "
+                f"{len(changes)} changes and {len(current_members)} current members.")
+
+
+def get_members_as_of(conn: sqlite3.Connection, as_of: Union[str, date, datetime]) -> Optional[List[str]]:
+    """
+    Returns the symbols that were in the index on the given date, sorted, using the
+    membership intervals (an index lookup, no replay of the changes). The symbols come back
+    as one concatenated value: building one Python row per symbol costs several times more
+    than the index search itself. They are sorted in Python, as an ORDER BY would make
+    SQLite walk the primary key instead of the date index.
+
+    Args:
+        conn: Open SQLite connection.
+        as_of: Date as a date/datetime or ISO text ('YYYY-MM-DD').
+
+    Returns:
+        Sorted list of symbols, or None if the date is invalid or the query failed.
+    """
+    try:
+        day = as_iso_date(as_of)
+    except ValueError as e:
+        logger.error(f"Invalid as-of date '{as_of}': {e}")
+        return None
+    try:
+        symbols = conn.execute(
+            f'SELECT group_concat("Symbol", char(31)) FROM {quote_identifier(config.MEMBERSHIP_TABLE_NAME)} '
+            f'WHERE "Start_Date" <= ? AND "End_Date" > ?',
+            (day, day),
+        ).fetchone()[0]
+    except sqlite3.Error as e:
+        logger.error(f"Point-in-time membership query for {day} failed: {e}")
+        return None
+    return sorted(symbols.split("\x1f")) if symbols else []
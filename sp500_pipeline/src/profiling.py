@@ -0,0 +1,118 @@
+import cProfile
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import config
+
+logger = logging.getLogger(__name__)
+# BasicConfig for logger is usually set in the main entry point (cli.py)
+
+
+class PipelineProfiler:
+    """
+    Collects per-stage metrics for one pipeline run: wall time, CPU time, peak traced memory
+    (tracemalloc) plus any counters the stage records (rows_in, rows_out, bytes_downloaded...).
+    When disabled, stage() is a no-op context so callers can always wrap their stages.
+    Stages can be nested: an inner stage is recorded with its 'parent', and the outer stages
+    keep their own peak memory. Optionally runs every outermost stage under cProfile (inner
+    stages are part of their parent's profile) and keeps the dump of the slowest one.
+    """
+
+    def __init__(self, enabled: bool = False, cprofile: bool = False,
+                 metrics_path: Optional[str] = None, profile_dir: Optional[str] = None):
+        self.enabled = enabled
+        self.cprofile = enabled and cprofile
+        self.metrics_path = metrics_path or config.METRICS_PATH
+        self.profile_dir = profile_dir or config.PROFILE_DIR
+        self.run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.stages: List[Dict[str, Any]] = []
+        self._run_start = time.perf_counter()
+        self._slowest_profile: Optional[cProfile.Profile] = None
+        self._slowest_stage: Optional[str] = None
+        self._open_stages: List[str] = [] # Names of the stages being measured, outermost first
+        self._open_peaks: List[int] = [] # Peak traced memory so far of every open stage, outermost first
+
+    @contextmanager
+    def stage(self, name: str, **counters: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Measures the enclosed block as stage `name`. Yields the stage's metrics dict so the
+        block can add counters (e.g. metrics["rows_out"] = len(df)).
+        """
+        metrics: Dict[str, Any] = {"stage": name, **counters}
+        if not self.enabled:
+            yield metrics
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        outer_peak = tracemalloc.get_traced_memory()[1]
+        # reset_peak below would lose the peak of the open stages: carry it in _open_peaks
+        self._open_peaks = [max(peak, outer_peak) for peak in self._open_peaks]
+        if self._open_peaks:
+            metrics["parent"] = self._open_stages[-1]
+        self._open_peaks.append(0)
+        self._open_stages.append(name)
+        tracemalloc.reset_peak()
+        # Only one cProfile profiler can be active at a time: nested stages run under their parent's
+        profile = cProfile.Profile() if self.cprofile and len(self._open_stages) == 1 else None
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        if profile:
+            profile.enable()
+        try:
+            yield metrics
+        finally:
+            if profile:
+                profile.disable()
+            metrics["wall_time_s"] = round(time.perf_counter() - wall_start, 6)
+            metrics["cpu_time_s"] = round(time.process_time() - cpu_start, 6)
+            metrics["peak_memory_bytes"] = max(self._open_peaks.pop(), tracemalloc.get_traced_memory()[1])
+            self._open_stages.pop()
+            if started_tracing:
+                tracemalloc.stop()
+            self.stages.append(metrics)
+            if profile and (self._slowest_stage is None or metrics["wall_time_s"] > self._stage_time(self._slowest_stage)):
+                self._slowest_profile, self._slowest_stage = profile, name
+            logger.debug(f"Stage '{name}' metrics: {metrics}")
+
+    def _stage_time(self, name: str) -> float:
+        return max(s["wall_time_s"] for s in self.stages if s["stage"] == name)
+
+    def write(self, status: str) -> Optional[str]:
+        """
+        Appends the run record (one JSON object per line) to metrics_path and, with cProfile
+        enabled, dumps the slowest stage's profile to profile_dir. Returns the metrics path.
+        """
+        if not self.enabled:
+            return None
+        record = {
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "status": status,
+            "total_wall_time_s": round(time.perf_counter() - self._run_start, 6),
+            "stages": self.stages,
+        }
+        try:
+            if self._slowest_profile is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profile_path = os.path.join(self.profile_dir, f"{self.run_id}_{self._slowest_stage}.prof")
+                self._slowest_profile.dump_stats(profile_path)
+                record["cprofile_dump"] = profile_path
+                logger.info(f"cProfile dump of slowest stage '{self._slowest_stage}' written to {profile_path}")
+            metrics_dir = os.path.dirname(self.metrics_path)
+            if metrics_dir:
+                os.makedirs(metrics_dir, exist_ok=True)
+            with open(self.metrics_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.error(f"Could not write pipeline metrics to {self.metrics_path}: {e}")
+            return None
+        logger.info(f"Pipeline metrics for run {self.run_id} appended to {self.metrics_path}")
+        return self.metrics_path
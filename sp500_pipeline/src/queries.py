@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from . import config
+from .membership import get_members_as_of
+
+logger = logging.getLogger(__name__)
+# BasicConfig for logger is usually set in the main entry point (cli.py)
+
+# Read-only queries over the pipeline database. This module only imports the standard library
+# (no pandas), so the read commands of the CLI start without loading the pipeline dependencies.
+
+
+class QueryResult(NamedTuple):
+    columns: List[str]
+    rows: List[tuple]
+
+
+def connect_readonly(db_path: Optional[str] = None, check_same_thread: bool = True) -> Optional[sqlite3.Connection]:
+    """
+    Opens the database read-only (no file is created and no write lock is ever taken).
+    check_same_thread=False lets a connection pool hand the connection to other threads
+    (one at a time). Returns None if the file does not exist or cannot be opened.
+    """
+    path = db_path or config.DB_PATH
+    if not os.path.exists(path):
+        logger.error(f"Database '{path}' not found. Run the pipeline first.")
+        return None
+    try:
+        return sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True, check_same_thread=check_same_thread)
+    except sqlite3.Error as e:
+        logger.error(f"Could not open database '{path}' read-only: {e}")
+        return None
+
+
+def _run(conn: sqlite3.Connection, sql: str, params: tuple = ()) -> Optional[QueryResult]:
+    try:
+        cursor = conn.execute(sql, params)
+        rows = cursor.fetchall()
+    except sqlite3.Error as e:
+        logger.error(f"Query failed: {e}")
+        return None
+    return QueryResult([description[0] for description in cursor.description], rows)
+
+
+def sector_counts(conn: sqlite3.Connection, limit: Optional[int] = None) -> Optional[QueryResult]:
+    """Active companies per GICS sector (summary table agg_sector_counts), largest first."""
+    return _run(conn, f'SELECT "GICS_Sector", "Company_Count" FROM "{config.AGG_SECTOR_COUNTS_TABLE}" '
+                      f'ORDER BY "Company_Count" DESC, "GICS_Sector" LIMIT ?', (-1 if limit is None else limit,))
+
+
+def state_counts(conn: sqlite3.Connection, limit: Optional[int] = None) -> Optional[QueryResult]:
+    """Active companies per headquarters state (summary table agg_state_counts), largest first."""
+    return _run(conn, f'SELECT "Headquarters_State", "Company_Count" FROM "{config.AGG_STATE_COUNTS_TABLE}" '
+                      f'ORDER BY "Company_Count" DESC, "Headquarters_State" LIMIT ?', (-1 if limit is None else limit,))
+
+
+def oldest_companies(conn: sqlite3.Connection, limit: Optional[int] = None) -> Optional[QueryResult]:
+    """Oldest active companies by founding year (summary table agg_oldest_companies)."""
+    return _run(conn, f'SELECT "Rank", "Symbol", "Security", "Founded_Year" FROM "{config.AGG_OLDEST_COMPANIES_TABLE}" '
+                      f'ORDER BY "Rank" LIMIT ?', (-1 if limit is None else limit,))
+
+
+def company(conn: sqlite3.Connection, symbol: str) -> Optional[QueryResult]:
+    """The stored row of one company (active or not)."""
+    return _run(conn, f'SELECT * FROM "{config.DB_TABLE_NAME}" WHERE "{config.DB_KEY_COLUMN}" = ?', (symbol,))
+
+
+def companies_by(conn: sqlite3.Connection, column: str, values: Sequence[Any]) -> Optional[QueryResult]:
+    """
+    Stored rows of many companies in one query, by config.DB_KEY_COLUMN or CIK. The values
+    are passed as a single JSON parameter, so the number of keys is not bounded by the
+    SQLite parameter limit and the statement is the same for any batch size.
+    """
+    if column not in (config.DB_KEY_COLUMN, "CIK"):
+        raise ValueError(f"Companies can only be looked up by {config.DB_KEY_COLUMN} or CIK, not '{column}'.")
+    return _run(conn, f'SELECT * FROM "{config.DB_TABLE_NAME}" WHERE "{column}" IN (SELECT value FROM json_each(?))',
+                (json.dumps(list(values)),))
+
+
+def members_as_of(conn: sqlite3.Connection, as_of: str) -> Optional[QueryResult]:
+    """Index members on a date, from the point-in-time membership intervals."""
+    members = get_members_as_of(conn, as_of)
+    return None if members is None else QueryResult(["Symbol"], [(symbol,) for symbol in members])
+
+
+def _scalar(conn: sqlite3.Connection, sql: str) -> Any:
+    """Single value of a query, or None if the table does not exist (yet)."""
+    try:
+        row = conn.execute(sql).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return None if row is None else row[0]
+
+
+def load_status(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """
+    State of the database: last pipeline run (recorded by run_pipeline), active/removed
+    companies, date of the last change in the history and the index changes loaded.
+    Missing tables show as None.
+    """
+    last_run = _scalar(conn, f'SELECT "Value" FROM "{config.DB_METADATA_TABLE_NAME}" WHERE "Key" = \'last_run\'')
+    return {
+        "last_run": json.loads(last_run) if last_run else None,
+        "active_companies": _scalar(conn, f'SELECT COUNT(*) FROM "{config.DB_TABLE_NAME}" WHERE "Is_Active" = 1'),
+        "removed_companies": _scalar(conn, f'SELECT COUNT(*) FROM "{config.DB_TABLE_NAME}" WHERE "Is_Active" = 0'),
+        "last_history_change": _scalar(conn, f'SELECT MAX("Valid_From") FROM "{config.DB_HISTORY_TABLE_NAME}"'),
+        "index_changes": _scalar(conn, f'SELECT COUNT(*) FROM "{config.CHANGES_TABLE_NAME}"'),
+        "last_index_change": _scalar(conn, f'SELECT substr(MAX("Effective_Date"), 1, 10) FROM "{config.CHANGES_TABLE_NAME}"'),
+    }
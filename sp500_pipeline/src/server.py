@@ -0,0 +1,377 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from . import config, queries
+from .sqlite_utils import apply_pragmas, get_load_generation
+
+logger = logging.getLogger(__name__)
+# BasicConfig for logger is usually set in the main entry point (cli.py)
+
+# Read-only HTTP/JSON service over the companies database (python -m src serve):
+#   GET  /sectors?limit=N | /states?limit=N | /oldest?limit=N   dashboard summary tables
+#   GET  /companies/<symbol>                                     one company (404 if unknown)
+#   GET  /companies?symbol=A,B&cik=320193,...                    batch lookup
+#   POST /companies  {"symbols": [...], "ciks": [...]}           batch lookup (large batches)
+#   GET  /members?as_of=YYYY-MM-DD                               index members on a date
+#   GET  /status                                                 load state, generation, cache stats
+# Results are cached (LRU) and tagged with the load generation they were read at; the pipeline
+# bumps the generation in the same transaction as every load that changes data, and the
+# server drops the cache as soon as it sees a new generation.
+
+# PRAGMAs of the read connections: the read-side settings of config.SQLITE_PRAGMAS
+# (journal_mode and synchronous only matter to writers).
+_READ_PRAGMAS = {name: value for name, value in config.SQLITE_PRAGMAS.items()
+                 if name not in ("journal_mode", "synchronous")}
+
+
+class RequestError(Exception):
+    """Invalid request; answered with its HTTP status and message."""
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ResultCache:
+    """
+    LRU cache of results tagged with a load generation. Results read while a newer
+    generation was published are not stored, and a new generation empties the cache.
+    """
+    def __init__(self, max_entries: int = config.API_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.generation: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int]) -> None:
+        if self.max_entries <= 0 or generation != self.generation:
+            return # Cache disabled, or value read before the current generation
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def set_generation(self, generation: int) -> None:
+        if generation != self.generation:
+            if self._entries:
+                logger.info(f"Load generation {self.generation} -> {generation}: dropping {len(self._entries)} cached results.")
+            self._entries.clear()
+            self.generation = generation
+
+    def stats(self) -> Dict[str, Any]:
+        return {"generation": self.generation, "entries": len(self._entries), "max_entries": self.max_entries,
+                "hits": self.hits, "misses": self.misses}
+
+
+class ReadPool:
+    """
+    Fixed pool of read-only SQLite connections. Queries run in a thread pool of the same size
+    (sqlite3 releases the GIL while SQLite works), so the event loop never blocks on a query.
+    """
+    def __init__(self, connections: List[Any]):
+        self.size = len(connections)
+        self._connections = connections
+        self._idle: asyncio.Queue = asyncio.Queue()
+        for conn in connections:
+            self._idle.put_nowait(conn)
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="sqlite-read")
+
+    @classmethod
+    def open(cls, db_path: str, size: int = config.API_POOL_SIZE) -> Optional["ReadPool"]:
+        """Opens size read-only connections (must be called inside the event loop). None on failure."""
+        connections = []
+        for _ in range(max(1, size)):
+            conn = queries.connect_readonly(db_path, check_same_thread=False)
+            if conn is None:
+                for opened in connections:
+                    opened.close()
+                return None
+            apply_pragmas(conn, _READ_PRAGMAS)
+            connections.append(conn)
+        return cls(connections)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Runs func(conn, *args) on an idle connection, in the query threads."""
+        conn = await self._idle.get()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, conn, *args)
+        finally:
+            self._idle.put_nowait(conn)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        for conn in self._connections:
+            conn.close()
+
+
+def _records(result: queries.QueryResult) -> List[Dict[str, Any]]:
+    return [dict(zip(result.columns, row)) for row in result.rows]
+
+
+def _encode(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _int_param(params: Dict[str, List[str]], name: str) -> Optional[int]:
+    if name not in params:
+        return None
+    try:
+        value = int(params[name][-1])
+    except ValueError:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"'{name}' must be an integer.") from None
+    if value < 0:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"'{name}' must not be negative.")
+    return value
+
+
+def _list_param(params: Dict[str, List[str]], name: str) -> List[str]:
+    """Values of a repeated and/or comma-separated query parameter (?symbol=A,B&symbol=C)."""
+    return [value.strip() for raw in params.get(name, []) for value in raw.split(",") if value.strip()]
+
+
+class ReadServer:
+    """asyncio HTTP/1.1 server (keep-alive) answering the read endpoints from the pool and the cache."""
+
+    def __init__(self, pool: ReadPool, cache: ResultCache, poll_interval: float = config.API_GENERATION_POLL_S):
+        self.pool = pool
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.requests = 0
+        self._started = time.time()
+        self._server: Optional[asyncio.Server] = None
+        self._watcher: Optional[asyncio.Task] = None
+
+    async def start(self, host: str, port: int) -> int:
+        """Starts listening and watching the load generation. Returns the bound port."""
+        await self.refresh_generation()
+        self._watcher = asyncio.create_task(self._watch_generation())
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.pool.close()
+
+    async def refresh_generation(self) -> None:
+        self.cache.set_generation(await self.pool.run(get_load_generation))
+
+    async def _watch_generation(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh_generation()
+            except Exception as e: # e.g. database locked or replaced; keep serving and retry
+                logger.warning(f"Could not read the load generation: {e}")
+
+    # --- Endpoints ---
+
+    async def _cached(self, key: Hashable, func: Callable[..., Optional[queries.QueryResult]], *args: Any) -> bytes:
+        """Encoded records of a query, from the cache if possible."""
+        body = self.cache.get(key)
+        if body is None:
+            generation = self.cache.generation
+            result = await self.pool.run(func, *args)
+            if result is None:
+                raise RequestError(HTTPStatus.SERVICE_UNAVAILABLE, "Query failed; see the server log.")
+            body = _encode(_records(result))
+            self.cache.put(key, body, generation)
+        return body
+
+    async def lookup_companies(self, symbols: Sequence[str], ciks: Sequence[int]) -> Dict[str, Any]:
+        """
+        Batch lookup by symbol and/or CIK. Every key is cached on its own (including unknown
+        keys), so a batch only queries the keys that are not cached, all in one query per column.
+        A CIK can match several companies (share classes such as GOOG/GOOGL); all are returned.
+        """
+        if len(symbols) + len(ciks) > config.API_MAX_BATCH:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"At most {config.API_MAX_BATCH} symbols/CIKs per request.")
+        found: Dict[Tuple[str, Any], List[Dict[str, Any]]] = {}
+        missing_keys: Dict[str, List[Any]] = {config.DB_KEY_COLUMN: [], "CIK": []}
+        for column, values in ((config.DB_KEY_COLUMN, symbols), ("CIK", ciks)):
+            for value in dict.fromkeys(values): # Unique, in request order
+                cached = self.cache.get((column, value), default=self)
+                if cached is self:
+                    missing_keys[column].append(value)
+                else:
+                    found[(column, value)] = cached
+
+        generation = self.cache.generation
+        for column, values in missing_keys.items():
+            if not values:
+                continue
+            result = await self.pool.run(queries.companies_by, column, values)
+            if result is None:
+                raise RequestError(HTTPStatus.SERVICE_UNAVAILABLE, "Query failed; see the server log.")
+            rows: Dict[Any, List[Dict[str, Any]]] = {}
+            for record in _records(result):
+                rows.setdefault(record[column], []).append(record)
+            for value in values:
+                found[(column, value)] = rows.get(value, [])
+                self.cache.put((column, value), found[(column, value)], generation)
+
+        # A company named twice (same symbol repeated, or by symbol and by CIK) is listed once
+        companies: Dict[Any, Dict[str, Any]] = {}
+        not_found = []
+        for column, values in ((config.DB_KEY_COLUMN, symbols), ("CIK", ciks)):
+            for value in dict.fromkeys(values):
+                records = found[(column, value)]
+                if not records:
+                    not_found.append(value)
+                for record in records:
+                    companies.setdefault(record[config.DB_KEY_COLUMN], record)
+        return {"companies": list(companies.values()), "not_found": not_found}
+
+    async def status(self) -> Dict[str, Any]:
+        state = await self.pool.run(queries.load_status)
+        return {**state, "cache": self.cache.stats(), "pool_size": self.pool.size,
+                "requests": self.requests, "uptime_s": round(time.time() - self._started, 1)}
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> bytes:
+        """Routes a request and returns the encoded JSON answer (raises RequestError)."""
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        params = parse_qs(url.query)
+        if method not in ("GET", "POST") or (method == "POST" and path != "/companies"):
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not supported on {path}.")
+
+        if path in ("/sectors", "/states", "/oldest"):
+            limit = _int_param(params, "limit")
+            func = {"/sectors": queries.sector_counts, "/states": queries.state_counts,
+                    "/oldest": queries.oldest_companies}[path]
+            return await self._cached((path, limit), func, limit)
+        if path == "/members":
+            as_of = params.get("as_of", [""])[-1]
+            try:
+                as_of = date.fromisoformat(as_of).isoformat()
+            except ValueError:
+                raise RequestError(HTTPStatus.BAD_REQUEST, "'as_of' must be a date (YYYY-MM-DD).") from None
+            return await self._cached((path, as_of), queries.members_as_of, as_of)
+        if path.startswith("/companies/"):
+            symbol = unquote(path[len("/companies/"):])
+            answer = await self.lookup_companies([symbol], [])
+            if not answer["companies"]:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown symbol '{symbol}'.")
+            return _encode(answer["companies"][0])
+        if path == "/companies":
+            if method == "POST":
+                try:
+                    request = json.loads(body or b"{}")
+                    symbols = [str(symbol) for symbol in request.get("symbols", [])]
+                    ciks = [int(cik) for cik in request.get("ciks", [])]
+                except (ValueError, TypeError, AttributeError):
+                    raise RequestError(HTTPStatus.BAD_REQUEST,
+                                       'Body must be JSON: {"symbols": [...], "ciks": [...]}.') from None
+            else:
+                symbols = _list_param(params, "symbol")
+                try:
+                    ciks = [int(cik) for cik in _list_param(params, "cik")]
+                except ValueError:
+                    raise RequestError(HTTPStatus.BAD_REQUEST, "'cik' values must be integers.") from None
+            if not symbols and not ciks:
+                raise RequestError(HTTPStatus.BAD_REQUEST, "Give at least one symbol or cik.")
+            return _encode(await self.lookup_companies(symbols, ciks))
+        if path == "/status":
+            return _encode(await self.status())
+        raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown endpoint '{path}'.")
+
+    # --- HTTP ---
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    length = int(headers.get("content-length", "0"))
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, _encode({"error": "Malformed request."}), False)
+                    break
+                if length > config.API_MAX_BODY_BYTES:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        _encode({"error": "Request body too large."}), False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = (headers.get("connection", "").lower() != "close" if version == "HTTP/1.1"
+                              else headers.get("connection", "").lower() == "keep-alive")
+
+                self.requests += 1
+                try:
+                    status, payload = HTTPStatus.OK, await self.dispatch(method, target, body)
+                except RequestError as e:
+                    status, payload = e.status, _encode({"error": str(e)})
+                except Exception as e: # A failing request must not take the server down
+                    logger.exception(f"Error answering {method} {target}: {e}")
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, _encode({"error": "Internal error."})
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass # Client went away
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: HTTPStatus, payload: bytes, keep_alive: bool) -> None:
+        writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                     f"Content-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload)
+        await writer.drain()
+
+
+async def _serve(db_path: str, host: str, port: int, pool_size: int, cache_size: int) -> bool:
+    pool = ReadPool.open(db_path, pool_size)
+    if pool is None:
+        return False
+    server = ReadServer(pool, ResultCache(cache_size))
+    bound_port = await server.start(host, port)
+    logger.info(f"Serving {db_path} on http://{host}:{bound_port} ({pool.size} read connections, "
+                f"cache of {cache_size} results, load generation {server.cache.generation}).")
+    try:
+        await asyncio.Event().wait() # Until cancelled (Ctrl+C)
+    finally:
+        await server.close()
+    return True
+
+
+def serve(db_path: Optional[str] = None, host: str = config.API_HOST, port: int = config.API_PORT,
+          pool_size: int = config.API_POOL_SIZE, cache_size: int = config.API_CACHE_SIZE) -> bool:
+    """
+    Runs the read API until interrupted. Returns False if the database could not be opened.
+    """
+    try:
+        return asyncio.run(_serve(db_path or config.DB_PATH, host, port, pool_size, cache_size))
+    except KeyboardInterrupt:
+        logger.info("Read API stopped.")
+        return True
@@ -0,0 +1,334 @@
+import json
+import logging
+import os
+from datetime import date, datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .sqlite_utils import as_iso_date
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc # noqa: F401 (registers pa.ipc)
+except ImportError: # Optional dependency: without it snapshots are not archived
+    pa = pc = None
+
+logger = logging.getLogger(__name__)
+# BasicConfig for logger is usually set in the main entry point (cli.py)
+
+# Every archive file is an Arrow IPC file with one record batch per snapshot date.
+# The file schema metadata lists the dates and checkpoint keys of its batches, so the
+# catalog of the archive is built by reading file footers only.
+_DATES_METADATA = b"snapshot_dates"
+_KEYS_METADATA = b"snapshot_keys"
+_FILE_SUFFIX = ".arrow"
+_PANDAS_METADATA = b"pandas" # dtypes of the DataFrame, written by pa.Table.from_pandas
+
+
+class SnapshotLocation(NamedTuple):
+    path: str
+    batch_index: int
+    key: Optional[str]
+
+
+def _conform(table: "pa.Table", schema: "pa.Schema") -> "pa.Table":
+    """Casts a table to schema, adding the columns it lacks as nulls (snapshots taken before a column existed)."""
+    columns = [table.column(field.name).cast(field.type) if field.name in table.column_names
+               else pa.nulls(table.num_rows, field.type) for field in schema]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _to_pandas(table: "pa.Table") -> pd.DataFrame:
+    """
+    Arrow -> pandas with the dtypes of the archived DataFrame, restored from the pandas metadata
+    of the file (Int64 CIK, int64 or float64 Founded_Year...). Files written without it only
+    get CIK back as Int64.
+    """
+    df = table.to_pandas()
+    if _PANDAS_METADATA not in (table.schema.metadata or {}) and "CIK" in df.columns:
+        df["CIK"] = df["CIK"].astype(pd.Int64Dtype())
+    return df
+
+
+class SnapshotArchive:
+    """
+    Archive of the daily transformed constituents tables, partitioned by date:
+      daily/YYYY-MM-DD.arrow  one uncompressed batch, read memory-mapped and zero-copy.
+      monthly/YYYY-MM.arrow   a complete month merged by compact(), one batch per date,
+                              compressed with config.SNAPSHOT_COMPACTED_COMPRESSION (only the
+                              batch that is read gets decompressed).
+    A daily file overrides the same date in a monthly file until the next compaction.
+    """
+
+    def __init__(self, directory: str, compacted_compression: Optional[str] = None):
+        self.directory = directory
+        self.compacted_compression = compacted_compression
+        self._footers: Dict[str, Tuple[int, int, List[str], List[Optional[str]]]] = {}
+
+    @classmethod
+    def from_config(cls) -> Optional["SnapshotArchive"]:
+        """Archive configured by config.SNAPSHOT_*, or None if disabled or pyarrow is not installed."""
+        if not config.SNAPSHOT_DIR:
+            return None
+        if pa is None:
+            logger.warning("pyarrow is not installed; daily snapshots are not archived.")
+            return None
+        return cls(config.SNAPSHOT_DIR, config.SNAPSHOT_COMPACTED_COMPRESSION)
+
+    # --- Writing ---
+
+    def _write_file(self, path: str, tables: Sequence["pa.Table"], dates: List[str], keys: List[Optional[str]],
+                    compression: Optional[str]) -> None:
+        """
+        Writes one batch per table (conformed to a common schema) atomically. The file keeps the
+        pandas metadata of the last (newest) table, so reads restore its dtypes.
+        """
+        schemas = [table.schema for table in tables]
+        if all(schema.equals(schemas[0]) for schema in schemas[1:]):
+            schema = schemas[0].remove_metadata()
+        else:
+            schema = pa.unify_schemas([schema.remove_metadata() for schema in schemas], promote_options="permissive")
+        metadata = {_DATES_METADATA: json.dumps(dates), _KEYS_METADATA: json.dumps(keys)}
+        pandas_metadata = (schemas[-1].metadata or {}).get(_PANDAS_METADATA)
+        if pandas_metadata is not None:
+            metadata[_PANDAS_METADATA] = pandas_metadata
+        schema = schema.with_metadata(metadata)
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, schema, options=options) as writer:
+            for table in tables:
+                # combine_chunks: one record batch per date, so a read maps a single batch
+                writer.write_batch(_conform(table, schema).combine_chunks().to_batches()[0]
+                                   if table.num_rows else pa.RecordBatch.from_pylist([], schema=schema))
+        os.replace(tmp_path, path)
+
+    def write(self, df: pd.DataFrame, snapshot_date: Union[str, date, datetime, None] = None,
+              key: Optional[str] = None) -> Optional[str]:
+        """
+        Archives a transform_data output as the snapshot of snapshot_date (default: today),
+        replacing a previous snapshot of the same date.
+
+        Args:
+            df: Transformed constituents table.
+            snapshot_date: Date of the snapshot.
+            key: Checkpoint key of the content (see latest_key).
+
+        Returns:
+            Path of the written file, or None if it could not be written.
+        """
+        day = as_iso_date(snapshot_date or date.today())
+        path = os.path.join(self.directory, "daily", f"{day}{_FILE_SUFFIX}")
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self._write_file(path, [table], [day], [key], compression=None)
+        except (OSError, pa.ArrowException) as e:
+            logger.error(f"Could not write the snapshot of {day} to {path}: {e}")
+            return None
+        logger.info(f"Archived snapshot of {day} ({len(df)} rows) to {path}.")
+        return path
+
+    # --- Catalog ---
+
+    def _read_footer(self, path: str) -> Tuple[List[str], List[Optional[str]]]:
+        """Dates and keys of an archive file (cached by size and modification time)."""
+        stat = os.stat(path)
+        cached = self._footers.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2], cached[3]
+        with pa.memory_map(path) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+        dates = json.loads(metadata.get(_DATES_METADATA, b"[]"))
+        keys = json.loads(metadata.get(_KEYS_METADATA, b"null")) or [None] * len(dates)
+        self._footers[path] = (stat.st_mtime_ns, stat.st_size, dates, keys)
+        return dates, keys
+
+    def _files(self, partition: str) -> List[str]:
+        folder = os.path.join(self.directory, partition)
+        try:
+            names = sorted(name for name in os.listdir(folder) if name.endswith(_FILE_SUFFIX))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(folder, name) for name in names]
+
+    def catalog(self) -> Dict[str, SnapshotLocation]:
+        """Location of every archived date (daily files override compacted months)."""
+        locations: Dict[str, SnapshotLocation] = {}
+        for path in self._files("monthly") + self._files("daily"):
+            try:
+                dates, keys = self._read_footer(path)
+            except (OSError, pa.ArrowException) as e:
+                logger.warning(f"Ignoring unreadable snapshot file {path}: {e}")
+                continue
+            for index, (day, key) in enumerate(zip(dates, keys)):
+                locations[day] = SnapshotLocation(path, index, key)
+        return locations
+
+    def dates(self) -> List[str]:
+        """Archived snapshot dates, oldest first."""
+        return sorted(self.catalog())
+
+    def latest_key(self) -> Optional[str]:
+        """Checkpoint key of the most recent snapshot, or None if the archive is empty."""
+        locations = self.catalog()
+        return locations[max(locations)].key if locations else None
+
+    # --- Reading ---
+
+    def _resolve(self, as_of: Union[str, date, datetime],
+                 locations: Dict[str, SnapshotLocation]) -> Optional[str]:
+        """Most recent archived date on or before as_of (the table in force on that date)."""
+        day = as_iso_date(as_of)
+        candidates = [snapshot_date for snapshot_date in locations if snapshot_date <= day]
+        return max(candidates) if candidates else None
+
+    def read_table(self, as_of: Union[str, date, datetime],
+                   columns: Optional[Iterable[str]] = None) -> Optional["pa.Table"]:
+        """
+        Returns the snapshot in force on as_of (the most recent one on or before that date) as an
+        Arrow table backed by the memory-mapped file, reading only that date's batch. For daily
+        files no data is copied. The snapshot date is in the schema metadata ('snapshot_date').
+
+        Args:
+            as_of: Date as a date/datetime or ISO text ('YYYY-MM-DD').
+            columns: Optional subset of columns to return.
+
+        Returns:
+            Arrow table, or None if the date is invalid, precedes the archive or the read failed.
+        """
+        try:
+            locations = self.catalog()
+            day = self._resolve(as_of, locations)
+        except ValueError as e:
+            logger.error(f"Invalid as-of date '{as_of}': {e}")
+            return None
+        if day is None:
+            logger.warning(f"No snapshot archived on or before {as_of}.")
+            return None
+        location = locations[day]
+        try:
+            with pa.memory_map(location.path) as source:
+                batch = pa.ipc.open_file(source).get_batch(location.batch_index)
+            table = pa.Table.from_batches([batch])
+            if columns is not None:
+                table = table.select(list(columns))
+        except (OSError, KeyError, pa.ArrowException) as e:
+            logger.error(f"Reading the snapshot of {day} from {location.path} failed: {e}")
+            return None
+        metadata = {b"snapshot_date": day.encode()}
+        pandas_metadata = (table.schema.metadata or {}).get(_PANDAS_METADATA)
+        if pandas_metadata is not None:
+            metadata[_PANDAS_METADATA] = pandas_metadata
+        return table.replace_schema_metadata(metadata)
+
+    def read(self, as_of: Union[str, date, datetime], columns: Optional[Iterable[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        DataFrame version of read_table, with the dtypes of the DataFrame that was archived (see
+        _to_pandas). The date of the snapshot that was read is in df.attrs["snapshot_date"].
+        """
+        table = self.read_table(as_of, columns)
+        if table is None:
+            return None
+        df = _to_pandas(table)
+        df.attrs["snapshot_date"] = table.schema.metadata[b"snapshot_date"].decode()
+        return df
+
+    def diff(self, date_from: Union[str, date, datetime], date_to: Union[str, date, datetime],
+             key_column: str = config.DB_KEY_COLUMN) -> Optional[pd.DataFrame]:
+        """
+        Compares the snapshots in force on two dates by key_column. Only those two batches are
+        read, and the comparison runs on the memory-mapped Arrow columns.
+
+        Returns:
+            DataFrame with key_column, 'Change' ('added', 'removed' or 'updated') and
+            'Changed_Columns' (comma-separated, for updates), sorted by key; or None if either
+            snapshot could not be read. The compared snapshot dates are in df.attrs.
+        """
+        old, new = self.read_table(date_from), self.read_table(date_to)
+        if old is None or new is None:
+            return None
+        old_keys, new_keys = old.column(key_column), new.column(key_column)
+        positions = pc.index_in(new_keys, value_set=old_keys) # Row of each new key in the old snapshot
+        in_old = pc.is_valid(positions)
+        common_new = new.filter(in_old)
+        common_old = old.take(positions.filter(in_old))
+
+        # A column present in only one of the snapshots is compared as all nulls on the other side
+        flags = []
+        compared = [column for column in old.column_names if column != key_column]
+        compared += [column for column in new.column_names if column != key_column and column not in compared]
+        for column in compared:
+            before = (common_old.column(column) if column in common_old.column_names
+                      else pa.nulls(common_old.num_rows, common_new.schema.field(column).type))
+            after = (common_new.column(column) if column in common_new.column_names
+                     else pa.nulls(common_new.num_rows, before.type))
+            try:
+                after = after.cast(before.type)
+            except pa.ArrowException:
+                flags.append(np.ones(common_new.num_rows, dtype=bool)) # Incomparable types
+                continue
+            differs = pc.or_(pc.fill_null(pc.not_equal(before, after), False),
+                             pc.xor(pc.is_null(before), pc.is_null(after)))
+            flags.append(differs.to_numpy(zero_copy_only=False))
+        changed = np.column_stack(flags) if flags else np.zeros((common_new.num_rows, 0), dtype=bool)
+
+        updated_rows = np.flatnonzero(changed.any(axis=1))
+        common_keys = common_new.column(key_column).to_pylist()
+        added = new_keys.filter(pc.invert(in_old)).to_pylist()
+        removed = old_keys.filter(pc.invert(pc.is_in(old_keys, value_set=new_keys))).to_pylist()
+        rows = ([(key, "added", "") for key in added] + [(key, "removed", "") for key in removed]
+                + [(common_keys[row], "updated",
+                    ", ".join(column for column, flag in zip(compared, changed[row]) if flag))
+                   for row in updated_rows])
+        result = pd.DataFrame(rows, columns=[key_column, "Change", "Changed_Columns"])
+        result = result.sort_values(key_column).reset_index(drop=True)
+        result.attrs["from_date"] = old.schema.metadata[b"snapshot_date"].decode()
+        result.attrs["to_date"] = new.schema.metadata[b"snapshot_date"].decode()
+        return result
+
+    # --- Compaction ---
+
+    def compact(self, before: Union[str, date, datetime, None] = None) -> int:
+        """
+        Merges the daily files of every month that ended before `before` (default: today, i.e.
+        all complete months) into monthly/YYYY-MM.arrow, together with the dates already
+        compacted there, and removes the merged daily files.
+
+        Returns:
+            Number of daily files merged.
+        """
+        current_month = as_iso_date(before or date.today())[:7]
+        by_month: Dict[str, List[str]] = {}
+        for path in self._files("daily"):
+            day = os.path.basename(path)[:-len(_FILE_SUFFIX)]
+            if day[:7] < current_month:
+                by_month.setdefault(day[:7], []).append(path)
+
+        merged_files = 0
+        for month, daily_paths in sorted(by_month.items()):
+            monthly_path = os.path.join(self.directory, "monthly", f"{month}{_FILE_SUFFIX}")
+            snapshots: Dict[str, Tuple["pa.Table", Optional[str]]] = {}
+            try:
+                # Files are read into memory (not mapped) so the monthly file can be replaced
+                for path in ([monthly_path] if os.path.exists(monthly_path) else []) + daily_paths:
+                    dates, keys = self._read_footer(path)
+                    with pa.OSFile(path) as source:
+                        reader = pa.ipc.open_file(source)
+                        for index, (day, key) in enumerate(zip(dates, keys)):
+                            snapshots[day] = (pa.Table.from_batches([reader.get_batch(index)]), key)
+                days = sorted(snapshots)
+                self._write_file(monthly_path, [snapshots[day][0] for day in days], days,
+                                 [snapshots[day][1] for day in days], compression=self.compacted_compression)
+            except (OSError, pa.ArrowException) as e:
+                logger.error(f"Compaction of {month} failed; daily files kept: {e}")
+                continue
+            for path in daily_paths:
+                os.remove(path)
+            merged_files += len(daily_paths)
+            logger.info(f"Compacted {len(daily_paths)} daily snapshots into {monthly_path} ({len(days)} dates).")
+        return merged_files
@@ -0,0 +1,65 @@
+import logging
+import sqlite3
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Union
+
+from . import config
+
+logger = logging.getLogger(__name__)
+# BasicConfig for logger is usually set in the main entry point (cli.py)
+
+# SQLite helpers shared by the pipeline modules and the read-only path (queries, server).
+# This module only imports the standard library, so the read commands can use it
+# without loading pandas.
+
+# pipeline_metadata key of the load generation counter (see database_operations.bump_load_generation)
+LOAD_GENERATION_KEY = "load_generation"
+
+
+def quote_identifier(identifier: str) -> str:
+    """Quotes an SQLite identifier (table or column name)."""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def table_exists(conn: sqlite3.Connection, table_name: str) -> bool:
+    """True if the database has a table named table_name."""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)).fetchone() is not None
+
+
+def table_columns(conn: sqlite3.Connection, table_name: str) -> List[str]:
+    """Returns the column names of a table (empty list if it does not exist)."""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table_name)})")]
+
+
+def as_iso_date(value: Union[str, date, datetime]) -> str:
+    """Normalizes a date, datetime (incl. pandas Timestamp) or ISO text to 'YYYY-MM-DD' (ValueError if invalid)."""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return date.fromisoformat(str(value)[:10]).isoformat()
+
+
+def apply_pragmas(conn: sqlite3.Connection, pragmas: Optional[Dict[str, Any]] = None) -> None:
+    """Applies performance PRAGMAs (config.SQLITE_PRAGMAS by default) to a connection."""
+    for name, value in (config.SQLITE_PRAGMAS if pragmas is None else pragmas).items():
+        try:
+            conn.execute(f"PRAGMA {name} = {value}")
+        except sqlite3.Error as e:
+            logger.warning(f"Could not apply PRAGMA {name} = {value}: {e}")
+    logger.debug(f"Applied SQLite PRAGMAs: {pragmas if pragmas is not None else config.SQLITE_PRAGMAS}")
+
+
+def get_metadata(conn: sqlite3.Connection, key: str) -> Optional[str]:
+    """Reads a value of the pipeline metadata table (None if the key or the table is missing)."""
+    try:
+        row = conn.execute(f'SELECT "Value" FROM "{config.DB_METADATA_TABLE_NAME}" WHERE "Key" = ?', (key,)).fetchone()
+    except sqlite3.OperationalError: # Table not created yet
+        return None
+    return None if row is None else row[0]
+
+
+def get_load_generation(conn: sqlite3.Connection) -> int:
+    """Load generation of the database: increases with every load that changed data (0 if none recorded)."""
+    value = get_metadata(conn, LOAD_GENERATION_KEY)
+    return int(value) if value else 0
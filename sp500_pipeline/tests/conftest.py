@@ -0,0 +1,134 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pytest
+
+# Tests import the pipeline as the 'src' package, as the benchmarks do (run from the project root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import config # noqa: E402
+
+
+class Route:
+    """
+    Response served for one path. With an etag, a matching If-None-Match gets a 304.
+    delay (seconds) is waited before answering, to stand in for a slow source.
+    """
+
+    def __init__(self, body: str = "", status: int = 200, etag: Optional[str] = None, delay: float = 0.0):
+        self.body = body
+        self.status = status
+        self.etag = etag
+        self.delay = delay
+
+
+class LocalServer:
+    """HTTP server on 127.0.0.1 standing in for Wikipedia. Records the headers of every request."""
+
+    def __init__(self):
+        self.routes: Dict[str, Route] = {}
+        self.requests: List[Dict[str, str]] = [] # (path + request headers) in arrival order
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append({"path": self.path, **dict(self.headers.items())})
+                route = server.routes.get(self.path)
+                if route is None:
+                    self.send_error(404)
+                    return
+                time.sleep(route.delay)
+                if route.etag and self.headers.get("If-None-Match") == route.etag:
+                    self.send_response(304)
+                    self.send_header("ETag", route.etag)
+                    self.end_headers()
+                    return
+                payload = route.body.encode("utf-8")
+                self.send_response(route.status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                if route.etag:
+                    self.send_header("ETag", route.etag)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args): # Keep the test output clean
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}{path}"
+
+    def start(self) -> "LocalServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def local_server():
+    server = LocalServer().start()
+    yield server
+    server.stop()
+
+
+def constituents_page(rows: List[List[str]],
+                      headers=("Symbol", "Security", "GICS Sector", "GICS Sub-Industry",
+                               "Headquarters Location", "Date added", "CIK", "Founded")) -> str:
+    """Minimal Wikipedia-like page with a 'constituents' table."""
+    header_html = "".join(f"<th>{header}</th>" for header in headers)
+    rows_html = "".join("<tr>" + "".join(f"<td>{value}</td>" for value in row) + "</tr>" for row in rows)
+    return (f'<html><body><table class="wikitable sortable" id="constituents">'
+            f"<tbody><tr>{header_html}</tr>{rows_html}</tbody></table></body></html>")
+
+
+def raw_companies(rows: List[List[str]]) -> pd.DataFrame:
+    """Companies table as parse_sp500_table returns it (columns of config.TABLE_COLUMN_MAPPING_KEYS)."""
+    return pd.DataFrame(rows, columns=list(config.TABLE_COLUMN_MAPPING_KEYS))
+
+
+# Raw rows: Symbol, Security, GICS Sector, GICS Sub-Industry, Headquarters Location, Date added, CIK, Founded
+COMPANY_ROWS = [
+    ["AAPL", "Apple Inc.", "Information Technology", "Technology Hardware", "Cupertino, California", "1982-11-30", "0000320193", "1977"],
+    ["GOOGL", "Alphabet Inc. (Class A)", "Communication Services", "Interactive Media", "Mountain View, California", "2014-04-03", "0001652044", "1998"],
+    ["GOOG", "Alphabet Inc. (Class C)", "Communication Services", "Interactive Media", "Mountain View, California", "2006-04-03", "0001652044", "1998"],
+    ["XOM", "ExxonMobil", "Energy", "Integrated Oil & Gas", "Spring, Texas", "1957-03-04", "0000034088", "1999"],
+    ["ACN", "Accenture", "Information Technology", "IT Consulting", "Dublin, Ireland", "2011-07-06", "0001467373", "1989 (1951)"],
+    ["CL", "Colgate-Palmolive", "Consumer Staples", "Household Products", "New York City, New York", "1957-03-04", "0000021665", "1806"],
+]
+
+
+def companies_frame(rows: List[List[str]] = COMPANY_ROWS) -> pd.DataFrame:
+    """transform_data output of raw rows (in-memory location lookup)."""
+    from src.data_transformation import transform_data
+    return transform_data(raw_companies(rows))
+
+
+def with_values(rows: List[List[str]], symbol: str, **changes: str) -> List[List[str]]:
+    """Copy of raw rows where the row of symbol gets new values, by raw column name (e.g. GICS_Sector=...)."""
+    positions = {column: i for i, column in enumerate(config.TABLE_COLUMN_MAPPING_KEYS)}
+    changed = [row[:] for row in rows]
+    for row in changed:
+        if row[0] == symbol:
+            for column, value in changes.items():
+                row[positions[column]] = value
+    return changed
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """Connection to a new database (create_connection, so with the pipeline PRAGMAs)."""
+    from src.database_operations import create_connection
+    connection = create_connection(str(tmp_path / "companies.db"))
+    yield connection
+    connection.close()
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from src import config
+from src.aggregates import refresh_aggregates
+from src.database_operations import upsert_companies
+
+from conftest import companies_frame
+
+TABLE = config.DB_TABLE_NAME
+SECTORS = ["Energy", "Utilities", "Financials", "Industrials"]
+LOCATIONS = ["Houston, Texas", "Dublin, Ireland", "Boston, Massachusetts", "Toronto, Ontario, Canada", "Nowhere"]
+
+
+def _random_rows(rng: random.Random, symbols):
+    return [[symbol, f"{symbol} Inc.", rng.choice(SECTORS), "Sub-Industry", rng.choice(LOCATIONS), "2001-01-01",
+             str(1000 + i), rng.choice([str(rng.randint(1800, 2010)), ""])] for i, symbol in enumerate(symbols)]
+
+
+def _summaries(conn):
+    return {
+        table: conn.execute(f'SELECT * FROM "{table}" ORDER BY 1').fetchall()
+        for table in (config.AGG_SECTOR_COUNTS_TABLE, config.AGG_STATE_COUNTS_TABLE, config.AGG_OLDEST_COMPANIES_TABLE)
+    }
+
+
+def _recomputed(conn):
+    """Summaries rebuilt from the full companies table (the reference)."""
+    with conn:
+        refresh_aggregates(conn, TABLE, None)
+    return _summaries(conn)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_incremental_summaries_match_a_full_recompute(conn, seed):
+    rng = random.Random(seed)
+    universe = [f"S{i:02d}" for i in range(40)]
+    rows = _random_rows(rng, rng.sample(universe, 25))
+    upsert_companies(companies_frame(rows), conn, TABLE, load_date="2024-01-01", on_changes=refresh_aggregates)
+
+    for load in range(12):
+        by_symbol = {row[0]: row for row in rows}
+        for symbol in rng.sample(sorted(by_symbol), 3): # Removed companies
+            del by_symbol[symbol]
+        for row in _random_rows(rng, rng.sample([s for s in universe if s not in by_symbol], 3)): # New or returning
+            by_symbol[row[0]] = row
+        for symbol in rng.sample(sorted(by_symbol), 4): # Changed sector, location or founding year
+            changed = _random_rows(rng, [symbol])[0]
+            changed[6] = by_symbol[symbol][6] # Same CIK
+            by_symbol[symbol] = changed
+        rows = list(by_symbol.values())
+        upsert_companies(companies_frame(rows), conn, TABLE, load_date=f"2024-02-{load + 1:02d}",
+                         on_changes=refresh_aggregates)
+
+        incremental = _summaries(conn)
+        assert incremental == _recomputed(conn), f"load {load}"
+
+
+def test_counts_only_active_companies(conn):
+    rows = _random_rows(random.Random(0), ["A", "B", "C"])
+    for row, sector in zip(rows, ["Energy", "Energy", "Utilities"]):
+        row[2] = sector
+    upsert_companies(companies_frame(rows), conn, TABLE, load_date="2024-01-01", on_changes=refresh_aggregates)
+
+    upsert_companies(companies_frame(rows[1:]), conn, TABLE, load_date="2024-02-01", on_changes=refresh_aggregates)
+    upsert_companies(companies_frame(rows[:1]), conn, TABLE, load_date="2024-03-01", on_changes=refresh_aggregates)
+
+    assert _summaries(conn)[config.AGG_SECTOR_COUNTS_TABLE] == [("Energy", 1)] # Empty groups are removed
@@ -0,0 +1,146 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from src import config
+from src.backfill import backfill_revisions, list_revisions, revision_timestamp
+from src.database_operations import create_connection, save_data_to_db
+from src.snapshots import SnapshotArchive
+from benchmarks.synthetic_html import generate_page_html
+
+from conftest import companies_frame
+
+# Saved revisions: later pages change most rows, drop the last companies and then add more
+PAGES = {"sp500_2020-02-01.html": (150, 1), "sp500_2020-02-02.html": (130, 2), "sp500_2020-02-03.html": (180, 3)}
+
+
+@pytest.fixture
+def revisions(tmp_path, monkeypatch):
+    """Directory with the PAGES revisions; every store of the backfill lives in tmp_path."""
+    monkeypatch.setattr(config, "DB_PATH", str(tmp_path / "companies.db"))
+    monkeypatch.setattr(config, "BACKFILL_MANIFEST_PATH", str(tmp_path / "manifest.jsonl"))
+    monkeypatch.setattr(config, "LOCATION_LOOKUP_PATH", str(tmp_path / "location_lookup.db"))
+    monkeypatch.setattr(config, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    directory = tmp_path / "revisions"
+    directory.mkdir()
+    for name, (n_rows, seed) in PAGES.items():
+        (directory / name).write_text(generate_page_html(n_rows, seed=seed), encoding="utf-8")
+    return directory
+
+
+def _history(db_path):
+    conn = create_connection(db_path)
+    try:
+        return sorted(conn.execute(f'SELECT * FROM "{config.DB_HISTORY_TABLE_NAME}"').fetchall(), key=repr)
+    finally:
+        conn.close()
+
+
+def test_revision_timestamp_from_file_name(tmp_path):
+    undated = tmp_path / "page.html"
+    undated.write_text("")
+    os.utime(undated, (1580515200, 1580515200))
+
+    assert revision_timestamp("sp500_2019-03-15.html") == datetime(2019, 3, 15)
+    assert revision_timestamp("20190315_120000.html") == datetime(2019, 3, 15, 12, 0, 0)
+    assert revision_timestamp("2019-03-15T12:30.htm") == datetime(2019, 3, 15, 12, 30)
+    assert revision_timestamp(str(undated)) == datetime.fromtimestamp(1580515200) # No date: mtime
+    assert revision_timestamp("rev_20191399.html", mtime=1580515200) == datetime.fromtimestamp(1580515200)
+
+
+def test_list_revisions_in_revision_order(revisions):
+    (revisions / "notes.txt").write_text("not a page")
+    (revisions / "20200201_180000.htm").write_text("")
+
+    names = [os.path.basename(revision.path) for revision in list_revisions(str(revisions))]
+
+    assert names == ["sp500_2020-02-01.html", "20200201_180000.htm", "sp500_2020-02-02.html", "sp500_2020-02-03.html"]
+
+
+def test_history_backfill_dates_every_revision(revisions):
+    summary = backfill_revisions(str(revisions), targets=["history"], max_workers=1)
+
+    assert summary == {"revisions": 3, "merged": 3, "resumed": 0, "failed": 0, "out_of_order": 0, "remaining": 0}
+    conn = create_connection(config.DB_PATH)
+    try:
+        valid_from = [row[0] for row in conn.execute(
+            f'SELECT DISTINCT "Valid_From" FROM "{config.DB_HISTORY_TABLE_NAME}" ORDER BY 1')]
+    finally:
+        conn.close()
+    assert valid_from == ["2020-02-01", "2020-02-02", "2020-02-03"]
+
+
+def test_parallel_backfill_matches_sequential(revisions, tmp_path):
+    sequential = backfill_revisions(str(revisions), targets=["history"], max_workers=1)
+    parallel = backfill_revisions(str(revisions), targets=["history"], db_path=str(tmp_path / "parallel.db"),
+                                  manifest_path=str(tmp_path / "parallel.jsonl"), max_workers=3)
+
+    assert parallel == sequential
+    assert _history(str(tmp_path / "parallel.db")) == _history(config.DB_PATH)
+
+
+def test_backfill_resumes_from_the_manifest(revisions):
+    backfill_revisions(str(revisions), targets=["history"], max_workers=1)
+    history = _history(config.DB_PATH)
+
+    summary = backfill_revisions(str(revisions), targets=["history"], max_workers=1)
+
+    assert summary == {"revisions": 3, "merged": 0, "resumed": 3, "failed": 0, "out_of_order": 0, "remaining": 0}
+    assert _history(config.DB_PATH) == history
+
+
+def test_older_revision_is_not_loaded_into_the_history(revisions):
+    backfill_revisions(str(revisions), targets=["history"], max_workers=1)
+    history = _history(config.DB_PATH)
+    (revisions / "sp500_2020-01-15.html").write_text(generate_page_html(100, seed=4), encoding="utf-8")
+
+    summary = backfill_revisions(str(revisions), targets=["history"], max_workers=1)
+
+    assert summary["out_of_order"] == 1 and summary["merged"] == 0 and summary["resumed"] == 3
+    assert _history(config.DB_PATH) == history
+
+
+def test_broken_revision_is_skipped(revisions):
+    (revisions / "sp500_2020-02-02.html").write_text("<html><body>No table here</body></html>")
+
+    summary = backfill_revisions(str(revisions), targets=["history"], max_workers=1)
+
+    assert summary == {"revisions": 3, "merged": 2, "resumed": 0, "failed": 1, "out_of_order": 0, "remaining": 0}
+
+
+def test_history_backfill_refuses_a_table_without_history(revisions):
+    conn = create_connection(config.DB_PATH)
+    save_data_to_db(companies_frame(), conn, config.DB_TABLE_NAME, mode="replace")
+    conn.close()
+
+    assert backfill_revisions(str(revisions), targets=["history"], max_workers=1) is None
+
+
+def test_invalid_targets_and_directory(revisions, tmp_path):
+    assert backfill_revisions(str(revisions), targets=["warehouse"]) is None
+    assert backfill_revisions(str(revisions), targets=[]) is None
+    assert backfill_revisions(str(tmp_path / "missing"), targets=["history"]) is None
+
+
+def test_failed_snapshot_write_stops_the_backfill(revisions, monkeypatch):
+    pytest.importorskip("pyarrow")
+    write = SnapshotArchive.write
+
+    def failing_write(self, df, snapshot_date=None, **kwargs):
+        if snapshot_date == "2020-02-02":
+            return None
+        return write(self, df, snapshot_date, **kwargs)
+
+    monkeypatch.setattr(SnapshotArchive, "write", failing_write)
+
+    summary = backfill_revisions(str(revisions), targets=["snapshots"], max_workers=1)
+
+    assert summary == {"revisions": 3, "merged": 1, "resumed": 0, "failed": 1, "out_of_order": 0, "remaining": 1}
+    assert SnapshotArchive.from_config().dates() == ["2020-02-01"]
+
+    # The next run resumes after the merged revision
+    monkeypatch.setattr(SnapshotArchive, "write", write)
+    summary = backfill_revisions(str(revisions), targets=["snapshots"], max_workers=1)
+    assert summary["merged"] == 2 and summary["resumed"] == 1
+    assert SnapshotArchive.from_config().dates() == ["2020-02-01", "2020-02-02", "2020-02-03"]
@@ -0,0 +1,78 @@
+from benchmarks.bench_suite import STAGES, baseline_path, compare, run_suite
+from benchmarks.synthetic_html import generate_changes, generate_page_html, generate_rows
+from src.data_extraction import parse_changes_table, parse_sp500_table
+from src.data_transformation import transform_data
+
+
+def test_generator_is_deterministic_per_seed():
+    assert generate_page_html(200, seed=5) == generate_page_html(200, seed=5)
+    assert generate_page_html(200, seed=5) != generate_page_html(200, seed=6)
+
+
+def test_generated_page_parses_to_every_row():
+    html = generate_page_html(250, n_changes=120)
+
+    raw = parse_sp500_table(html)
+    transformed = transform_data(raw)
+
+    assert raw["Symbol"].tolist() == [row[0] for row in generate_rows(250)]
+    assert len(transformed) == 250 and transformed["Symbol"].is_unique
+    assert transformed["Date_Added"].notna().all() # Footnote brackets after the dates are stripped
+    assert len(parse_changes_table(html)) == 120
+
+
+def test_generated_changes_are_consistent_with_the_current_members():
+    current = [row[0] for row in generate_rows(100)]
+
+    changes = generate_changes(current, 300)
+
+    assert len(changes) == 300
+    assert [change[0] for change in changes] == sorted((change[0] for change in changes), reverse=True)
+    # Walking back from today: an added symbol was a member after its date, a removed one was not
+    members = set(current)
+    for day in sorted({change[0] for change in changes}, reverse=True):
+        today = [change for change in changes if change[0] == day]
+        added = {change[1] for change in today if change[1]}
+        removed = {change[3] for change in today if change[3]}
+        assert added <= members and not removed & members
+        members = (members - added) | removed
+
+
+def _results(times):
+    """Suite results with one size whose stages took the given (wall time s, peak bytes)."""
+    return {"sizes": {"1000": {"stages": {stage: {"wall_time_s": times[stage][0], "peak_memory_bytes": times[stage][1]}
+                                          for stage in STAGES}}}}
+
+
+def test_compare_reports_regressions_above_threshold_and_floor():
+    baseline = _results({"parse": (1.0, 100 * 2**20), "transform": (0.001, 2**20), "save": (1.0, 100 * 2**20)})
+    current = _results({"parse": (1.5, 100 * 2**20), # 50% slower: regression
+                        "transform": (0.003, 2**20), # 200% slower but 2 ms: below the floor
+                        "save": (1.1, 130 * 2**20)}) # 10% slower, 30% more memory
+
+    regressions = compare(current, baseline, threshold=0.2, min_time_s=0.005, min_memory_bytes=2**20)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("parse time at 1000 rows")
+    assert regressions[1].startswith("save memory at 1000 rows")
+
+
+def test_compare_skips_sizes_missing_from_the_baseline(capsys):
+    current = _results({stage: (1.0, 2**20) for stage in STAGES})
+
+    assert compare(current, {"sizes": {}}, threshold=0.2, min_time_s=0.005, min_memory_bytes=2**20) == []
+    assert "not in the baseline" in capsys.readouterr().out
+
+
+def test_run_suite_measures_every_stage():
+    results = run_suite([60], repeat=1)
+
+    stages = results["sizes"]["60"]["stages"]
+    assert set(stages) == set(STAGES)
+    assert all(metrics["wall_time_s"] > 0 and metrics["peak_memory_bytes"] > 0 for metrics in stages.values())
+    assert compare(results, results, threshold=0.0, min_time_s=0.0, min_memory_bytes=0) == []
+
+
+def test_baseline_path():
+    assert baseline_path("main").endswith("baselines/main.json")
+    assert baseline_path("results/run.json") == "results/run.json"
@@ -0,0 +1,133 @@
+import os
+import time
+
+import pytest
+
+from src import config, main_pipeline
+from src.backfill import backfill_revisions
+from src.checkpoints import CheckpointStore, stage_key
+from src.database_operations import clear_load_marker, create_connection, load_marker_key
+from src.sqlite_utils import get_metadata
+from benchmarks.synthetic_html import generate_page_html
+
+from conftest import Route
+
+
+def test_stage_key_changes_with_its_inputs():
+    key = stage_key("parse", "page-hash", ["Symbol"], "constituents")
+
+    assert stage_key("parse", "page-hash", ["Symbol"], "constituents") == key
+    assert stage_key("transform", "page-hash", ["Symbol"], "constituents") != key
+    assert stage_key("parse", "other-page", ["Symbol"], "constituents") != key
+    assert stage_key("parse", "page-hash", ["Symbol", "CIK"], "constituents") != key
+    assert stage_key("parse", "page-hash", ["Symbol"], "other-id") != key
+    assert key.startswith("parse-")
+
+
+def test_store_roundtrip(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints"))
+
+    assert store.get("missing") is None
+    store.put("key", {"rows": [1, 2, 3]})
+    assert store.get("key") == {"rows": [1, 2, 3]}
+
+
+def test_store_drops_unreadable_entries(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    (tmp_path / "broken.pkl").write_bytes(b"not a pickle")
+
+    assert store.get("broken") is None
+    assert not (tmp_path / "broken.pkl").exists()
+
+
+def test_store_evicts_expired_entries(tmp_path):
+    store = CheckpointStore(str(tmp_path), max_age_seconds=60)
+    store.put("old", 1)
+    store.put("new", 2)
+    an_hour_ago = time.time() - 3600
+    os.utime(tmp_path / "old.pkl", (an_hour_ago, an_hour_ago))
+
+    assert store.get("old") is None
+    assert store.evict() == 0
+    assert store.get("new") == 2
+
+
+def test_store_evicts_least_recently_used_above_max_bytes(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    for i, name in enumerate(["a", "b", "c"]):
+        store.put(name, b"x" * 1000)
+        os.utime(tmp_path / f"{name}.pkl", (1000 + i, 1000 + i)) # a is the oldest
+    store.get("a") # Reading refreshes it: b is now the least recently used
+    store.max_bytes = 2 * os.path.getsize(tmp_path / "a.pkl")
+
+    assert store.evict() == 1
+    assert sorted(os.listdir(tmp_path)) == ["a.pkl", "c.pkl"]
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch, local_server):
+    """run_pipeline against the local server, with every path in tmp_path. Returns the company loads made."""
+    local_server.routes["/sp500"] = Route(generate_page_html(60))
+    monkeypatch.setattr(config, "WIKIPEDIA_URL", local_server.url("/sp500"))
+    monkeypatch.setattr(config, "HTTP_CACHE_DIR", str(tmp_path / "http_cache"))
+    monkeypatch.setattr(config, "DB_PATH", str(tmp_path / "companies.db"))
+    monkeypatch.setattr(config, "CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    monkeypatch.setattr(config, "SNAPSHOT_DIR", None)
+    monkeypatch.setattr(config, "LOCATION_LOOKUP_PATH", str(tmp_path / "location_lookup.db"))
+    monkeypatch.setattr(config, "BACKFILL_MANIFEST_PATH", str(tmp_path / "manifest.jsonl"))
+
+    loads = []
+    save_data_to_db = main_pipeline.save_data_to_db
+
+    def counted(df, conn, table_name, **kwargs):
+        loads.append(table_name)
+        return save_data_to_db(df, conn, table_name, **kwargs)
+
+    monkeypatch.setattr(main_pipeline, "save_data_to_db", counted)
+    return loads
+
+
+def _load_marker():
+    conn = create_connection(config.DB_PATH)
+    try:
+        return get_metadata(conn, load_marker_key(config.DB_TABLE_NAME))
+    finally:
+        conn.close()
+
+
+def test_unchanged_page_skips_the_load(pipeline):
+    assert main_pipeline.run_pipeline()
+    marker = _load_marker()
+    assert pipeline == [config.DB_TABLE_NAME] and marker is not None
+    assert os.listdir(config.CHECKPOINT_DIR) # Parse and transform outputs were checkpointed
+
+    assert main_pipeline.run_pipeline()
+    assert pipeline == [config.DB_TABLE_NAME] # Second run: skipped
+    assert _load_marker() == marker
+
+
+def test_cleared_marker_forces_a_reload(pipeline):
+    assert main_pipeline.run_pipeline()
+    conn = create_connection(config.DB_PATH)
+    with conn:
+        clear_load_marker(conn, config.DB_TABLE_NAME)
+    conn.close()
+
+    assert main_pipeline.run_pipeline()
+    assert pipeline == [config.DB_TABLE_NAME, config.DB_TABLE_NAME]
+    assert _load_marker() is not None
+
+
+def test_history_backfill_clears_the_marker(pipeline, tmp_path):
+    assert main_pipeline.run_pipeline()
+    revisions = tmp_path / "revisions"
+    revisions.mkdir()
+    # Dated after today's load, so it is merged into the history rather than skipped as out of order
+    (revisions / "sp500_2099-01-01.html").write_text(generate_page_html(50, seed=7), encoding="utf-8")
+
+    summary = backfill_revisions(str(revisions), targets=["history"], max_workers=1)
+
+    assert summary is not None and summary["merged"] == 1
+    assert _load_marker() is None
+    assert main_pipeline.run_pipeline()
+    assert pipeline == [config.DB_TABLE_NAME, config.DB_TABLE_NAME]
@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src import config
+from src.aggregates import refresh_aggregates
+from src.cli import main
+from src.database_operations import create_connection, save_data_to_db, with_generation_bump
+
+from conftest import companies_frame
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs the CLI in a new interpreter and reports the heavy modules it imported
+_IMPORT_PROBE = """
+import sys
+from src.cli import main
+code = main(sys.argv[1:])
+heavy = sorted(name for name in ("pandas", "numpy", "requests", "bs4", "pyarrow") if name in sys.modules)
+print("HEAVY=" + ",".join(heavy))
+sys.exit(code)
+"""
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Database with the test companies loaded, set as config.DB_PATH."""
+    path = str(tmp_path / "companies.db")
+    monkeypatch.setattr(config, "DB_PATH", path)
+    conn = create_connection(path)
+    save_data_to_db(companies_frame(), conn, config.DB_TABLE_NAME, on_changes=with_generation_bump(refresh_aggregates))
+    conn.close()
+    return path
+
+
+@pytest.mark.parametrize("argv", [["status"], ["query", "sectors"], ["query", "company", "AAPL"]])
+def test_read_commands_do_not_import_the_pipeline_dependencies(db_path, argv):
+    result = subprocess.run([sys.executable, "-c", _IMPORT_PROBE, "--db", db_path, *argv],
+                            cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=60)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines()[-1] == "HEAVY="
+
+
+def test_status(db_path, capsys):
+    assert main(["status", "--format", "json"]) == 0
+
+    status = json.loads(capsys.readouterr().out)
+    assert status["database"] == db_path
+    assert status["active_companies"] == 6 and status["removed_companies"] == 0
+
+
+def test_query_formats(db_path, capsys):
+    assert main(["query", "--format", "csv", "sectors", "--limit", "2"]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        "GICS_Sector,Company_Count", "Communication Services,2", "Information Technology,2"]
+
+    assert main(["query", "--format", "json", "company", "ACN"]) == 0
+    [row] = json.loads(capsys.readouterr().out)
+    assert (row["Symbol"], row["Headquarters_Country"]) == ("ACN", "Ireland")
+
+
+def test_exit_codes(db_path, tmp_path, monkeypatch):
+    assert main(["query", "company", "UNKNOWN"]) == 0 # No rows is an answer
+    assert main(["query", "members", "not-a-date"]) == 1
+    assert main(["query", "members", "2020-01-01"]) == 1 # No index changes loaded
+    monkeypatch.setattr(config, "DB_PATH", str(tmp_path / "missing.db"))
+    assert main(["status"]) == 1
+    with pytest.raises(SystemExit):
+        main(["query", "unknown"])
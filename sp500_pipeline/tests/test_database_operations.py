@@ -0,0 +1,151 @@
+import sqlite3
+
+from src import config
+from src.database_operations import bulk_load_companies, save_data_to_db, upsert_companies
+
+from conftest import COMPANY_ROWS, companies_frame, with_values
+
+TABLE, HISTORY = config.DB_TABLE_NAME, config.DB_HISTORY_TABLE_NAME
+
+
+def _active(conn):
+    return dict(conn.execute(f'SELECT "Symbol", "Is_Active" FROM "{TABLE}" ORDER BY "Symbol"').fetchall())
+
+
+def _versions(conn, symbol):
+    return conn.execute(f'SELECT "GICS_Sector", "Change_Type", "Valid_From", "Valid_To" FROM "{HISTORY}" '
+                        f'WHERE "Symbol" = ? ORDER BY "Valid_From", rowid', (symbol,)).fetchall()
+
+
+def test_first_load_inserts_every_row_with_a_history_version(conn):
+    summary = upsert_companies(companies_frame(), conn, TABLE, load_date="2024-01-01")
+
+    assert summary == {"inserted": 6, "updated": 0, "reactivated": 0, "deleted": 0, "unchanged": 0}
+    assert set(_active(conn).values()) == {1}
+    assert _versions(conn, "XOM") == [("Energy", "insert", "2024-01-01", None)]
+
+
+def test_upsert_writes_only_the_diff(conn):
+    upsert_companies(companies_frame(), conn, TABLE, load_date="2024-01-01")
+    rows = with_values(COMPANY_ROWS, "AAPL", GICS_Sector="Consumer Electronics")
+    rows = [row for row in rows if row[0] != "XOM"]
+    rows.append(["NEW", "Newco", "Utilities", "Utility", "Austin, Texas", "2024-02-01", "0000000001", "2001"])
+
+    changes = []
+    summary = upsert_companies(companies_frame(rows), conn, TABLE, load_date="2024-02-01",
+                               on_changes=lambda _conn, _table, row_changes: changes.extend(row_changes))
+
+    assert summary == {"inserted": 1, "updated": 1, "reactivated": 0, "deleted": 1, "unchanged": 4}
+    assert _active(conn) == {"AAPL": 1, "ACN": 1, "CL": 1, "GOOG": 1, "GOOGL": 1, "NEW": 1, "XOM": 0}
+    assert _versions(conn, "AAPL") == [("Information Technology", "insert", "2024-01-01", "2024-02-01"),
+                                       ("Consumer Electronics", "update", "2024-02-01", None)]
+    assert _versions(conn, "XOM") == [("Energy", "insert", "2024-01-01", "2024-02-01")]
+    symbols = [((old or {}).get("Symbol"), (new or {}).get("Symbol")) for old, new in changes]
+    assert sorted(symbols, key=str) == sorted([(None, "NEW"), ("AAPL", "AAPL"), ("XOM", None)], key=str)
+
+
+def test_unchanged_load_writes_nothing(conn):
+    upsert_companies(companies_frame(), conn, TABLE, load_date="2024-01-01")
+    calls = []
+
+    summary = upsert_companies(companies_frame(), conn, TABLE, load_date="2024-02-01",
+                               on_changes=lambda *args: calls.append(args))
+
+    assert summary["unchanged"] == 6 and sum(summary.values()) == 6
+    assert calls == []
+    assert conn.execute(f'SELECT COUNT(*) FROM "{HISTORY}"').fetchone()[0] == 6
+
+
+def test_returning_company_is_reactivated(conn):
+    upsert_companies(companies_frame(), conn, TABLE, load_date="2024-01-01")
+    upsert_companies(companies_frame(COMPANY_ROWS[:-1]), conn, TABLE, load_date="2024-02-01") # CL leaves
+
+    summary = upsert_companies(companies_frame(), conn, TABLE, load_date="2024-03-01")
+
+    assert (summary["reactivated"], summary["deleted"]) == (1, 0)
+    assert _active(conn)["CL"] == 1
+    assert [version[1:] for version in _versions(conn, "CL")] == [("insert", "2024-01-01", "2024-02-01"),
+                                                                  ("reactivate", "2024-03-01", None)]
+
+
+def test_duplicate_keys_keep_the_last_row(conn):
+    rows = COMPANY_ROWS + [with_values(COMPANY_ROWS, "XOM", Security="Exxon Mobil Corp.")[3]]
+
+    summary = upsert_companies(companies_frame(rows), conn, TABLE, load_date="2024-01-01")
+
+    assert summary["inserted"] == 6
+    assert conn.execute(f'SELECT "Security" FROM "{TABLE}" WHERE "Symbol" = \'XOM\'').fetchone() == ("Exxon Mobil Corp.",)
+
+
+def test_failed_load_is_rolled_back(conn):
+    upsert_companies(companies_frame(), conn, TABLE, load_date="2024-01-01")
+
+    def failing_hook(*args):
+        raise ValueError("hook failed")
+
+    rows = with_values(COMPANY_ROWS, "AAPL", GICS_Sector="Consumer Electronics")
+    assert upsert_companies(companies_frame(rows), conn, TABLE, load_date="2024-02-01", on_changes=failing_hook) is None
+
+    assert conn.execute(f'SELECT "GICS_Sector" FROM "{TABLE}" WHERE "Symbol" = \'AAPL\'').fetchone() == ("Information Technology",)
+    assert len(_versions(conn, "AAPL")) == 1
+
+
+def _schema(conn, table):
+    return {row[1]: (row[2], row[5]) for row in conn.execute(f'PRAGMA table_info("{table}")')} # name -> (type, pk)
+
+
+def _indexes(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA index_list("{table}")') if row[1].startswith("idx_")}
+
+
+def test_connection_gets_the_configured_pragmas(conn):
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1 # NORMAL
+
+
+def test_managed_schema_has_types_key_flag_and_indexes(conn):
+    upsert_companies(companies_frame(), conn, TABLE, load_date="2024-01-01")
+
+    schema = _schema(conn, TABLE)
+    assert schema["Symbol"] == ("TEXT", 1)
+    assert (schema["CIK"], schema["Founded_Year"], schema["Date_Added"]) == (("INTEGER", 0), ("INTEGER", 0), ("TIMESTAMP", 0))
+    assert schema["Is_Active"] == ("INTEGER", 0)
+    assert _indexes(conn, TABLE) == {f"idx_{TABLE}_{column}" for column in config.DB_INDEXED_COLUMNS}
+    assert conn.execute(f'SELECT "Date_Added", "CIK", "Founded_Year" FROM "{TABLE}" WHERE "Symbol" = \'AAPL\'').fetchone() \
+        == ("1982-11-30 00:00:00", 320193, 1977)
+
+
+def test_legacy_to_sql_table_is_migrated_keeping_its_rows(conn):
+    df = companies_frame()
+    df.to_sql(TABLE, conn, index=False) # Table as the original replace mode created it (no key)
+    conn.commit()
+
+    summary = upsert_companies(df, conn, TABLE, load_date="2024-01-01")
+
+    assert summary["unchanged"] == 6
+    assert _schema(conn, TABLE)["Symbol"][1] == 1
+    assert conn.execute(f'SELECT COUNT(*) FROM "{TABLE}" WHERE "Is_Active" = 1').fetchone()[0] == 6
+    assert conn.execute(f'SELECT COUNT(*) FROM "{HISTORY}" WHERE "Change_Type" = \'initial\'').fetchone()[0] == 6
+
+
+def test_replace_mode_rewrites_the_table_in_place(conn):
+    save_data_to_db(companies_frame(), conn, TABLE, mode="replace")
+    calls = []
+
+    written = bulk_load_companies(companies_frame(COMPANY_ROWS[:2]), conn, TABLE,
+                                  on_changes=lambda *args: calls.append(args[2]))
+
+    assert written == 2
+    assert _active(conn) == {"AAPL": 1, "GOOGL": 1}
+    assert calls == [None] # Full rewrite: no row changes
+    assert _schema(conn, TABLE)["Symbol"][1] == 1
+
+
+def test_failed_bulk_load_keeps_the_previous_rows(conn):
+    save_data_to_db(companies_frame(), conn, TABLE, mode="replace")
+
+    def failing_hook(*args):
+        raise sqlite3.OperationalError("hook failed")
+
+    assert bulk_load_companies(companies_frame(COMPANY_ROWS[:2]), conn, TABLE, on_changes=failing_hook) is None
+    assert len(_active(conn)) == 6
@@ -0,0 +1,56 @@
+import json
+import os
+
+from src.data_extraction import _cache_paths, fetch_html_conditional
+
+from conftest import Route
+
+
+def test_200_stores_body_and_etag(local_server, tmp_path):
+    local_server.routes["/page"] = Route("<html>v1</html>", etag='"v1"')
+    url = local_server.url("/page")
+
+    result = fetch_html_conditional(url, cache_dir=str(tmp_path))
+
+    assert result.content == "<html>v1</html>"
+    assert (result.from_cache, result.status_code) == (False, 200)
+    body_path, meta_path = _cache_paths(url, str(tmp_path))
+    with open(body_path, encoding="utf-8") as f:
+        assert f.read() == "<html>v1</html>"
+    with open(meta_path, encoding="utf-8") as f:
+        assert json.load(f)["etag"] == '"v1"'
+
+
+def test_304_reuses_cached_body(local_server, tmp_path):
+    local_server.routes["/page"] = Route("<html>v1</html>", etag='"v1"')
+    url = local_server.url("/page")
+    fetch_html_conditional(url, cache_dir=str(tmp_path))
+
+    result = fetch_html_conditional(url, cache_dir=str(tmp_path))
+
+    assert local_server.requests[-1].get("If-None-Match") == '"v1"'
+    assert result == ("<html>v1</html>", True, 304, 0)
+
+
+def test_missing_cache_file_falls_back_to_unconditional_get(local_server, tmp_path):
+    local_server.routes["/page"] = Route("<html>v1</html>", etag='"v1"')
+    url = local_server.url("/page")
+    fetch_html_conditional(url, cache_dir=str(tmp_path))
+    body_path, _ = _cache_paths(url, str(tmp_path))
+    os.remove(body_path)
+    local_server.routes["/page"] = Route("<html>v2</html>", etag='"v2"')
+
+    result = fetch_html_conditional(url, cache_dir=str(tmp_path))
+
+    assert "If-None-Match" not in local_server.requests[-1]
+    assert (result.content, result.from_cache, result.status_code) == ("<html>v2</html>", False, 200)
+
+
+def test_without_cache_dir_nothing_is_stored(local_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    local_server.routes["/page"] = Route("<html>v1</html>", etag='"v1"')
+
+    result = fetch_html_conditional(local_server.url("/page"), cache_dir=None)
+
+    assert result.content == "<html>v1</html>"
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,79 @@
+import sqlite3
+
+import pytest
+
+from src import config
+from src.data_transformation import transform_data
+from src.locations import Location, LocationLookup, resolve_location
+
+from conftest import COMPANY_ROWS, raw_companies
+
+US, CANADA = "United States", "Canada"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Cupertino, California", ("Cupertino", "California", US)),
+    ("Santa Clara, CA[3]", ("Santa Clara", "California", US)),
+    ("Washington, D.C.", ("Washington", "District of Columbia", US)),
+    ("Atlanta, Georgia", ("Atlanta", "Georgia", US)), # The US state wins over the country
+    ("Dublin, Ireland", ("Dublin", None, "Ireland")),
+    ("Toronto, Ontario, Canada", ("Toronto", "Ontario", CANADA)),
+    ("London, UK", ("London", None, "United Kingdom")),
+    ("Bermuda", (None, None, "Bermuda")),
+    ("New York", ("New York", None, US)), # Bare name: the city or the state, kept as the city
+    ("Somewhere, Nowhere", ("Somewhere", "Nowhere", None)), # Not in the gazetteer: previous split
+    (None, (None, None, None)),
+])
+def test_resolve_location(text, expected):
+    assert resolve_location(text) == Location(*expected)
+
+
+@pytest.mark.parametrize("text", ["Foo, in", "Washington, dc", "Paris, me"])
+def test_lower_case_abbreviations_are_not_codes(text):
+    city, state = text.split(", ")
+    assert resolve_location(text) == Location(city, state, None)
+
+
+def test_full_names_ignore_case_and_dots():
+    assert resolve_location("Boston, massachusetts") == Location("Boston", "Massachusetts", US)
+    assert resolve_location("Washington, D. C.") == Location("Washington", "District of Columbia", US)
+
+
+def test_lookup_saves_only_new_texts_and_reloads_them(tmp_path):
+    path = str(tmp_path / "lookup.db")
+    lookup = LocationLookup.open(path)
+    lookup.resolve_many(["Dublin, Ireland", "Spring, Texas"])
+    lookup.save()
+
+    reopened = LocationLookup.open(path)
+    assert reopened._resolved == {"Dublin, Ireland": Location("Dublin", None, "Ireland"),
+                                  "Spring, Texas": Location("Spring", "Texas", US)}
+    reopened.resolve_many(["Dublin, Ireland", "Zug, Switzerland"])
+    assert list(reopened._new) == ["Zug, Switzerland"]
+
+
+def test_lookup_drops_entries_of_another_gazetteer_version(tmp_path):
+    path = str(tmp_path / "lookup.db")
+    lookup = LocationLookup.open(path)
+    lookup.resolve_many(["Dublin, Ireland"])
+    lookup.save()
+    with sqlite3.connect(path) as conn:
+        conn.execute(f'UPDATE "{config.LOCATION_LOOKUP_TABLE_NAME}" SET "City" = \'stale\', '
+                     f'"Gazetteer_Version" = \'old\'')
+
+    reopened = LocationLookup.open(path)
+
+    assert reopened._resolved == {}
+    assert reopened.resolve_many(["Dublin, Ireland"]) == [Location("Dublin", None, "Ireland")]
+
+
+def test_transform_data_uses_the_given_lookup_and_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "LOCATION_LOOKUP_PATH", str(tmp_path / "lookup.db"))
+    lookup = LocationLookup()
+
+    df = transform_data(raw_companies(COMPANY_ROWS), lookup)
+
+    assert df["Headquarters_Country"].tolist() == [US, US, US, US, "Ireland", US]
+    assert df["Headquarters_State"].isna().tolist() == [False, False, False, False, True, False]
+    assert "Mountain View, California" in lookup._resolved
+    assert list(tmp_path.iterdir()) == []
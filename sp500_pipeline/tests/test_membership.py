@@ -0,0 +1,84 @@
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from src import config
+from src.data_extraction import parse_changes_table, parse_sp500_table
+from src.data_transformation import transform_changes, transform_data
+from src.database_operations import save_constituent_changes, save_data_to_db
+from src.membership import build_membership_intervals, get_members_as_of, rebuild_index_membership
+from src.sqlite_utils import as_iso_date
+from benchmarks.synthetic_html import generate_page_html
+
+START, END = config.MEMBERSHIP_START_SENTINEL, config.MEMBERSHIP_END_SENTINEL
+
+
+def test_intervals_replay_the_changes_backwards():
+    changes = [("2024-03-01", "C", "X"), ("2024-01-01", "B", None), ("2023-06-01", None, "Y")] # Newest first
+
+    intervals = build_membership_intervals(["A", "B", "C"], changes)
+
+    assert sorted(intervals) == [("A", START, END), ("B", "2024-01-01", END), ("C", "2024-03-01", END),
+                                 ("X", START, "2024-03-01"), ("Y", START, "2023-06-01")]
+
+
+def test_symbol_added_and_removed_on_one_day_is_never_a_member():
+    changes = [("2024-02-01", None, "Z"), ("2024-02-01", "Z", None)]
+
+    assert build_membership_intervals([], changes) == []
+
+
+def test_inconsistent_changes_are_skipped():
+    # D is added but is not a member afterwards; A is removed but is still a member
+    changes = [("2024-02-01", "D", None), ("2024-01-01", None, "A")]
+
+    assert build_membership_intervals(["A"], changes) == [("A", START, END)]
+
+
+@pytest.fixture
+def membership_db(conn):
+    """Database with the companies and changes of a synthetic page, and its membership intervals."""
+    html = generate_page_html(60, n_changes=150)
+    save_data_to_db(transform_data(parse_sp500_table(html)), conn, config.DB_TABLE_NAME)
+    changes = transform_changes(parse_changes_table(html))
+    save_constituent_changes(changes, conn, on_changes=rebuild_index_membership)
+    return conn, changes
+
+
+def _replayed_members(current, changes: pd.DataFrame, day: str):
+    """Members on day by undoing, newest first, every change that took effect after it."""
+    members = set(current)
+    for row in changes.sort_values("Effective_Date", ascending=False).itertuples():
+        if as_iso_date(row.Effective_Date) <= day:
+            break
+        if pd.notna(row.Added_Symbol):
+            members.discard(row.Added_Symbol)
+        if pd.notna(row.Removed_Symbol):
+            members.add(row.Removed_Symbol)
+    return sorted(members)
+
+
+def test_members_as_of_match_a_replay_of_the_changes(membership_db):
+    conn, changes = membership_db
+    current = [row[0] for row in conn.execute(f'SELECT "Symbol" FROM "{config.DB_TABLE_NAME}" WHERE "Is_Active" = 1')]
+    days = sorted({as_iso_date(day) for day in changes["Effective_Date"]})
+    probes = [days[0], days[len(days) // 2], days[-1], "1990-01-01", "2030-01-01"]
+    probes += [as_iso_date(pd.Timestamp(day) - pd.Timedelta(days=1)) for day in days[::10]]
+
+    for day in probes:
+        assert get_members_as_of(conn, day) == _replayed_members(current, changes, day), day
+
+
+def test_members_as_of_accepts_dates_and_rejects_invalid_text(membership_db):
+    conn, _ = membership_db
+    assert get_members_as_of(conn, date(2020, 1, 1)) == get_members_as_of(conn, "2020-01-01")
+    assert get_members_as_of(conn, datetime(2020, 1, 1, 15, 30)) == get_members_as_of(conn, "2020-01-01")
+    assert get_members_as_of(conn, "not a date") is None
+
+
+def test_as_iso_date():
+    assert as_iso_date(pd.Timestamp("2024-05-06 10:00")) == "2024-05-06"
+    assert as_iso_date("2024-05-06T10:00:00") == "2024-05-06"
+    with pytest.raises(ValueError):
+        as_iso_date("2024-13-01")
@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from src import config
+from src.data_extraction import get_index_constituents_data
+
+from conftest import Route, constituents_page
+
+MAPPING = {
+    "Symbol": "Symbol",
+    "Security": ["Security", "Company"],
+    "GICS_Sector": "GICS Sector",
+    "Headquarters_Location": "Headquarters Location",
+}
+HEADERS = ("Symbol", "Company", "GICS Sector", "Headquarters Location")
+
+
+@pytest.fixture
+def sources(local_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "HTTP_CACHE_DIR", str(tmp_path))
+    local_server.routes["/large"] = Route(constituents_page(
+        [["AAA", "Alpha", "Energy", "Houston, Texas"], ["BBB", "Beta", "Utilities", "Dublin, Ireland"]], HEADERS))
+    local_server.routes["/mid"] = Route(constituents_page(
+        [["CCC", "Gamma", "Materials", "Zug, Switzerland"]], HEADERS))
+    source = {"table_id": "constituents", "header_hint": "GICS Sector", "column_mapping": MAPPING}
+    return {
+        "Large": {**source, "url": local_server.url("/large")},
+        "Mid": {**source, "url": local_server.url("/mid")},
+    }
+
+
+def test_each_frame_gets_its_index_name(sources):
+    df = get_index_constituents_data(sources, max_workers=2)
+
+    assert df["Index_Name"].tolist() == ["Large", "Large", "Mid"]
+    assert df["Symbol"].tolist() == ["AAA", "BBB", "CCC"]
+    assert df["Security"].tolist() == ["Alpha", "Beta", "Gamma"]
+
+
+def test_failing_source_does_not_drop_the_others(sources, local_server):
+    sources["Missing"] = {**sources["Mid"], "url": local_server.url("/missing")} # 404
+    sources["No table"] = {**sources["Mid"], "url": local_server.url("/empty")}
+    local_server.routes["/empty"] = Route("<html><body>No table here</body></html>")
+
+    df = get_index_constituents_data(sources, max_workers=4)
+
+    assert sorted(set(df["Index_Name"])) == ["Large", "Mid"]
+    assert len(df) == 3
+
+
+def test_all_sources_failing_returns_none(local_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "HTTP_CACHE_DIR", str(tmp_path))
+    source = {"url": local_server.url("/missing"), "column_mapping": MAPPING}
+
+    assert get_index_constituents_data({"Missing": source}) is None
+
+
+def test_sources_are_fetched_concurrently(local_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "HTTP_CACHE_DIR", str(tmp_path))
+    delay, count = 0.4, 4
+    sources = {}
+    for i in range(count):
+        local_server.routes[f"/slow{i}"] = Route(constituents_page(
+            [[f"S{i}", f"Slow {i}", "Energy", "Houston, Texas"]], HEADERS), delay=delay)
+        sources[f"Slow {i}"] = {"url": local_server.url(f"/slow{i}"), "table_id": "constituents",
+                                "column_mapping": MAPPING}
+
+    start = time.perf_counter()
+    df = get_index_constituents_data(sources, max_workers=count)
+    elapsed = time.perf_counter() - start
+
+    assert len(df) == count
+    assert elapsed < delay * count / 2 # Close to the slowest source, not the sum of all of them
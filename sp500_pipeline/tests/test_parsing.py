@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from src.data_extraction import parse_sp500_table
+from benchmarks.synthetic_html import generate_page_html
+
+from conftest import constituents_page
+
+HEADERS = ("Symbol", "Security", "GICS Sector", "GICS Sub-Industry", "Headquarters Location", "Date added", "CIK", "Founded")
+
+# Cells with links, footnotes, entities, line breaks and blanks, as on the live page
+MARKUP_ROWS = [
+    ['<a href="/wiki/MMM">MMM</a>', '<a href="/wiki/3M">3M</a>', "Industrials", "Industrial Conglomerates",
+     '<a href="/wiki/Saint_Paul">Saint Paul</a>, <a href="/wiki/Minnesota">Minnesota</a>', "1957-03-04",
+     "0000066740", "1902"],
+    ["BRK.B", "Berkshire Hathaway", "Financials", "Multi-Sector Holdings", "Omaha, Nebraska",
+     "2010-02-16", "0001067983", "1839<sup>[3]</sup>"],
+    ["PG", "Procter &amp; Gamble", "Consumer Staples", "Personal Products &amp; Care",
+     "Cincinnati,<br/>Ohio", "1957-03-04", "0000080424", "1837"],
+    ["  XYZ ", "", "Energy", "Oil &#38; Gas", "Houston, Texas", "", "", ""],
+]
+
+
+def _markup_page(with_table_id=True):
+    page = constituents_page(MARKUP_ROWS, headers=[f'<a href="/wiki/{h}">{h}</a>' for h in HEADERS])
+    # A table with the same class before the constituents table must not be picked
+    decoy = '<table class="wikitable sortable"><tr><th>Symbol</th><th>Name</th></tr><tr><td>X</td><td>Y</td></tr></table>'
+    page = page.replace("<body>", f"<body>{decoy}")
+    return page if with_table_id else page.replace(' id="constituents"', "")
+
+
+@pytest.mark.parametrize("with_table_id", [True, False]) # False: fallback to the class + header lookup
+def test_backends_parse_the_same_table(with_table_id):
+    html = generate_page_html(300, with_table_id=with_table_id)
+
+    stream = parse_sp500_table(html, backend="stream")
+
+    assert len(stream) == 300
+    pd.testing.assert_frame_equal(stream, parse_sp500_table(html, backend="bs4"))
+
+
+@pytest.mark.parametrize("with_table_id", [True, False])
+def test_backends_agree_on_cell_markup(with_table_id):
+    html = _markup_page(with_table_id)
+
+    stream = parse_sp500_table(html, backend="stream")
+
+    pd.testing.assert_frame_equal(stream, parse_sp500_table(html, backend="bs4"))
+    assert stream["Symbol"].tolist() == ["MMM", "BRK.B", "PG", "XYZ"]
+    assert stream["Security"].tolist()[2] == "Procter & Gamble"
+
+
+def test_page_without_the_table():
+    html = "<html><body><table class='wikitable'><tr><th>Name</th></tr></table></body></html>"
+
+    assert parse_sp500_table(html, backend="stream") is None
+    assert parse_sp500_table(html, backend="bs4") is None
+    assert parse_sp500_table(html, backend="regex") is None
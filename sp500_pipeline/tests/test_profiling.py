@@ -0,0 +1,55 @@
+import json
+import os
+
+from src.profiling import PipelineProfiler
+
+MB = 1024 * 1024
+
+
+def _allocate(size: int) -> None:
+    block = bytearray(size)
+    del block
+
+
+def test_nested_stage_keeps_the_outer_peak(tmp_path):
+    profiler = PipelineProfiler(enabled=True, metrics_path=str(tmp_path / "runs.jsonl"))
+
+    with profiler.stage("outer"):
+        _allocate(8 * MB)
+        with profiler.stage("inner", rows_in=3):
+            _allocate(MB)
+
+    inner, outer = profiler.stages
+    assert (inner["stage"], inner["parent"], inner["rows_in"]) == ("inner", "outer", 3)
+    assert "parent" not in outer
+    assert outer["peak_memory_bytes"] >= 8 * MB > inner["peak_memory_bytes"] >= MB
+    assert outer["wall_time_s"] >= inner["wall_time_s"]
+
+
+def test_nested_stages_under_cprofile(tmp_path):
+    profiler = PipelineProfiler(enabled=True, cprofile=True, metrics_path=str(tmp_path / "runs.jsonl"),
+                                profile_dir=str(tmp_path / "profiles"))
+
+    with profiler.stage("load"):
+        with profiler.stage("load_batch"):
+            _allocate(MB)
+    with profiler.stage("parse"):
+        pass
+
+    assert profiler.write("success") == str(tmp_path / "runs.jsonl")
+    with open(tmp_path / "runs.jsonl", encoding="utf-8") as f:
+        record = json.loads(f.read())
+    assert [stage["stage"] for stage in record["stages"]] == ["load_batch", "load", "parse"]
+    assert os.path.basename(record["cprofile_dump"]).endswith("_load.prof")
+    assert os.path.exists(record["cprofile_dump"])
+
+
+def test_disabled_profiler_records_nothing(tmp_path):
+    profiler = PipelineProfiler(enabled=False, metrics_path=str(tmp_path / "runs.jsonl"))
+
+    with profiler.stage("parse", rows_in=5) as metrics:
+        metrics["rows_out"] = 5
+
+    assert profiler.stages == []
+    assert profiler.write("success") is None
+    assert not os.path.exists(tmp_path / "runs.jsonl")
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+from src import config
+from src.aggregates import refresh_aggregates
+from src.data_transformation import transform_data
+from src.database_operations import create_connection, save_data_to_db, with_generation_bump
+from src.server import ReadPool, ReadServer, ResultCache
+
+from conftest import COMPANY_ROWS, raw_companies
+
+ALPHABET_CIK, APPLE_CIK = 1652044, 320193
+
+
+def _build_database(db_path: str, rows=COMPANY_ROWS) -> None:
+    conn = create_connection(db_path)
+    save_data_to_db(transform_data(raw_companies(rows)), conn, config.DB_TABLE_NAME,
+                    on_changes=with_generation_bump(refresh_aggregates))
+    conn.close()
+
+
+def _with_server(db_path: str, scenario):
+    """Runs scenario(server) against a read server on db_path (no socket is opened)."""
+    async def run():
+        server = ReadServer(ReadPool.open(db_path, 2), ResultCache())
+        await server.refresh_generation()
+        try:
+            return await scenario(server)
+        finally:
+            await server.close()
+    return asyncio.run(run())
+
+
+def test_batch_cik_lookup_returns_every_share_class(tmp_path):
+    db_path = str(tmp_path / "companies.db")
+    _build_database(db_path)
+
+    async def scenario(server):
+        return await server.lookup_companies([], [ALPHABET_CIK, APPLE_CIK, 1])
+
+    answer = _with_server(db_path, scenario)
+
+    assert sorted(company["Symbol"] for company in answer["companies"]) == ["AAPL", "GOOG", "GOOGL"]
+    assert answer["not_found"] == [1]
+
+
+def test_cached_cik_lookup_keeps_every_share_class(tmp_path):
+    db_path = str(tmp_path / "companies.db")
+    _build_database(db_path)
+
+    async def scenario(server):
+        await server.lookup_companies([], [ALPHABET_CIK])
+        hits = server.cache.hits
+        answer = await server.lookup_companies([], [ALPHABET_CIK])
+        return answer, server.cache.hits - hits
+
+    answer, new_hits = _with_server(db_path, scenario)
+
+    assert new_hits == 1
+    assert sorted(company["Symbol"] for company in answer["companies"]) == ["GOOG", "GOOGL"]
+
+
+def test_company_named_by_symbol_and_cik_is_listed_once(tmp_path):
+    db_path = str(tmp_path / "companies.db")
+    _build_database(db_path)
+
+    async def scenario(server):
+        body = await server.dispatch("GET", f"/companies?symbol=GOOG,XOM,GOOG&cik={ALPHABET_CIK}", b"")
+        return json.loads(body)
+
+    answer = _with_server(db_path, scenario)
+
+    assert [company["Symbol"] for company in answer["companies"]] == ["GOOG", "XOM", "GOOGL"]
+    assert answer["not_found"] == []
+
+
+def test_new_load_generation_drops_cached_results(tmp_path):
+    db_path = str(tmp_path / "companies.db")
+    _build_database(db_path)
+
+    async def scenario(server):
+        before = json.loads(await server.dispatch("GET", "/sectors", b""))
+        _build_database(db_path, [row for row in COMPANY_ROWS if row[0] != "XOM"]) # XOM leaves the index
+        await server.refresh_generation()
+        after = json.loads(await server.dispatch("GET", "/sectors", b""))
+        return before, after
+
+    before, after = _with_server(db_path, scenario)
+
+    assert {"GICS_Sector": "Energy", "Company_Count": 1} in before
+    assert all(row["GICS_Sector"] != "Energy" for row in after)
@@ -0,0 +1,69 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow") # Optional dependency: without it snapshots are not archived
+
+from src.data_transformation import transform_data
+from src.snapshots import SnapshotArchive
+
+from conftest import COMPANY_ROWS, raw_companies
+
+
+def _companies(rows=COMPANY_ROWS) -> pd.DataFrame:
+    return transform_data(raw_companies(rows))
+
+
+@pytest.mark.parametrize("founded", ["1977", "unknown"]) # Founded_Year comes out as int64 / float64
+def test_roundtrip_keeps_transform_dtypes(tmp_path, founded):
+    rows = [row[:-1] + [founded] if row[0] == "AAPL" else row for row in COMPANY_ROWS]
+    df = _companies(rows)
+    archive = SnapshotArchive(str(tmp_path))
+    archive.write(df, "2024-01-15")
+
+    read = archive.read("2024-01-15")
+
+    assert read.dtypes.to_dict() == df.dtypes.to_dict()
+    pd.testing.assert_frame_equal(read, df)
+    assert read.attrs["snapshot_date"] == "2024-01-15"
+
+
+def test_read_returns_the_snapshot_in_force(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    archive.write(_companies(COMPANY_ROWS[:2]), "2024-01-10", key="k1")
+    archive.write(_companies(COMPANY_ROWS[:4]), "2024-01-20", key="k2")
+
+    assert archive.read("2024-01-15")["Symbol"].tolist() == ["AAPL", "GOOGL"]
+    assert archive.read("2024-02-01", columns=["Symbol"]).attrs["snapshot_date"] == "2024-01-20"
+    assert archive.read("2024-01-01") is None
+    assert archive.latest_key() == "k2"
+
+
+def test_diff_reports_added_removed_and_updated(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    archive.write(_companies(COMPANY_ROWS[:3]), "2024-01-10")
+    changed = [row[:] for row in COMPANY_ROWS[1:4]]
+    changed[0][2] = "Information Technology" # GOOGL changes sector
+    archive.write(_companies(changed), "2024-01-20")
+
+    diff = archive.diff("2024-01-10", "2024-01-20")
+
+    assert diff.values.tolist() == [["AAPL", "removed", ""], ["GOOGL", "updated", "GICS_Sector"],
+                                    ["XOM", "added", ""]]
+
+
+def test_compaction_keeps_every_date_readable(tmp_path):
+    archive = SnapshotArchive(str(tmp_path), compacted_compression="zstd")
+    frames = {f"2024-01-{day:02d}": _companies(COMPANY_ROWS[:day]) for day in (1, 2, 3)}
+    for day, df in frames.items():
+        archive.write(df, day, key=day)
+    archive.write(_companies(), "2024-02-01")
+
+    assert archive.compact(before="2024-02-15") == 3
+
+    assert os.listdir(tmp_path / "daily") == ["2024-02-01.arrow"]
+    assert os.listdir(tmp_path / "monthly") == ["2024-01.arrow"]
+    for day, df in frames.items():
+        pd.testing.assert_frame_equal(archive.read(day), df)
+    assert archive.dates() == ["2024-01-01", "2024-01-02", "2024-01-03", "2024-02-01"]
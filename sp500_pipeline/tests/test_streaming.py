@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+from src import config
+from src.aggregates import refresh_aggregates
+from src.data_extraction import iter_sp500_table_batches, parse_sp500_table
+from src.data_transformation import transform_data
+from src.database_operations import create_connection, save_batches_to_db, save_data_to_db
+from src.locations import LocationLookup
+from benchmarks.synthetic_html import generate_page_html
+
+TABLE, HISTORY = config.DB_TABLE_NAME, config.DB_HISTORY_TABLE_NAME
+
+
+def _dump(conn):
+    """Every table the loads write, as sorted rows."""
+    tables = [TABLE, HISTORY, config.AGG_SECTOR_COUNTS_TABLE, config.AGG_STATE_COUNTS_TABLE,
+              config.AGG_OLDEST_COMPANIES_TABLE]
+    return {table: sorted(conn.execute(f'SELECT * FROM "{table}"').fetchall(), key=repr) for table in tables}
+
+
+def _load_full(conn, html):
+    save_data_to_db(transform_data(parse_sp500_table(html)), conn, TABLE, mode="incremental",
+                    on_changes=refresh_aggregates)
+
+
+def _load_streaming(conn, html, batch_size):
+    lookup = LocationLookup()
+    batches = (transform_data(batch, lookup) for batch in iter_sp500_table_batches(html, batch_size))
+    return save_batches_to_db(batches, conn, TABLE, on_changes=refresh_aggregates)
+
+
+@pytest.mark.parametrize("with_table_id", [True, False]) # False: fallback table, buffered then batched
+@pytest.mark.parametrize("batch_size", [1, 7, 100, 1000])
+def test_batches_hold_the_parsed_table(with_table_id, batch_size):
+    html = generate_page_html(120, with_table_id=with_table_id)
+
+    batches = list(iter_sp500_table_batches(html, batch_size))
+
+    assert all(len(batch) <= batch_size for batch in batches)
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), parse_sp500_table(html))
+
+
+@pytest.mark.parametrize("batch_size", [7, 64, 1000])
+def test_streaming_load_equals_full_load(tmp_path, batch_size):
+    full_conn = create_connection(str(tmp_path / "full.db"))
+    stream_conn = create_connection(str(tmp_path / "stream.db"))
+    # Later pages change most rows, drop the last 20 companies and then add 30: updates, soft deletes,
+    # reactivations and inserts
+    pages = [generate_page_html(150, seed=1), generate_page_html(130, seed=2), generate_page_html(180, seed=3)]
+    try:
+        for page in pages:
+            _load_full(full_conn, page)
+            assert _load_streaming(stream_conn, page, batch_size) is not None
+            assert _dump(stream_conn) == _dump(full_conn)
+    finally:
+        full_conn.close()
+        stream_conn.close()
+
+
+def test_interrupted_stream_keeps_committed_batches_and_deletes_nothing(conn):
+    first, second = generate_page_html(40, seed=1), generate_page_html(40, seed=2)
+    _load_streaming(conn, first, 10)
+
+    def failing_batches():
+        batches = iter_sp500_table_batches(second, 10)
+        yield transform_data(next(batches))
+        raise ValueError("page truncated")
+
+    assert save_batches_to_db(failing_batches(), conn, TABLE) is None
+
+    # The first batch of the second page is committed, and no company of the first page was soft-deleted
+    expected = set(parse_sp500_table(first)["Symbol"]) | set(parse_sp500_table(second)["Symbol"][:10])
+    active = {row[0] for row in conn.execute(f'SELECT "Symbol" FROM "{TABLE}" WHERE "Is_Active" = 1')}
+    assert active == expected
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from src.data_extraction import parse_sp500_table
+from src.data_transformation import clean_founded_year, extract_founded_years, transform_data
+from src.locations import resolve_location
+from benchmarks.synthetic_html import generate_page_html
+
+from conftest import COMPANY_ROWS, raw_companies
+
+FOUNDED_CASES = {
+    "every value has a year": ["1977", "1989 (1951)", "c. 1850", "2001[4]"],
+    "some values have no year": ["1977", "unknown", None, "", "19th century", "12345"],
+    "no value has a year": [None, "n/a", ""],
+}
+
+
+@pytest.mark.parametrize("values", FOUNDED_CASES.values(), ids=FOUNDED_CASES.keys())
+@pytest.mark.parametrize("dtype", [object, "string"]) # string: as the parser returns the column
+def test_founded_years_match_the_per_row_function(values, dtype):
+    founded = pd.Series(values, dtype=dtype)
+
+    expected = founded.apply(clean_founded_year)
+
+    pd.testing.assert_series_equal(extract_founded_years(founded), expected, check_names=False)
+
+
+def test_founded_years_ignore_non_string_values():
+    founded = pd.Series(["1902", 1999, float("nan"), None], dtype=object)
+
+    expected = founded.apply(clean_founded_year)
+
+    pd.testing.assert_series_equal(extract_founded_years(founded), expected, check_names=False)
+
+
+def test_transform_resolves_every_row_like_the_per_row_functions():
+    raw = parse_sp500_table(generate_page_html(300))
+
+    transformed = transform_data(raw)
+
+    locations = raw["Headquarters_Location"].apply(resolve_location)
+    for field, column in enumerate(["Headquarters_City", "Headquarters_State", "Headquarters_Country"]):
+        pd.testing.assert_series_equal(transformed[column], locations.apply(lambda location: location[field]),
+                                       check_names=False)
+    pd.testing.assert_series_equal(transformed["Founded_Year"], raw["Founded"].apply(clean_founded_year),
+                                   check_names=False)
+
+
+def test_transform_does_not_depend_on_the_input_dtype():
+    inferred = raw_companies(COMPANY_ROWS) # String columns, as the parser returns them
+
+    # Text columns keep the input dtype; values and the derived columns are the same
+    pd.testing.assert_frame_equal(transform_data(inferred.astype(object)), transform_data(inferred), check_dtype=False)
+    assert transform_data(inferred)["Founded_Year"].dtype == "int64"